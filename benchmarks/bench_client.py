@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+Client benchmark
+
+Measures the throughput and the latency percentiles of the hot paths of the client, get,
+get_many at several batch sizes, list, check_privilege and authenticate, in async mode and
+for get in sync mode, against a FakeConjurServer running in-process.
+
+The results can be saved as JSON, and compared with a baseline saved by an earlier run: the
+run fails when a scenario lost more than --threshold of its throughput, or its p95 latency
+grew by more than --threshold. Run from the repository root:
+
+    python -m benchmarks.bench_client --save-baseline baseline.json
+    python -m benchmarks.bench_client --baseline baseline.json --output results.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+
+from conjur_api import Client
+from conjur_api.models import SslVerificationMode
+from conjur_api.testing import FakeConjurServer
+
+RESULTS_FORMAT_VERSION = 1
+GET_MANY_BATCH_SIZES = (1, 10, 100)
+DEFAULT_THRESHOLD = 0.2
+
+
+def scenarios(client: Client, sync_client: Client, variables: int) -> dict:
+    """
+    @return: The operation of every scenario by name, each called with the index of the operation
+    """
+    def variable(index: int) -> str:
+        index %= variables
+        return f'app-{index % 2}/secret-{index}'
+
+    def get_many(size: int):
+        return lambda index: client.get_many(*(variable(index * size + offset) for offset in range(size)))
+
+    operations = {'get': lambda index: client.get(variable(index))}
+    operations.update({f'get_many_{size}': get_many(size) for size in GET_MANY_BATCH_SIZES})
+    operations.update({
+        'list': lambda index: client.list({'kind': 'variable', 'limit': 100, 'offset': index % variables}),
+        'check_privilege': lambda index: client.check_privilege('variable', variable(index), 'execute',
+                                                                'bench:host:host-0'),
+        'authenticate': lambda index: client.authenticate(),
+        # Sync calls each run an event loop of their own, on the threads of the default executor
+        'get_sync': lambda index: asyncio.to_thread(sync_client.get, variable(index)),
+    })
+    return operations
+
+
+async def measure(operation, operations: int, concurrency: int) -> dict:
+    """
+    Runs operations calls of operation from concurrency workers, and returns their statistics
+    """
+    latencies = []
+    errors = 0
+    next_index = iter(range(operations))
+
+    async def worker():
+        nonlocal errors
+        for index in next_index:
+            started_at = time.perf_counter()
+            try:
+                await operation(index)
+            except Exception:  # pylint: disable=broad-except
+                errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'operations': operations,
+        'errors': errors,
+        'throughput': operations / elapsed,
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p50_ms': percentiles[49] * 1000,
+        'p95_ms': percentiles[94] * 1000,
+        'p99_ms': percentiles[98] * 1000,
+    }
+
+
+async def run(args) -> dict:
+    """
+    Runs the selected scenarios, and returns the results
+    """
+    async with FakeConjurServer(account='bench', variables=args.variables, latency=args.latency_ms / 1000) \
+            as server:
+        client, sync_client = (Client(server.connection_info, authn_strategy=server.authn_strategy(),
+                                      ssl_verification_mode=SslVerificationMode.INSECURE, async_mode=async_mode)
+                               for async_mode in (True, False))
+        results = {}
+        for name, operation in scenarios(client, sync_client, args.variables).items():
+            if args.scenario and name not in args.scenario:
+                continue
+            await measure(operation, max(args.operations // 10, args.concurrency), args.concurrency)  # warm up
+            results[name] = await measure(operation, args.operations, args.concurrency)
+
+    return {
+        'version': RESULTS_FORMAT_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'operations': args.operations, 'concurrency': args.concurrency,
+                   'variables': args.variables, 'latency_ms': args.latency_ms},
+        'scenarios': results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    @return: A description of every regression beyond threshold, for the scenarios found in both runs
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        if current['throughput'] < previous['throughput'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {previous['throughput']:.0f}/s -> {current['throughput']:.0f}/s")
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f}ms -> {current['p95_ms']:.2f}ms")
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    """
+    Parses the arguments, runs the benchmark, prints and saves the results, and exits with 1
+    on a regression against the baseline
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--operations', type=int, default=2000, help='Operations per scenario')
+    parser.add_argument('--concurrency', type=int, default=10, help='Operations in flight at once')
+    parser.add_argument('--variables', type=int, default=1000, help='Variables of the fake server dataset')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latency added by the fake server')
+    parser.add_argument('--scenario', action='append', help='Scenario to run, all by default. Repeatable')
+    parser.add_argument('--output', help='File the results are written to, as JSON')
+    parser.add_argument('--save-baseline', help='File the results are written to, for later comparisons')
+    parser.add_argument('--baseline', help='Results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative throughput loss or p95 growth counted as a regression')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(format_table(results['scenarios']))
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+def format_table(scenario_results: dict) -> str:
+    """
+    Formats the results of the scenarios as a text table
+    """
+    columns = ('throughput', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'errors')
+    lines = [f"{'scenario':<18}" + ''.join(f'{column:>12}' for column in columns)]
+    for name, result in scenario_results.items():
+        lines.append(f'{name:<18}' + ''.join(f'{result[column]:>12.2f}' if isinstance(result[column], float)
+                                             else f'{result[column]:>12}' for column in columns))
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compression benchmark
+
+Measures the bytes on the wire and the latency of policy loads and inspect=True resource
+listings, with and without gzip, over a simulated slow WAN link.
+
+A local aiohttp server plays Conjur, and a throttling TCP proxy in front of it adds a one-way
+latency and limits the bandwidth in both directions. Run from the repository root:
+
+    python -m benchmarks.bench_compression --bandwidth-kbps 2000 --latency-ms 40
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from aiohttp import web
+
+from conjur_api.http.endpoints import ConjurEndpoint
+from conjur_api.models import SslVerificationMetadata, SslVerificationMode
+from conjur_api.wrappers.http_wrapper import HttpVerb, invoke_endpoint
+
+ACCOUNT = 'bench'
+SSL_VERIFICATION = SslVerificationMetadata(SslVerificationMode.INSECURE)
+
+
+class ThrottlingProxy:
+    """
+    TCP proxy that models a link with a fixed one-way latency and a limited bandwidth,
+    and counts the bytes sent in each direction
+    """
+
+    def __init__(self, upstream_port: int, bandwidth_bytes_per_second: float, latency_seconds: float):
+        self.upstream_port = upstream_port
+        self.bandwidth = bandwidth_bytes_per_second
+        self.latency = latency_seconds
+        self.bytes_up = 0
+        self.bytes_down = 0
+        self._server = None
+
+    async def start(self) -> int:
+        """
+        Starts listening on a free local port, and returns it
+        """
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """
+        Stops listening
+        """
+        self._server.close()
+        await self._server.wait_closed()
+
+    def reset_counters(self):
+        """
+        Zeroes the byte counters
+        """
+        self.bytes_up = self.bytes_down = 0
+
+    async def _handle(self, client_reader, client_writer):
+        upstream_writer = None
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection('127.0.0.1', self.upstream_port)
+            await asyncio.gather(self._pipe(client_reader, upstream_writer, upwards=True),
+                                 self._pipe(upstream_reader, client_writer, upwards=False))
+        except (asyncio.CancelledError, ConnectionError):
+            # The connection was dropped, or is still open when stop() closes the server. Nothing
+            # waits for this task, so the error would only be logged as unhandled
+            pass
+        finally:
+            client_writer.close()
+            if upstream_writer is not None:
+                upstream_writer.close()
+
+    async def _pipe(self, reader, writer, upwards: bool):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        async def deliver():
+            while True:
+                deliver_at, chunk = await queue.get()
+                if chunk is None:
+                    break
+                await asyncio.sleep(max(0.0, deliver_at - loop.time()))
+                writer.write(chunk)
+                await writer.drain()
+            writer.close()
+
+        delivery = asyncio.ensure_future(deliver())
+        link_free_at = loop.time()
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                if upwards:
+                    self.bytes_up += len(chunk)
+                else:
+                    self.bytes_down += len(chunk)
+                # The chunk occupies the link for its serialization time, then travels for the latency
+                link_free_at = max(link_free_at, loop.time()) + len(chunk) / self.bandwidth
+                queue.put_nowait((link_free_at + self.latency, chunk))
+        except ConnectionError:
+            pass
+        finally:
+            queue.put_nowait((0, None))
+            await delivery
+
+
+def generate_policy(variables: int) -> str:
+    """
+    A policy declaring a policy branch with the given number of variables
+    """
+    lines = ['- !policy', '  id: benchmark', '  body:']
+    for index in range(variables):
+        lines.append(f'  - !variable\n    id: app-{index // 100}/database/password-{index}\n'
+                     f'    annotations:\n      description: Database password number {index}')
+    return '\n'.join(lines) + '\n'
+
+
+def generate_resources(count: int) -> list:
+    """
+    A resource listing as returned with inspect=True
+    """
+    return [{
+        'id': f'{ACCOUNT}:variable:benchmark/app-{index // 100}/database/password-{index}',
+        'owner': f'{ACCOUNT}:policy:benchmark',
+        'policy': f'{ACCOUNT}:policy:root',
+        'permissions': [{'privilege': 'read', 'role': f'{ACCOUNT}:host:benchmark/app-{index // 100}',
+                         'policy': f'{ACCOUNT}:policy:root'}],
+        'annotations': [{'name': 'description', 'value': f'Database password number {index}',
+                         'policy': f'{ACCOUNT}:policy:root'}],
+        'secrets': [{'version': 1, 'expires_at': None}],
+    } for index in range(count)]
+
+
+def create_app(resources: list) -> web.Application:
+    """
+    Conjur stand-in, serving just the policy and resources endpoints
+    """
+    listing = json.dumps(resources).encode()
+
+    async def load_policy(request):
+        # aiohttp decodes gzip request bodies transparently
+        body = await request.read()
+        return web.json_response({'created_roles': {}, 'version': 1, 'size': len(body)}, status=201)
+
+    async def list_resources(_request):
+        response = web.Response(body=listing, content_type='application/json')
+        # Compressed only if the request accepts it
+        response.enable_compression()
+        return response
+
+    app = web.Application(client_max_size=1024 ** 3)
+    for method in ('POST', 'PUT', 'PATCH'):
+        app.router.add_route(method, '/policies/{account}/policy/{identifier}', load_policy)
+    app.router.add_get('/resources/{account}', list_resources)
+    return app
+
+
+async def measure(proxy: ThrottlingProxy, call, repeat: int) -> dict:
+    """
+    Runs call repeat times, and returns the median latency and the bytes per call
+    """
+    durations = []
+    proxy.reset_counters()
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        await call()
+        durations.append(time.perf_counter() - started_at)
+    return {
+        'median_ms': statistics.median(durations) * 1000,
+        'bytes_up': proxy.bytes_up // repeat,
+        'bytes_down': proxy.bytes_down // repeat,
+    }
+
+
+async def run(args) -> list:
+    """
+    Runs every scenario, and returns one result row per scenario
+    """
+    runner = web.AppRunner(create_app(generate_resources(args.resources)))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    server_port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+
+    proxy = ThrottlingProxy(server_port, args.bandwidth_kbps * 1000 / 8, args.latency_ms / 1000)
+    params = {'url': f'http://127.0.0.1:{await proxy.start()}', 'account': ACCOUNT, 'identifier': 'root'}
+    policy = generate_policy(args.variables)
+
+    def load_policy(compress: bool):
+        return lambda: invoke_endpoint(HttpVerb.POST, ConjurEndpoint.POLICIES, params, policy,
+                                       api_token='token', ssl_verification_metadata=SSL_VERIFICATION,
+                                       compress=compress)
+
+    def list_resources(accept_encoding: str):
+        return lambda: invoke_endpoint(HttpVerb.GET, ConjurEndpoint.RESOURCES, params,
+                                       api_token='token', query={'inspect': 'true'},
+                                       headers={'Accept-Encoding': accept_encoding},
+                                       ssl_verification_metadata=SSL_VERIFICATION)
+
+    scenarios = [
+        ('policy load', 'plain', load_policy(False)),
+        ('policy load', 'gzip', load_policy(True)),
+        ('inspect listing', 'plain', list_resources('identity')),
+        ('inspect listing', 'gzip', list_resources('gzip')),
+    ]
+    results = []
+    try:
+        for name, encoding, call in scenarios:
+            results.append({'scenario': name, 'encoding': encoding, **await measure(proxy, call, args.repeat)})
+    finally:
+        await proxy.stop()
+        await runner.cleanup()
+    return results
+
+
+def main():
+    """
+    Parses the arguments, runs the benchmark and prints the results
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bandwidth-kbps', type=float, default=2000, help='Link bandwidth in kbit/s')
+    parser.add_argument('--latency-ms', type=float, default=40, help='One-way link latency in milliseconds')
+    parser.add_argument('--variables', type=int, default=2000, help='Variables declared by the policy')
+    parser.add_argument('--resources', type=int, default=2000, help='Resources in the inspect listing')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<16}{'encoding':<10}{'bytes up':>12}{'bytes down':>12}{'median ms':>12}")
+    for row in results:
+        print(f"{row['scenario']:<16}{row['encoding']:<10}{row['bytes_up']:>12}{row['bytes_down']:>12}"
+              f"{row['median_ms']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Import time benchmark
+
+Measures the cold start cost of the SDK, as paid by short-lived processes such as CLI jobs and
+serverless functions: importing conjur_api, importing the client, and constructing one. Every
+run is a fresh interpreter, whose startup is not counted. The run fails when the median of a
+scenario is over its budget, or when the scenario loaded a module it should leave unloaded,
+such as the transport stack, which is only needed once a request is sent. Run from the
+repository root:
+
+    python -m benchmarks.bench_import --runs 20
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Modules only needed to send requests
+TRANSPORT_MODULES = ('aiohttp', 'async_timeout', 'urllib3')
+
+CONSTRUCT_CLIENT = '''
+from conjur_api import Client
+from conjur_api.models import ConjurConnectionInfo, CredentialsData
+from conjur_api.providers import AuthnAuthenticationStrategy, SimpleCredentialsProvider
+provider = SimpleCredentialsProvider()
+provider.save(CredentialsData('https://conjur', 'admin', api_key='key'))
+Client(ConjurConnectionInfo('https://conjur', 'account'), authn_strategy=AuthnAuthenticationStrategy(provider))
+'''
+
+# Name -> (code, budget in milliseconds, modules that must stay unloaded)
+SCENARIOS = {
+    'import conjur_api': ('import conjur_api', 20, TRANSPORT_MODULES + ('conjur_api.client', 'conjur_api.models')),
+    'import Client': ('from conjur_api import Client', 250, TRANSPORT_MODULES),
+    'construct Client': (CONSTRUCT_CLIENT, 300, TRANSPORT_MODULES),
+}
+
+PROBE = '''
+import sys, time
+started_at = time.perf_counter()
+exec(compile(sys.argv[1], '<scenario>', 'exec'))
+elapsed = time.perf_counter() - started_at
+print(elapsed * 1000)
+print(','.join(name for name in sys.argv[2:] if name in sys.modules))
+'''
+
+
+def probe(code: str, modules: tuple) -> tuple:
+    """
+    Runs code in a fresh interpreter, and returns its duration in milliseconds along with
+    the given modules it loaded
+    """
+    output = subprocess.run([sys.executable, '-c', PROBE, code, *modules], capture_output=True, check=True,
+                            text=True).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(',') if name]
+
+
+def run(runs: int) -> dict:
+    """
+    Runs every scenario runs times, and returns one result per scenario
+    """
+    results = {}
+    for name, (code, budget_ms, unloaded) in SCENARIOS.items():
+        durations = []
+        loaded = set()
+        for _ in range(runs):
+            duration, modules = probe(code, unloaded)
+            durations.append(duration)
+            loaded.update(modules)
+        results[name] = {'median_ms': statistics.median(durations), 'min_ms': min(durations),
+                         'budget_ms': budget_ms, 'unexpected_modules': sorted(loaded)}
+    return results
+
+
+def main():
+    """
+    Parses the arguments, runs the benchmark, prints the results, and exits with 1 when a
+    scenario is over budget or loaded an unexpected module
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters per scenario')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'scenario':<20}{'median ms':>11}{'min ms':>9}{'budget ms':>11}  unexpected modules")
+        for name, result in results.items():
+            print(f"{name:<20}{result['median_ms']:>11.1f}{result['min_ms']:>9.1f}{result['budget_ms']:>11}  "
+                  f"{', '.join(result['unexpected_modules']) or '-'}")
+
+    failures = [name for name, result in results.items()
+                if result['median_ms'] > result['budget_ms'] or result['unexpected_modules']]
+    if failures:
+        print(f"Over budget or loading unexpected modules: {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+Invoke overhead benchmark
+
+Measures the client-side cost of a single invoke_endpoint call, with the transport replaced by
+a canned response, so that only the work done around the request is timed: building the URL and
+headers, logging, and reporting to the request hooks. Run from the repository root:
+
+    python -m benchmarks.bench_invoke_overhead --calls 20000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from conjur_api.http.endpoints import ConjurEndpoint
+from conjur_api.instrumentation import RequestHooks
+from conjur_api.instrumentation.request_hooks import use_request_hooks
+from conjur_api.models import SslVerificationMetadata, SslVerificationMode
+from conjur_api.wrappers import http_wrapper
+from conjur_api.wrappers.http_response import HttpResponse
+from conjur_api.wrappers.http_wrapper import HttpVerb, invoke_endpoint
+
+PARAMS = {'url': 'https://conjur.example.com', 'account': 'bench', 'kind': 'variable',
+          'identifier': 'app/database/password'}
+SSL_VERIFICATION = SslVerificationMetadata(SslVerificationMode.TRUST_STORE)
+
+
+async def measure(calls: int) -> float:
+    """
+    Runs calls sequential invoke_endpoint calls, and returns the mean duration of one in microseconds
+    """
+    started_at = time.perf_counter()
+    for _ in range(calls):
+        await invoke_endpoint(HttpVerb.GET, ConjurEndpoint.SECRETS, PARAMS, api_token='token',
+                              ssl_verification_metadata=SSL_VERIFICATION)
+    return (time.perf_counter() - started_at) / calls * 1e6
+
+
+async def run(args) -> list:
+    """
+    Runs every scenario, and returns one result row per scenario
+    """
+    # A plain stand-in for the aiohttp response, a mock would dominate the measurement
+    response = HttpResponse(SimpleNamespace(status=200, raise_for_status=lambda: None), 'secret', b'secret')
+
+    async def canned_request(*_args, **_kwargs):
+        return response
+
+    # Logged records are discarded, the formatting cost is what is measured
+    logging.getLogger().addHandler(logging.NullHandler())
+    results = []
+    with mock.patch.object(http_wrapper, 'invoke_request', canned_request):
+        await measure(args.calls // 10)  # warm up
+        for level in (logging.WARNING, logging.DEBUG):
+            logging.getLogger().setLevel(level)
+            for hooks in ((), (RequestHooks(),)):
+                with use_request_hooks(hooks):
+                    results.append({'log_level': logging.getLevelName(level), 'hooks': len(hooks),
+                                    'us_per_call': await measure(args.calls)})
+    logging.getLogger().setLevel(logging.WARNING)
+    return results
+
+
+def main():
+    """
+    Parses the arguments, runs the benchmark and prints the results
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000, help='Calls per scenario')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2) if args.json else format_table(results))
+
+
+def format_table(results: list) -> str:
+    """
+    Formats the result rows as a text table
+    """
+    lines = [f"{'log level':<12}{'hooks':>6}{'us per call':>14}"]
+    lines.extend(f"{row['log_level']:<12}{row['hooks']:>6}{row['us_per_call']:>14.1f}" for row in results)
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,51 @@ conjur_api
 
 Package containing classes that are responsible for communicating with the Conjur server
 """
+import importlib
+
 # There is no need to update the version here manually.
 # It will be updated automatically in the pipeline
 # based on the latest changelog version.
 __version__ = "0.0-dev"
 
-from conjur_api.client import Client
-from conjur_api.interface import CredentialsProviderInterface
-from conjur_api.interface import AuthenticationStrategyInterface
-from conjur_api import models
-from conjur_api import errors
-from conjur_api import providers
+# The client and the subpackages are imported on first access rather than with conjur_api,
+# so that importing it stays cheap for the processes that only use a part of it
+_LAZY_ATTRIBUTES = {
+    'Client': 'conjur_api.client',
+    'CredentialsProviderInterface': 'conjur_api.interface',
+    'AuthenticationStrategyInterface': 'conjur_api.interface',
+}
+# Includes the modules that used to be reachable as attributes once conjur_api was imported
+_LAZY_SUBPACKAGES = ('models', 'errors', 'instrumentation', 'providers', 'client', 'interface', 'cache', 'http',
+                     'utils', 'wrappers')
+
+# Star-imports don't consult __getattr__, so they resolve every name listed here
+__all__ = ['Client', 'CredentialsProviderInterface', 'AuthenticationStrategyInterface', 'models', 'errors',
+           'instrumentation', 'providers', 'client', 'interface', 'cache', 'http', 'utils', 'wrappers']
+
+# Recognized by type checkers like typing.TYPE_CHECKING, without importing typing and re.
+# Deleted below, so that it is not left as an attribute of the package
+TYPE_CHECKING = False
+if TYPE_CHECKING:  # pragma: no cover
+    # For type checkers and IDEs, which don't follow __getattr__
+    from typing import TYPE_CHECKING
+    from conjur_api.client import Client
+    from conjur_api.interface import AuthenticationStrategyInterface, CredentialsProviderInterface
+    from conjur_api import cache, client, errors, http, instrumentation, interface, models, providers, utils, \
+        wrappers
+del TYPE_CHECKING
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _LAZY_SUBPACKAGES:
+        value = importlib.import_module(f'{__name__}.{name}')
+    else:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_SUBPACKAGES))
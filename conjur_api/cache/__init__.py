@@ -0,0 +1,9 @@
+"""
+Cache module
+
+This module holds the client-side caches and indexes of the SDK
+"""
+from conjur_api.cache.resource_index import ResourceIndex
+from conjur_api.cache.ttl_cache import TTLCache
+from conjur_api.cache.role_graph import RoleGraph
+from conjur_api.cache.host_factory_token_pool import HostFactoryTokenPool
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+HostFactoryTokenPool module
+
+This module holds a pool of pre-minted host factory tokens, so that hosts can be
+created without minting a token first
+"""
+import asyncio
+import logging
+import math
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, Iterable
+
+from conjur_api.errors.errors import InvalidFormatException
+from conjur_api.models.hostfactory.create_token_data import CreateTokenData
+
+DEFAULT_TOKEN_POOL_SIZE = 2
+DEFAULT_TOKEN_DURATION = timedelta(hours=1)
+DEFAULT_TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+# pylint: disable=too-many-instance-attributes
+class HostFactoryTokenPool:
+    """
+    HostFactoryTokenPool
+
+    Keeps `size` valid tokens minted per host factory, and hands them out in turn.
+    Tokens are not handed out anymore once they are within `refresh_margin` of their
+    expiration, and replacements are minted in the background as soon as fewer than
+    `size` usable tokens are left. Expirations are tracked on the local monotonic clock,
+    counted from the moment the token was requested, so they are never later than the
+    server's.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 create_tokens: Callable[[CreateTokenData], Awaitable[list]],
+                 revoke_tokens: Callable[[list], Awaitable],
+                 size: int = DEFAULT_TOKEN_POOL_SIZE,
+                 duration: timedelta = DEFAULT_TOKEN_DURATION,
+                 refresh_margin: timedelta = DEFAULT_TOKEN_REFRESH_MARGIN,
+                 cidr: str = "",
+                 background_refresh: bool = True):
+        """
+        @param create_tokens: Mints the tokens described by a CreateTokenData, and returns them as strings
+        @param revoke_tokens: Revokes the given list of tokens
+        @param size: Number of usable tokens to keep per host factory
+        @param duration: Lifetime of the minted tokens
+        @param refresh_margin: Time before expiration at which a token is replaced
+        @param cidr: Comma separated CIDRs the minted tokens are restricted to
+        @param background_refresh: Whether replacements are minted while the remaining tokens
+        keep being handed out. Should be False when every call runs in its own event loop (sync
+        mode), as the minting would not survive the loop
+        """
+        if not isinstance(size, int) or size <= 0:
+            raise InvalidFormatException(f"size must be a positive integer, got: {size}")
+        if refresh_margin >= duration:
+            raise InvalidFormatException("refresh_margin must be shorter than duration")
+
+        self._create_tokens = create_tokens
+        self._revoke_tokens = revoke_tokens
+        self.size = size
+        self.duration = duration
+        self.refresh_margin = refresh_margin
+        self.cidr = cidr
+        self.background_refresh = background_refresh
+        # Host factory -> [(token, monotonic expiration)]
+        self._tokens: dict[str, list[tuple[str, float]]] = {}
+        self._turns: dict[str, int] = {}
+        self._refills: dict[str, asyncio.Task] = {}
+
+    async def fill(self, host_factories: Iterable[str]):
+        """
+        Mints tokens for the given host factories until each has `size` usable ones
+        """
+        await asyncio.gather(*(self._refill(host_factory) for host_factory in host_factories))
+
+    async def get_token(self, host_factory: str) -> str:
+        """
+        @return: A usable token of the host factory, minting tokens first if there are none
+        @raise ValueError: If no usable token could be minted
+        """
+        usable = self._usable(host_factory)
+        if len(usable) < self.size:
+            refill = self._refill(host_factory)
+            if not usable or not self.background_refresh:
+                # Shielded so that a cancelled caller doesn't cancel a refill other callers wait for
+                await asyncio.shield(refill)
+                usable = self._usable(host_factory)
+        if not usable:
+            # No tokens were minted, or minting took so long that they are already within refresh_margin
+            raise ValueError(f"No usable token was minted for host factory '{host_factory}'")
+
+        turn = self._turns.get(host_factory, 0)
+        self._turns[host_factory] = turn + 1
+        return usable[turn % len(usable)][0]
+
+    async def revoke_all(self):
+        """
+        Revokes every token of the pool and empties it. Meant for teardown
+        @return: The outcome of revoke_tokens
+        """
+        # Refills in progress are waited for rather than cancelled, as the server may already have
+        # minted their tokens, which would then never be revoked
+        loop = asyncio.get_running_loop()
+        refills = [refill for refill in self._refills.values() if refill.get_loop() is loop]
+        self._refills.clear()
+        await asyncio.gather(*refills, return_exceptions=True)
+        tokens = [token for tokens in self._tokens.values() for token, _ in tokens]
+        self._tokens.clear()
+        return await self._revoke_tokens(tokens)
+
+    def __len__(self):
+        return sum(len(tokens) for tokens in self._tokens.values())
+
+    def _usable(self, host_factory: str) -> list[tuple[str, float]]:
+        deadline = time.monotonic() + self.refresh_margin.total_seconds()
+        usable = [token for token in self._tokens.get(host_factory, ()) if token[1] > deadline]
+        self._tokens[host_factory] = usable
+        return usable
+
+    def _refill(self, host_factory: str) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        refill = self._refills.get(host_factory)
+        if refill is None or refill.done() or refill.get_loop() is not loop:
+            refill = self._refills[host_factory] = asyncio.ensure_future(self._mint(host_factory))
+            refill.add_done_callback(self._log_refill_failure)
+        return refill
+
+    async def _mint(self, host_factory: str):
+        count = self.size - len(self._usable(host_factory))
+        if count <= 0:
+            return
+
+        started_at = time.monotonic()
+        tokens = await self._create_tokens(CreateTokenData(host_factory=host_factory,
+                                                           cidr=self.cidr,
+                                                           minutes=math.ceil(self.duration.total_seconds() / 60),
+                                                           count=count))
+        expires_at = started_at + self.duration.total_seconds()
+        self._tokens[host_factory] = self._usable(host_factory) + [(token, expires_at) for token in tokens]
+        logging.debug("Minted %d host factory tokens. Duration: %dms",
+                      len(tokens), (time.monotonic() - started_at) * 1000)
+
+    @staticmethod
+    def _log_refill_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning("Failed to mint host factory tokens: %s", task.exception())
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+ResourceIndex module
+
+This module holds an in-memory index of the account resources, used to answer
+lookups without network calls
+"""
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from conjur_api.models.general.resource import Resource
+
+DEFAULT_RESOURCE_INDEX_TTL_SECONDS = 300
+
+
+# pylint: disable=too-many-instance-attributes
+class ResourceIndex:
+    """
+    ResourceIndex
+
+    Holds the resources visible to the authenticated role keyed by identifier, kind and full ID.
+    The index is built from one paginated enumeration. Once the TTL expires, lookups keep
+    being answered from the current snapshot while a new enumeration runs in the background,
+    and the new snapshot is swapped in only once it is complete.
+    """
+
+    def __init__(self,
+                 load_resources: Callable[[], AsyncIterator[str]],
+                 ttl_seconds: float = DEFAULT_RESOURCE_INDEX_TTL_SECONDS,
+                 background_refresh: bool = True):
+        """
+        @param load_resources: Returns an async iterator over the full IDs of all the resources
+        @param ttl_seconds: Age after which the index is refreshed
+        @param background_refresh: Whether an expired index keeps serving lookups while it refreshes.
+        Should be False when every call runs in its own event loop (sync mode), as the refresh
+        would not survive the loop
+        """
+        self._load_resources = load_resources
+        self.ttl_seconds = ttl_seconds
+        self.background_refresh = background_refresh
+        self._by_full_id: dict[str, Resource] = {}
+        self._by_identifier: dict[str, list[Resource]] = {}
+        self._by_kind: dict[str, list[Resource]] = {}
+        self._loaded_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Incremented by invalidate, so that refreshes started before are discarded
+        self._generation = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        @return: True, if the index holds a snapshot that was not invalidated
+        """
+        return self._loaded_at is not None
+
+    @property
+    def is_fresh(self) -> bool:
+        """
+        @return: True, if the index is loaded and younger than the TTL
+        """
+        return self.is_loaded and time.monotonic() - self._loaded_at < self.ttl_seconds
+
+    def invalidate(self):
+        """
+        Marks the index as stale, so the next lookup waits for a new enumeration.
+        Used after changes that affect the resources, like loading a policy.
+        A refresh in progress may have enumerated the resources before the change, so its
+        result is discarded and the next lookup starts a new enumeration
+        """
+        self._generation += 1
+        self._loaded_at = None
+        self._refresh_task = None
+
+    async def ensure_fresh(self):
+        """
+        Makes sure the index can answer lookups, loading or refreshing it if needed
+        """
+        while not self.is_fresh:
+            loop = asyncio.get_running_loop()
+            task = self._refresh_task
+            if task is None or task.done() or task.get_loop() is not loop:
+                task = self._refresh_task = asyncio.ensure_future(self.refresh())
+                task.add_done_callback(self._log_refresh_failure)
+
+            if self.is_loaded and self.background_refresh:
+                return
+            generation = self._generation
+            # Shielded so that a cancelled lookup doesn't cancel a refresh other lookups wait for
+            await asyncio.shield(task)
+            if generation == self._generation:
+                return
+            # Invalidated while waiting, the refresh was discarded
+
+    async def refresh(self):
+        """
+        Rebuilds the index from a full enumeration of the resources
+        """
+        started_at = time.monotonic()
+        generation = self._generation
+        by_full_id = {}
+        async for full_id in self._load_resources():
+            resource = Resource.from_full_id(full_id)
+            key = resource.full_id()
+            # Reuse the instances of resources that were already indexed
+            by_full_id[key] = self._by_full_id.get(key, resource)
+
+        by_identifier = {}
+        by_kind = {}
+        for resource in by_full_id.values():
+            by_identifier.setdefault(resource.identifier, []).append(resource)
+            by_kind.setdefault(resource.kind, []).append(resource)
+
+        if generation != self._generation:
+            logging.debug("Resource index refresh discarded, the index was invalidated while it ran")
+            return
+
+        self._by_full_id, self._by_identifier, self._by_kind = by_full_id, by_identifier, by_kind
+        self._loaded_at = time.monotonic()
+        logging.debug("Resource index refreshed. Resources: %d, Duration: %dms",
+                      len(by_full_id), (self._loaded_at - started_at) * 1000)
+
+    @staticmethod
+    def _log_refresh_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning("Failed to refresh the resource index: %s", task.exception())
+
+    def find_resources_by_identifier(self, identifier: str) -> list[Resource]:
+        """
+        @return: All the indexed resources with the given identifier, of any kind
+        """
+        return list(self._by_identifier.get(identifier, ()))
+
+    def resources_of_kind(self, kind: str) -> list[Resource]:
+        """
+        @return: All the indexed resources of the given kind
+        """
+        return list(self._by_kind.get(kind, ()))
+
+    def get(self, full_id: str) -> Optional[Resource]:
+        """
+        @param full_id: Resource ID in the 'kind:identifier' or 'account:kind:identifier' format
+        @return: The indexed resource, or None if it isn't indexed
+        """
+        return self._by_full_id.get(Resource.from_full_id(full_id).full_id())
+
+    def contains(self, kind: str, identifier: str) -> bool:
+        """
+        @return: True, if a resource of the given kind and identifier is indexed
+        """
+        return f"{kind}:{identifier}" in self._by_full_id
+
+    def __len__(self):
+        return len(self._by_full_id)
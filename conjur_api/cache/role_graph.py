@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+RoleGraph module
+
+This module holds an in-memory graph of the role memberships, used to answer
+transitive membership queries without network calls
+"""
+import logging
+import sys
+import time
+from array import array
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+
+# pylint: disable=too-many-instance-attributes
+class RoleGraph:
+    """
+    RoleGraph
+
+    Holds the direct memberships of the roles visible to the authenticated role.
+    Every role ID is interned and mapped to an integer, and the edges are stored as compact
+    arrays of those integers in both directions. Transitive queries walk the arrays, and
+    their results are memoized until the graph changes.
+    Like Conjur, a role is considered a member of itself.
+    """
+
+    def __init__(self,
+                 account: str,
+                 load_role_ids: Callable[[], AsyncIterator[str]],
+                 load_direct_memberships: Callable[[list], Awaitable[list]]):
+        """
+        @param account: Account of the roles, used to complete 'kind:identifier' IDs
+        @param load_role_ids: Returns an async iterator over the full IDs of all the roles
+        @param load_direct_memberships: Given a list of role IDs, returns for each of them the list
+        of the full IDs of the roles it is directly a member of
+        """
+        self.account = account
+        self._load_role_ids = load_role_ids
+        self._load_direct_memberships = load_direct_memberships
+        self._index: dict[str, int] = {}
+        self._role_ids: list[str] = []
+        self._memberships: list[array] = []
+        self._members: list[array] = []
+        self._closures: dict[tuple[bool, int], frozenset] = {}
+        self.refreshed_at = None
+
+    async def refresh(self):
+        """
+        Rebuilds the whole graph from the direct memberships of every role
+        """
+        started_at = time.monotonic()
+        role_ids = [role_id async for role_id in self._load_role_ids()]
+        memberships = await self._load_direct_memberships(role_ids)
+
+        self._index, self._role_ids, self._memberships, self._members = {}, [], [], []
+        for role_id, parents in zip(role_ids, memberships):
+            self._set_memberships(self._node(role_id), parents)
+        self._changed()
+        logging.debug("Role graph refreshed. Roles: %d, Duration: %dms",
+                      len(self._role_ids), (time.monotonic() - started_at) * 1000)
+
+    async def refresh_roles(self, role_ids: Iterable[str]):
+        """
+        Re-fetches the direct memberships of the given roles only, and patches them into the graph
+        """
+        role_ids = [self._full_id(role_id) for role_id in role_ids]
+        memberships = await self._load_direct_memberships(role_ids)
+        for role_id, parents in zip(role_ids, memberships):
+            self._set_memberships(self._node(role_id), parents)
+        self._changed()
+
+    def memberships(self, role_id: str) -> set[str]:
+        """
+        @return: IDs of all the roles role_id is a member of, directly or not, including itself
+        """
+        return {self._role_ids[node] for node in self._closure(role_id, upwards=True)}
+
+    def members(self, role_id: str) -> set[str]:
+        """
+        @return: IDs of all the roles that are members of role_id, directly or not, including itself
+        """
+        return {self._role_ids[node] for node in self._closure(role_id, upwards=False)}
+
+    def is_member(self, member_id: str, role_id: str) -> bool:
+        """
+        @return: True, if member_id is a member of role_id, directly or not
+        """
+        node = self._index.get(self._full_id(role_id))
+        return node is not None and node in self._closure(member_id, upwards=True)
+
+    def direct_memberships(self, role_id: str) -> set[str]:
+        """
+        @return: IDs of the roles role_id is directly a member of
+        """
+        node = self._index.get(self._full_id(role_id))
+        return set() if node is None else {self._role_ids[parent] for parent in self._memberships[node]}
+
+    def __contains__(self, role_id: str) -> bool:
+        return self._full_id(role_id) in self._index
+
+    def __len__(self):
+        return len(self._role_ids)
+
+    def _full_id(self, role_id: str) -> str:
+        # IDs without the account part have a single separator
+        return role_id if role_id.count(':') > 1 else f"{self.account}:{role_id}"
+
+    def _node(self, role_id: str) -> int:
+        node = self._index.get(role_id)
+        if node is None:
+            node = len(self._role_ids)
+            role_id = sys.intern(role_id)
+            self._index[role_id] = node
+            self._role_ids.append(role_id)
+            self._memberships.append(array('I'))
+            self._members.append(array('I'))
+        return node
+
+    def _set_memberships(self, node: int, parent_ids: Iterable[str]):
+        for parent in self._memberships[node]:
+            self._members[parent].remove(node)
+        parents = array('I', dict.fromkeys(self._node(parent_id) for parent_id in parent_ids))
+        self._memberships[node] = parents
+        for parent in parents:
+            self._members[parent].append(node)
+
+    def _changed(self):
+        self._closures.clear()
+        self.refreshed_at = time.monotonic()
+
+    def _closure(self, role_id: str, upwards: bool) -> frozenset:
+        start = self._index.get(self._full_id(role_id))
+        if start is None:
+            return frozenset()
+
+        key = (upwards, start)
+        closure = self._closures.get(key)
+        if closure is None:
+            edges = self._memberships if upwards else self._members
+            seen = {start}
+            queue = deque((start,))
+            while queue:
+                for neighbour in edges[queue.popleft()]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        queue.append(neighbour)
+            closure = self._closures[key] = frozenset(seen)
+        return closure
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+TTLCache module
+
+This module holds a small in-memory cache whose entries expire after a fixed time
+"""
+import time
+from typing import Any, Hashable, Optional
+
+from conjur_api.errors.errors import InvalidFormatException
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    TTLCache
+
+    Maps keys to values for ttl_seconds. When max_size is reached the oldest entry is evicted.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: Optional[int] = None):
+        if max_size is not None and (not isinstance(max_size, int) or max_size <= 0):
+            raise InvalidFormatException(f"max_size must be a positive integer or None, got: {max_size}")
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        @return: The cached value of key, or default if it is missing or expired
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return default
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Caches value under key for ttl_seconds
+        """
+        self._entries.pop(key, None)
+        if self.max_size is not None and len(self._entries) >= self.max_size:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, key: Hashable):
+        """
+        Removes key from the cache, if present
+        """
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all the entries from the cache
+        """
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
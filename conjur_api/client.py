@@ -10,22 +10,39 @@ the Conjur server
 # Builtins
 import json
 import logging
-from typing import Optional
-
+from datetime import timedelta
+from functools import partial
+from typing import Iterable, List, Mapping, Optional, Union
+
+from conjur_api.cache.host_factory_token_pool import DEFAULT_TOKEN_DURATION, DEFAULT_TOKEN_POOL_SIZE, \
+    DEFAULT_TOKEN_REFRESH_MARGIN, HostFactoryTokenPool
+from conjur_api.cache.resource_index import DEFAULT_RESOURCE_INDEX_TTL_SECONDS, ResourceIndex
+from conjur_api.cache.role_graph import RoleGraph
+from conjur_api.cache.ttl_cache import TTLCache
 from conjur_api.errors.errors import ResourceNotFoundException, MissingRequiredParameterException, HttpStatusError
-from conjur_api.http.api import Api
+from conjur_api.http.api import DEFAULT_HOSTS_PER_TOKEN, Api, PolicySource
+from conjur_api.instrumentation.metrics import DEFAULT_LATENCY_BUCKETS, MetricsHooks
+from conjur_api.instrumentation.request_hooks import RequestHooks, active_request_hooks, notify
+from conjur_api.instrumentation.slow_requests import DEFAULT_SLOW_REQUEST_THRESHOLD_SECONDS, \
+    DEFAULT_SLOW_REQUEST_WINDOW_SECONDS, SlowRequestHooks
 from conjur_api.interface.authentication_strategy_interface import AuthenticationStrategyInterface
 # Internals
 from conjur_api.models import SslVerificationMode, CreateHostData, CreateTokenData, ListMembersOfData, \
-    ListPermittedRolesData, ConjurConnectionInfo, Resource, CredentialsData
-from conjur_api.utils.decorators import allow_sync_invocation
+    ListPermittedRolesData, ConjurConnectionInfo, Resource, CredentialsData, BatchResult
+from conjur_api.models.list.list_data import ListData
+from conjur_api.utils.concurrency import DEFAULT_CONCURRENCY, gather_bounded
+from conjur_api.utils.decorators import allow_sync_invocation, bind_request_hooks
+from conjur_api.utils.pagination import DEFAULT_PAGE_SIZE
+from conjur_api.wrappers.http_wrapper import RequestBody, pooled_session
 
 LOGGING_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
 LOGGING_FORMAT_WARNING = 'WARNING: %(message)s'
+DEFAULT_PRIVILEGE_CACHE_TTL_SECONDS = 60
 
 
 @allow_sync_invocation()
-# pylint: disable=too-many-public-methods
+@bind_request_hooks()
+# pylint: disable=too-many-public-methods,too-many-instance-attributes
 class Client:
     """
     Client
@@ -49,14 +66,17 @@ class Client:
         @param conjurrc_data: Connection metadata for conjur server
         @param ssl_verification_mode: Certificate validation stratagy
         @param authn_strategy:
-        @param debug:
+        @param debug: Configures the logging of the process for debug output, with logging.basicConfig.
+        Otherwise the logging configuration is left to the application
         @param http_debug:
         @param async_mode: This will make all of the class async functions run in sync mode (without need of await)
         Note that this functionality wraps the async function with 'asyncio.run'. setting this value to False
         is not allowed inside running event loop. For example, async_mode cannot be False if running inside
         'asyncio.run()'
         """
-        self.configure_logger(debug)
+        if debug:
+            # Only on request, as it configures the logging of the whole process
+            self.configure_logger(debug)
         self.async_mode = async_mode
         if ssl_verification_mode == SslVerificationMode.INSECURE:
             # TODO remove this is a cli user facing
@@ -69,6 +89,11 @@ class Client:
         self.connection_info = connection_info
         self.debug = debug
         self._api = self._create_api(http_debug, authn_strategy)
+        self._resource_index: Optional[ResourceIndex] = None
+        self._privilege_cache: Optional[TTLCache] = None
+        self._request_hooks: tuple[RequestHooks, ...] = ()
+        self._metrics: Optional[MetricsHooks] = None
+        self._slow_requests: Optional[SlowRequestHooks] = None
 
         logging.debug("Client initialized")
 
@@ -83,6 +108,147 @@ class Client:
         else:
             logging.basicConfig(level=logging.WARN, format=LOGGING_FORMAT_WARNING)
 
+    @property
+    def resource_index(self) -> Optional[ResourceIndex]:
+        """
+        The local resource index, if enabled
+        """
+        return self._resource_index
+
+    def enable_resource_index(self, ttl_seconds: float = DEFAULT_RESOURCE_INDEX_TTL_SECONDS) -> ResourceIndex:
+        """
+        Enables a local index of the account resources, built from one paginated enumeration.
+        Once enabled, find_resource(s)_by_identifier and resource_exists are answered from the
+        index without network calls. The index is refreshed when older than ttl_seconds, and
+        after a policy is loaded through this client.
+        @note: The index only knows the resources visible to the authenticated role, so
+        resource_exists returns False for resources the role is not allowed to see
+        """
+        self._resource_index = ResourceIndex(self._api.iter_resources,
+                                             ttl_seconds=ttl_seconds,
+                                             background_refresh=self.async_mode)
+        return self._resource_index
+
+    def disable_resource_index(self):
+        """
+        Disables the local resource index, lookups go back to the server
+        """
+        self._resource_index = None
+
+    def enable_privilege_cache(self, ttl_seconds: float = DEFAULT_PRIVILEGE_CACHE_TTL_SECONDS,
+                               max_size: int = None):
+        """
+        Enables caching of check_privilege and check_privileges decisions for ttl_seconds.
+        At most max_size decisions are kept when given, which must then be positive.
+        The cache is cleared whenever a policy is loaded through this client
+        """
+        self._privilege_cache = TTLCache(ttl_seconds, max_size)
+
+    def disable_privilege_cache(self):
+        """
+        Disables the privilege decisions cache
+        """
+        self._privilege_cache = None
+
+    def add_request_hooks(self, hooks: RequestHooks):
+        """
+        Reports every HTTP request sent by this client to the given hooks, see RequestHooks
+        """
+        self._request_hooks += (hooks,)
+
+    def remove_request_hooks(self, hooks: RequestHooks):
+        """
+        Stops reporting requests to the given hooks
+        """
+        self._request_hooks = tuple(registered for registered in self._request_hooks if registered is not hooks)
+
+    def enable_tracing(self, tracer_provider=None, record_ids: bool = False) -> RequestHooks:
+        """
+        Reports the calls of this client and the HTTP requests they send as OpenTelemetry spans,
+        see TracingHooks. Requires the 'tracing' extra
+        @param tracer_provider: OpenTelemetry tracer provider, the global one by default
+        @param record_ids: Whether resource IDs and other path parameters are recorded on the spans
+        @return: The registered hooks, which remove_request_hooks stops the tracing with
+        """
+        # Imported here, as OpenTelemetry is an optional dependency
+        from conjur_api.instrumentation.tracing import TracingHooks  # pylint: disable=import-outside-toplevel
+        hooks = TracingHooks(tracer_provider, record_ids)
+        self.add_request_hooks(hooks)
+        return hooks
+
+    def enable_metrics(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS) -> MetricsHooks:
+        """
+        Starts aggregating the requests of this client into the counters, gauges and latency
+        histograms returned by metrics(). Cheap enough to stay enabled in production
+        @param buckets: Upper bounds of the latency histogram buckets, in seconds. Ignored when
+        the metrics are already enabled
+        @return: The registered MetricsHooks
+        """
+        if self._metrics is None:
+            self._metrics = MetricsHooks(buckets)
+            self.add_request_hooks(self._metrics)
+        return self._metrics
+
+    def disable_metrics(self):
+        """
+        Stops aggregating the requests of this client, and drops the current values
+        """
+        if self._metrics is not None:
+            self.remove_request_hooks(self._metrics)
+            self._metrics = None
+
+    def metrics(self) -> Optional[dict]:
+        """
+        @return: A snapshot of the metrics of this client, see MetricsHooks.snapshot, or None if they
+        are not enabled. render_prometheus renders it in the Prometheus text exposition format
+        """
+        return None if self._metrics is None else self._metrics.snapshot()
+
+    def enable_slow_request_log(self,
+                                threshold_seconds: float = DEFAULT_SLOW_REQUEST_THRESHOLD_SECONDS,
+                                window_seconds: float = DEFAULT_SLOW_REQUEST_WINDOW_SECONDS) -> SlowRequestHooks:
+        """
+        Logs a warning with the endpoint, retries and phase breakdown of every request of this client
+        that takes threshold_seconds or more, and keeps the slow requests of the last window_seconds
+        for slow_endpoints(). Tokens and secrets are never logged. Enabling it again changes the
+        threshold and window
+        @return: The registered SlowRequestHooks
+        """
+        if self._slow_requests is None:
+            self._slow_requests = SlowRequestHooks(threshold_seconds, window_seconds)
+            self.add_request_hooks(self._slow_requests)
+        self._slow_requests.threshold_seconds = threshold_seconds
+        self._slow_requests.window_seconds = window_seconds
+        return self._slow_requests
+
+    def disable_slow_request_log(self):
+        """
+        Stops logging slow requests, and drops the slow endpoints summary
+        """
+        if self._slow_requests is not None:
+            self.remove_request_hooks(self._slow_requests)
+            self._slow_requests = None
+
+    def slow_endpoints(self, limit: int = 10) -> List[dict]:
+        """
+        @return: The endpoints with the most time spent in slow requests within the window, see
+        SlowRequestHooks.slowest_endpoints. Empty if the slow request log is not enabled
+        """
+        return [] if self._slow_requests is None else self._slow_requests.slowest_endpoints(limit)
+
+    def enable_policy_compression(self):
+        """
+        Sends the body of policy loads gzip-encoded. Only enable it when the Conjur server,
+        or a proxy in front of it, accepts gzip-encoded requests
+        """
+        self._api.compress_policies = True
+
+    def disable_policy_compression(self):
+        """
+        Sends the body of policy loads uncompressed
+        """
+        self._api.compress_policies = False
+
     ### API passthrough
     async def login(self) -> str:
         """
@@ -112,11 +278,62 @@ class Client:
         """
         return await self._api.resources_list(list_constraints)
 
+    # pylint: disable=too-many-arguments
+    async def iter_resources(self, kind: str = None, search: str = None, page_size: int = DEFAULT_PAGE_SIZE,
+                             role: str = None, inspect: bool = False):
+        """
+        Iterates over all available resources page by page, prefetching the next page
+        while the current one is consumed
+        @note: This is an async generator, use it with 'async for'. It is not available in sync mode
+        """
+        list_constraints = ListData(kind=kind, search=search, role=role, inspect=inspect).list_dictify()
+        async for resource in self._api.iter_resources(list_constraints, page_size):
+            yield resource
+
+    async def count_resources(self, kind: str = None, search: str = None, role: str = None) -> int:
+        """
+        Counts the available resources matching the given constraints
+        """
+        list_constraints = ListData(kind=kind, search=search, role=role).list_dictify()
+        return await self._api.count_resources(list_constraints)
+
+    # pylint: disable=too-many-arguments
+    async def iter_resources_concurrently(self, kind: str = None, search: str = None,
+                                          page_size: int = DEFAULT_PAGE_SIZE,
+                                          concurrency: int = DEFAULT_CONCURRENCY,
+                                          ordered: bool = True, role: str = None, inspect: bool = False):
+        """
+        Enumerates all available resources by counting them and then fetching every page
+        concurrently, with at most 'concurrency' requests in flight.
+        Resources are yielded in list order, or page by page as they arrive when ordered is False
+        @note: This is an async generator, use it with 'async for'. It is not available in sync mode.
+        When stopping early, wrap it in 'contextlib.aclosing' to close its connections right away
+        """
+        list_constraints = ListData(kind=kind, search=search, role=role, inspect=inspect).list_dictify()
+        async for resource in self._api.iter_resources_concurrently(list_constraints, page_size,
+                                                                    concurrency, ordered):
+            yield resource
+
     async def check_privilege(self, kind: str, resource_id: str, privilege: str, role_id: str = None) -> bool:
         """
         Checks a privilege on a resource based on its kind, ID, role, and privilege.
         """
-        return await self._api.check_privilege(kind, resource_id, privilege, role_id)
+        return await self._check_privilege(kind, resource_id, privilege, role_id)
+
+    async def check_privileges(self, privilege_checks: list, concurrency: int = DEFAULT_CONCURRENCY) -> list:
+        """
+        Checks many privileges concurrently, with at most 'concurrency' requests in flight.
+        privilege_checks is a list of (kind, resource_id, privilege) or (kind, resource_id, privilege, role_id)
+        tuples. Returns the decisions as a list of booleans in the same order
+        """
+        # Identical checks are sent to the server only once
+        unique_checks = list(dict.fromkeys(tuple(check) for check in privilege_checks))
+        # The checks share the connections of one session rather than each opening its own
+        async with pooled_session(concurrency):
+            decisions = await gather_bounded(
+                (partial(self._check_privilege, *check) for check in unique_checks), concurrency)
+        decision_by_check = dict(zip(unique_checks, decisions))
+        return [decision_by_check[tuple(check)] for check in privilege_checks]
 
     async def get_resource(self, kind: str, resource_id: str) -> json:
         """
@@ -128,8 +345,23 @@ class Client:
         """
         Check for the existance of a resource based on its kind and ID
         """
+        if self._resource_index is not None:
+            notify(active_request_hooks(), 'on_cache_lookup', 'resource_index', self._resource_index.is_fresh)
+            await self._resource_index.ensure_fresh()
+            return self._resource_index.contains(kind, resource_id)
         return await self._api.resource_exists(kind, resource_id)
 
+    async def resources_exist(self, resource_ids: list, concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+        """
+        Checks the existance of many resources, given their IDs in the 'kind:identifier' format.
+        Returns a dictionary that maps each ID to a boolean
+        """
+        if self._resource_index is not None:
+            notify(active_request_hooks(), 'on_cache_lookup', 'resource_index', self._resource_index.is_fresh)
+            await self._resource_index.ensure_fresh()
+            return {resource_id: self._resource_index.get(resource_id) is not None for resource_id in resource_ids}
+        return await self._api.resources_exist(resource_ids, concurrency)
+
     async def get_role(self, kind: str, role_id: str) -> json:
         """
         Gets a role based on its kind and ID
@@ -142,12 +374,31 @@ class Client:
         """
         return await self._api.role_exists(kind, role_id)
 
+    async def roles_exist(self, role_ids: list, concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+        """
+        Checks the existance of many roles, given their IDs in the 'kind:identifier' format.
+        Returns a dictionary that maps each ID to a boolean
+        """
+        return await self._api.roles_exist(role_ids, concurrency)
+
     async def role_memberships(self, kind: str, role_id: str, direct: bool = False) -> json:
         """
         Lists the memberships of a role
         """
         return await self._api.role_memberships(kind, role_id, direct)
 
+    async def build_role_graph(self, concurrency: int = DEFAULT_CONCURRENCY) -> RoleGraph:
+        """
+        Builds an in-memory graph of the memberships of all the roles visible to the current role.
+        Transitive membership queries are then answered locally by the returned RoleGraph,
+        which can be refreshed as a whole with 'refresh()' or for some roles with 'refresh_roles()'
+        """
+        graph = RoleGraph(self.connection_info.conjur_account,
+                          partial(self._api.iter_role_ids, concurrency),
+                          partial(self._api.direct_role_memberships, concurrency=concurrency))
+        await graph.refresh()
+        return graph
+
     async def list_permitted_roles(self, list_permitted_roles_data: ListPermittedRolesData) -> dict:
         """
         Lists the roles which have the named permission on a resource.
@@ -160,6 +411,21 @@ class Client:
         """
         return await self._api.list_members_of_role(data)
 
+    async def iter_members_of_role(self, data: ListMembersOfData, page_size: int = DEFAULT_PAGE_SIZE):
+        """
+        Iterates over the members of a role page by page, prefetching the next page
+        while the current one is consumed
+        @note: This is an async generator, use it with 'async for'. It is not available in sync mode
+        """
+        async for member in self._api.iter_members_of_role(data, page_size):
+            yield member
+
+    async def count_members_of_role(self, data: ListMembersOfData) -> int:
+        """
+        Counts the members of a role, without listing them
+        """
+        return await self._api.count_members_of_role(data)
+
     async def get(self, variable_id: str, version: str = None) -> Optional[bytes]:
         """
         Gets a variable value based on its ID
@@ -187,6 +453,19 @@ class Client:
         response = await self._api.create_host(create_host_data)
         return response.json
 
+    async def create_hosts(self, create_token_data: CreateTokenData,
+                           hosts: Iterable[Union[str, CreateHostData]],
+                           concurrency: int = DEFAULT_CONCURRENCY,
+                           hosts_per_token: int = DEFAULT_HOSTS_PER_TOKEN) -> BatchResult:
+        """
+        Creates many hosts using the hostfactory, given as host IDs or CreateHostData.
+        Mints one token per hosts_per_token hosts as described by create_token_data, spreads
+        the hosts across them, and revokes them once done.
+        Returns a BatchResult that maps every created host ID to its API key, a failure
+        doesn't stop the others
+        """
+        return await self._api.create_hosts(create_token_data, hosts, concurrency, hosts_per_token)
+
     async def revoke_token(self, token: str) -> int:
         """
         Revokes the given token
@@ -194,29 +473,114 @@ class Client:
         res = await self._api.revoke_token(token)
         return res.status
 
-    async def set(self, variable_id: str, value: str) -> str:
+    async def revoke_tokens(self, tokens: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY) -> BatchResult:
         """
-        Sets a variable to a specific value based on its ID
+        Revokes many host factory tokens concurrently.
+        Returns a BatchResult that maps every revoked token to the response status
+        """
+        return await self._api.revoke_tokens(tokens, concurrency)
+
+    # pylint: disable=too-many-arguments
+    def create_host_factory_token_pool(self,
+                                       size: int = DEFAULT_TOKEN_POOL_SIZE,
+                                       duration: timedelta = DEFAULT_TOKEN_DURATION,
+                                       refresh_margin: timedelta = DEFAULT_TOKEN_REFRESH_MARGIN,
+                                       cidr: str = "",
+                                       concurrency: int = DEFAULT_CONCURRENCY) -> HostFactoryTokenPool:
+        """
+        Creates a pool that keeps `size` host factory tokens minted per host factory, and
+        replaces them before they expire. Use 'fill()' to pre-mint tokens, 'get_token()' to
+        get a usable token, and 'revoke_all()' to revoke the tokens of the pool on teardown
+        """
+        async def create_tokens(create_token_data: CreateTokenData) -> list:
+            response = await self._api.create_token(create_token_data)
+            return [token['token'] for token in response.json]
+
+        return HostFactoryTokenPool(create_tokens,
+                                    partial(self._api.revoke_tokens, concurrency=concurrency),
+                                    size=size,
+                                    duration=duration,
+                                    refresh_margin=refresh_margin,
+                                    cidr=cidr,
+                                    background_refresh=self.async_mode)
+
+    async def set(self, variable_id: str, value: RequestBody) -> str:
+        """
+        Sets a variable to a specific value based on its ID. The value can be text, bytes,
+        a file-like object or an async iterable of bytes; the last two are streamed in chunks
         """
         await self._api.set_variable(variable_id, value)
 
-    async def load_policy_file(self, policy_name: str, policy_file: str) -> dict:
+    async def set_many(self, values: dict, concurrency: int = DEFAULT_CONCURRENCY) -> BatchResult:
+        """
+        Sets many variables at once, given a dictionary that maps variable IDs to values.
+        Returns a BatchResult with the outcome of every write, a failure doesn't stop the others
+        """
+        return await self._api.set_variables(values, concurrency)
+
+    async def load_policy_file(self, policy_name: str, policy_file: PolicySource) -> dict:
         """
         Applies a file-based policy to the Conjur instance
         """
-        return await self._api.load_policy_file(policy_name, policy_file)
+        response = await self._api.load_policy_file(policy_name, policy_file)
+        self._invalidate_policy_dependent_caches()
+        return response
 
-    async def replace_policy_file(self, policy_name: str, policy_file: str) -> dict:
+    async def replace_policy_file(self, policy_name: str, policy_file: PolicySource) -> dict:
         """
         Replaces a file-based policy defined in the Conjur instance
         """
-        return await self._api.replace_policy_file(policy_name, policy_file)
+        response = await self._api.replace_policy_file(policy_name, policy_file)
+        self._invalidate_policy_dependent_caches()
+        return response
 
-    async def update_policy_file(self, policy_name: str, policy_file: str) -> dict:
+    async def update_policy_file(self, policy_name: str, policy_file: PolicySource) -> dict:
         """
         Replaces a file-based policy defined in the Conjur instance
         """
-        return await self._api.update_policy_file(policy_name, policy_file)
+        response = await self._api.update_policy_file(policy_name, policy_file)
+        self._invalidate_policy_dependent_caches()
+        return response
+
+    async def load_policy(self, policy_name: str, policy: Union[str, bytes]) -> dict:
+        """
+        Applies an in-memory policy, given as a string or bytes, to the Conjur instance
+        """
+        response = await self._api.load_policy(policy_name, policy)
+        self._invalidate_policy_dependent_caches()
+        return response
+
+    async def replace_policy(self, policy_name: str, policy: Union[str, bytes]) -> dict:
+        """
+        Replaces a policy defined in the Conjur instance with an in-memory one
+        """
+        response = await self._api.replace_policy(policy_name, policy)
+        self._invalidate_policy_dependent_caches()
+        return response
+
+    async def update_policy(self, policy_name: str, policy: Union[str, bytes]) -> dict:
+        """
+        Updates a policy defined in the Conjur instance with an in-memory one
+        """
+        response = await self._api.update_policy(policy_name, policy)
+        self._invalidate_policy_dependent_caches()
+        return response
+
+    async def apply_policies(self, policies: Iterable[tuple],
+                             depends_on: Mapping[str, Iterable[str]] = None,
+                             concurrency: int = DEFAULT_CONCURRENCY) -> BatchResult:
+        """
+        Applies many policies concurrently, given as (branch, source, mode) tuples. source is a
+        policy file path, a file-like object or async iterable, or bytes with the policy content,
+        and mode a PolicyMode or one of 'load', 'replace' and 'update'.
+        depends_on maps a branch to the branches that must be applied successfully before it.
+        Returns a BatchResult with the outcome and duration of every branch, the branches that
+        depend on a failed one are skipped
+        """
+        result = await self._api.apply_policies(policies, depends_on, concurrency)
+        if result.succeeded:
+            self._invalidate_policy_dependent_caches()
+        return result
 
     async def rotate_other_api_key(self, resource: Resource) -> str:
         """
@@ -297,7 +661,34 @@ class Client:
             debug=self.debug,
             http_debug=http_debug)
 
+    def _invalidate_policy_dependent_caches(self):
+        if self._resource_index is not None:
+            self._resource_index.invalidate()
+        if self._privilege_cache is not None:
+            # Swapped rather than cleared, so checks that are still in flight can't
+            # store decisions made before the policy change
+            cache = self._privilege_cache
+            self._privilege_cache = TTLCache(cache.ttl_seconds, cache.max_size)
+
+    async def _check_privilege(self, kind: str, resource_id: str, privilege: str, role_id: str = None) -> bool:
+        cache = self._privilege_cache
+        if cache is None:
+            return await self._api.check_privilege(kind, resource_id, privilege, role_id)
+
+        key = (kind, resource_id, privilege, role_id or '')
+        decision = cache.get(key)
+        notify(active_request_hooks(), 'on_cache_lookup', 'privilege', decision is not None)
+        if decision is None:
+            decision = await self._api.check_privilege(kind, resource_id, privilege, role_id)
+            cache.set(key, decision)
+        return decision
+
     async def _find_resources_by_identifier(self, resource_identifier: str) -> list:
+        if self._resource_index is not None:
+            notify(active_request_hooks(), 'on_cache_lookup', 'resource_index', self._resource_index.is_fresh)
+            await self._resource_index.ensure_fresh()
+            return self._resource_index.find_resources_by_identifier(resource_identifier)
+
         list_constraints = {"search": resource_identifier}
         returned_resources_ids = await self._api.resources_list(list_constraints)
 
@@ -39,6 +39,25 @@ class HttpSslError(HttpError):
         super().__init__(message=message)
 
 
+class BatchOperationException(Exception):
+    """ Exception when some of the items of a batch operation failed """
+
+    def __init__(self, failures: dict):
+        self.failures = failures
+        self.message = f"Batch operation failed for {len(failures)} item(s): {', '.join(map(str, failures))}"
+        super().__init__(self.message)
+
+
+class DependencyFailedException(Exception):
+    """ Exception when an item of a batch operation is skipped because an item it depends on failed """
+
+    def __init__(self, item: str, dependency: str):
+        self.item = item
+        self.dependency = dependency
+        self.message = f"'{item}' was skipped because '{dependency}' failed"
+        super().__init__(self.message)
+
+
 class ResourceNotFoundException(Exception):
     """ Exception when user inputted an invalid resource type """
 
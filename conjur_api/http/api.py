@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+# pylint: disable=too-many-lines
 
 """
 API module
@@ -6,21 +7,40 @@ API module
 Provides high-level interface for programmatic API interactions
 """
 # Builtins
+import asyncio
+import copy
 import logging
+import os
+import time
+from contextvars import Context
 from datetime import datetime
-from typing import Optional
+from functools import partial
+from itertools import chain
+from typing import IO, AsyncIterable, AsyncIterator, Iterable, Iterator, Mapping, Optional, Union
 from urllib import parse
 
-from conjur_api.errors.errors import HttpStatusError, InvalidResourceException, MissingRequiredParameterException
+from conjur_api.errors.errors import HttpStatusError, InvalidFormatException, InvalidResourceException, \
+    MissingRequiredParameterException
 # Internals
 from conjur_api.errors.errors import MissingApiTokenException
 from conjur_api.http.endpoints import ConjurEndpoint
+from conjur_api.instrumentation.request_hooks import active_request_hooks, notify
 from conjur_api.interface.authentication_strategy_interface import AuthenticationStrategyInterface
 # pylint: disable=too-many-instance-attributes
 from conjur_api.models import Resource, ConjurConnectionInfo, ListPermittedRolesData, \
-    ListMembersOfData, CreateHostData, CreateTokenData, SslVerificationMetadata, SslVerificationMode
+    ListMembersOfData, CreateHostData, CreateTokenData, SslVerificationMetadata, SslVerificationMode, BatchResult, \
+    PolicyMode
+from conjur_api.utils.concurrency import DEFAULT_CONCURRENCY, gather_bounded, gather_with_dependencies, \
+    iter_bounded
+from conjur_api.utils.pagination import DEFAULT_PAGE_SIZE, paginate
+from conjur_api.utils.retry import DEFAULT_RETRY_ATTEMPTS, is_unprocessed_error, retry_transient_errors
 from conjur_api.wrappers.http_response import HttpResponse
-from conjur_api.wrappers.http_wrapper import HttpVerb, invoke_endpoint
+from conjur_api.wrappers.http_wrapper import HttpVerb, RequestBody, invoke_endpoint, pooled_context, \
+    pooled_session
+
+# A policy file path, or bytes, a file-like object or an async iterable with the policy content
+PolicySource = Union[str, os.PathLike, bytes, IO, AsyncIterable[bytes]]
+DEFAULT_HOSTS_PER_TOKEN = 500
 
 
 # pylint: disable=unspecified-encoding,too-many-public-methods
@@ -34,8 +54,18 @@ class Api:
     KIND_HOST_FACTORY = 'host_factory'
     ID_FORMAT = '{account}:{kind}:{id}'
     ID_RETURN_PREFIX = '{account}:{kind}:'
+    ROLE_KINDS = ('user', 'host', 'group', 'layer', 'policy')
+    # Below this many IDs, checking them one by one is always cheaper than listing
+    LIST_PASS_MIN_IDS = 100
+    POLICY_MODE_VERBS = {
+        PolicyMode.LOAD: HttpVerb.POST,
+        PolicyMode.REPLACE: HttpVerb.PUT,
+        PolicyMode.UPDATE: HttpVerb.PATCH,
+    }
 
     _api_token = None
+    # Sends policy bodies gzip-encoded, for servers and proxies that accept compressed requests
+    compress_policies = False
 
     # We explicitly want to enumerate all params needed to instantiate this
     # class but this might not be needed in the future
@@ -83,10 +113,12 @@ class Api:
         @return: Conjur api_token
         """
         if not self._api_token or datetime.now() > self.api_token_expiration:
+            notify(active_request_hooks(), 'on_cache_lookup', 'api_token', False)
             logging.debug("API token missing or expired. Fetching new one...")
             self._api_token, self.api_token_expiration = await self.authenticate()
             return self._api_token
 
+        notify(active_request_hooks(), 'on_cache_lookup', 'api_token', True)
         logging.debug("Using cached API token...")
         return self._api_token
 
@@ -157,6 +189,145 @@ class Api:
         # ?tocpath=Developer%7CREST%C2%A0APIs%7C_____17
         return resources
 
+    def iter_resources(self, list_constraints: dict = None,
+                       page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator:
+        """
+        This method is used to walk all available resources for the current
+        account page by page, using 'limit' and 'offset'. Yields the same items
+        as resources_list, while only holding a couple of pages in memory.
+        """
+        list_constraints = dict(list_constraints or {})
+        # Paging is driven by the iterator, so caller-supplied paging params are dropped
+        list_constraints.pop('limit', None)
+        list_constraints.pop('offset', None)
+
+        async def fetch_page(limit: int, offset: int) -> list:
+            return await self.resources_list({**list_constraints, 'limit': limit, 'offset': offset})
+
+        return paginate(fetch_page, page_size)
+
+    async def count_resources(self, list_constraints: dict = None) -> int:
+        """
+        This method is used to count the available resources for the current
+        account using the 'count' query parameter, without listing them.
+        """
+        params = {
+            'account': self._account
+        }
+        params.update(self._default_params)
+
+        query = {key: value for key, value in (list_constraints or {}).items()
+                 if key not in ('inspect', 'limit', 'offset')}
+        query['count'] = 'true'
+
+        api_token = await self.api_token
+        if api_token is None:
+            raise MissingApiTokenException()
+
+        response = await invoke_endpoint(HttpVerb.GET, ConjurEndpoint.RESOURCES,
+                                         params,
+                                         query=query,
+                                         api_token=api_token,
+                                         ssl_verification_metadata=self.ssl_verification_data,
+                                         proxy_params=self._connection_info.proxy_params)
+        return response.json['count']
+
+    # pylint: disable=too-many-arguments
+    async def iter_resources_concurrently(self, list_constraints: dict = None,
+                                          page_size: int = DEFAULT_PAGE_SIZE,
+                                          concurrency: int = DEFAULT_CONCURRENCY,
+                                          ordered: bool = True) -> AsyncIterator:
+        """
+        This method is used to enumerate all available resources for the current
+        account by counting them first and then fetching all 'limit'/'offset' pages
+        concurrently, with at most 'concurrency' requests in flight.
+        Pages are yielded in order, or as they arrive when 'ordered' is False.
+        Requests share one connection pool.
+        """
+        list_constraints = dict(list_constraints or {})
+        list_constraints.pop('limit', None)
+        list_constraints.pop('offset', None)
+
+        # A pooled context rather than a pooled session, as this generator runs in the context of
+        # its consumer, which may stop iterating at any yield
+        async with pooled_context(concurrency) as context:
+            total = await context.run(asyncio.ensure_future, self.count_resources(list_constraints))
+            async for page in iter_bounded(
+                    self._resource_page_factories(list_constraints, total, page_size, context),
+                    concurrency, ordered):
+                for resource in page:
+                    yield resource
+
+    def _resource_page_factories(self, list_constraints: dict, total: int, page_size: int,
+                                 context: Context = None) -> Iterator:
+        """
+        Returns one factory per page. When a context is given, the pages are fetched by tasks
+        running in it
+        """
+        def start_page(offset: int) -> asyncio.Future:
+            return context.run(asyncio.ensure_future,
+                               self.resources_list({**list_constraints, 'limit': page_size, 'offset': offset}))
+
+        if context is not None:
+            return (partial(start_page, offset) for offset in range(0, total, page_size))
+        return (
+            partial(self.resources_list, {**list_constraints, 'limit': page_size, 'offset': offset})
+            for offset in range(0, total, page_size)
+        )
+
+    async def resources_exist(self, resource_ids: Iterable[str],
+                              concurrency: int = DEFAULT_CONCURRENCY) -> dict[str, bool]:
+        """
+        This method is used to check whether many resources exist, given their IDs in the
+        'kind:identifier' or 'account:kind:identifier' format.
+        When listing the resources of the requested kinds takes fewer requests than checking
+        every ID, the IDs are looked up in a single list pass, and only the ones missing from
+        it are checked individually (they may exist without being visible to the role).
+        Requests share one connection pool, with at most 'concurrency' of them in flight.
+        """
+        resources = {resource_id: Resource.from_full_id(resource_id) for resource_id in resource_ids}
+        exists = {}
+        async with pooled_session(concurrency):
+            unresolved = resources
+            if len(resources) >= self.LIST_PASS_MIN_IDS:
+                listed = await self._list_resources_if_cheaper({resource.kind for resource in resources.values()},
+                                                               len(resources), concurrency)
+                if listed is not None:
+                    unresolved = {}
+                    for resource_id, resource in resources.items():
+                        if resource in listed:
+                            exists[resource_id] = True
+                        else:
+                            unresolved[resource_id] = resource
+
+            checks = await gather_bounded(
+                (partial(self.resource_exists, resource.kind, resource.identifier)
+                 for resource in unresolved.values()), concurrency)
+            exists.update(zip(unresolved, checks))
+
+        return {resource_id: exists[resource_id] for resource_id in resources}
+
+    async def _list_resources_if_cheaper(self, kinds: set, id_count: int, concurrency: int) -> Optional[set]:
+        """
+        Lists the resources of the given kinds, unless it would take at least as many
+        requests as checking id_count IDs one by one.
+        @return: The listed resources, or None if listing is not cheaper
+        """
+        kinds = sorted(kinds)
+        totals = await gather_bounded(
+            (partial(self.count_resources, {'kind': kind}) for kind in kinds), concurrency)
+        page_count = sum(-(-total // DEFAULT_PAGE_SIZE) for total in totals)
+        if page_count >= id_count:
+            return None
+
+        page_factories = chain.from_iterable(
+            self._resource_page_factories({'kind': kind}, total, DEFAULT_PAGE_SIZE)
+            for kind, total in zip(kinds, totals))
+        listed = set()
+        async for page in iter_bounded(page_factories, concurrency):
+            listed.update(map(Resource.from_full_id, page))
+        return listed
+
     async def check_privilege(self, kind: str, resource_id: str, privilege: str, role_id: str = None) -> bool:
         """
         This method is used to check for a privilege on a resource.
@@ -176,7 +347,7 @@ class Api:
                                              api_token=await self.api_token,
                                              ssl_verification_metadata=self.ssl_verification_data,
                                              proxy_params=self._connection_info.proxy_params)
-            logging.debug(str(response))
+            logging.debug("%s", response)
         except HttpStatusError as err:
             if err.status == 404:
                 return False
@@ -237,6 +408,19 @@ class Api:
 
         return True
 
+    async def roles_exist(self, role_ids: Iterable[str],
+                          concurrency: int = DEFAULT_CONCURRENCY) -> dict[str, bool]:
+        """
+        This method is used to check whether many roles exist, given their IDs in the
+        'kind:identifier' or 'account:kind:identifier' format.
+        Requests share one connection pool, with at most 'concurrency' of them in flight.
+        """
+        roles = {role_id: Resource.from_full_id(role_id) for role_id in role_ids}
+        async with pooled_session(concurrency):
+            checks = await gather_bounded(
+                (partial(self.role_exists, role.kind, role.identifier) for role in roles.values()), concurrency)
+        return dict(zip(roles, checks))
+
     async def get_role(self, kind: str, resource_id: str) -> dict:
         """
         This method is used to fetch a specific role.
@@ -286,6 +470,29 @@ class Api:
 
         return response.json
 
+    async def iter_role_ids(self, concurrency: int = DEFAULT_CONCURRENCY) -> AsyncIterator:
+        """
+        This method is used to enumerate the IDs of all the roles visible to the
+        current role, by listing the resources of every role kind.
+        """
+        for kind in self.ROLE_KINDS:
+            async for role_id in self.iter_resources_concurrently({'kind': kind}, concurrency=concurrency,
+                                                                  ordered=False):
+                yield role_id
+
+    async def direct_role_memberships(self, role_ids: list,
+                                      concurrency: int = DEFAULT_CONCURRENCY) -> list:
+        """
+        This method is used to fetch the direct memberships of many roles, given their IDs
+        in the 'kind:identifier' or 'account:kind:identifier' format. Returns a list of
+        memberships per role, in the order of role_ids.
+        Requests share one connection pool, with at most 'concurrency' of them in flight.
+        """
+        roles = [Resource.from_full_id(role_id) for role_id in role_ids]
+        async with pooled_session(concurrency):
+            return await gather_bounded(
+                (partial(self.role_memberships, role.kind, role.identifier, True) for role in roles), concurrency)
+
     async def role_exists(self, kind: str, resource_id: str) -> bool:
         """
         This method is used to check whether a specific role exists.
@@ -439,6 +646,68 @@ class Api:
                                      headers={'Content-Type': 'application/x-www-form-urlencoded'},
                                      proxy_params=self._connection_info.proxy_params)
 
+    # pylint: disable=too-many-arguments
+    async def create_hosts(self, create_token_data: CreateTokenData,
+                           hosts: Iterable[Union[str, CreateHostData]],
+                           concurrency: int = DEFAULT_CONCURRENCY,
+                           hosts_per_token: int = DEFAULT_HOSTS_PER_TOKEN,
+                           retry_attempts: int = DEFAULT_RETRY_ATTEMPTS) -> BatchResult:
+        """
+        This method is used to create many hosts using the hostfactory. Enough tokens for
+        hosts_per_token hosts each are minted with a single create_token call, the hosts are
+        spread across them and the tokens are revoked once done.
+        hosts holds host IDs or CreateHostData, the token of a CreateHostData is ignored.
+        """
+        if not isinstance(hosts_per_token, int) or hosts_per_token <= 0:
+            raise InvalidFormatException(f"hosts_per_token must be a positive integer, got: {hosts_per_token}")
+
+        hosts = {host.host_id if isinstance(host, CreateHostData) else host: host for host in hosts}
+        result = BatchResult()
+        if not hosts:
+            return result
+
+        # Copied, as create_token changes the data it is given
+        create_token_data = copy.copy(create_token_data)
+        create_token_data.count = -(-len(hosts) // hosts_per_token)
+        tokens = [token['token'] for token in (await self.create_token(create_token_data)).json]
+
+        async def create_one(index: int, host_id: str, host: Union[str, CreateHostData]):
+            annotations = host.annotations if isinstance(host, CreateHostData) else None
+            create_host_data = CreateHostData(host_id, tokens[index % len(tokens)], annotations)
+            try:
+                response = await retry_transient_errors(partial(self.create_host, create_host_data),
+                                                        retry_attempts)
+                result.succeeded[host_id] = response.json['api_key']
+            except Exception as err:  # pylint: disable=broad-except
+                result.failed[host_id] = err
+
+        async with pooled_session(concurrency):
+            try:
+                await gather_bounded((partial(create_one, index, host_id, host)
+                                      for index, (host_id, host) in enumerate(hosts.items())), concurrency)
+            finally:
+                revoked = await self.revoke_tokens(tokens, concurrency)
+                if not revoked.ok:
+                    logging.warning("Failed to revoke %d of the minted host factory tokens", len(revoked.failed))
+        return result
+
+    async def revoke_tokens(self, tokens: Iterable[str], concurrency: int = DEFAULT_CONCURRENCY) -> BatchResult:
+        """
+        This method is used to revoke many hostfactory tokens, with at most `concurrency`
+        requests in flight. A failure doesn't stop the other revocations.
+        """
+        result = BatchResult()
+
+        async def revoke_one(token: str):
+            try:
+                result.succeeded[token] = (await self.revoke_token(token)).status
+            except Exception as err:  # pylint: disable=broad-except
+                result.failed[token] = err
+
+        async with pooled_session(concurrency):
+            await gather_bounded((partial(revoke_one, token) for token in dict.fromkeys(tokens)), concurrency)
+        return result
+
     async def revoke_token(self, token: str) -> HttpResponse:
         """
         This method is used to revoke a hostfactory token.
@@ -464,10 +733,11 @@ class Api:
                                      ssl_verification_metadata=self.ssl_verification_data,
                                      proxy_params=self._connection_info.proxy_params)
 
-    async def set_variable(self, variable_id: str, value: str) -> str:
+    async def set_variable(self, variable_id: str, value: RequestBody) -> str:
         """
         This method is used to set a secret (aka "variable") to a value of
-        your choosing.
+        your choosing. The value can be text, bytes, a file-like object or an
+        async iterable of bytes; the last two are streamed in chunks.
         """
         params = {
             'kind': self.KIND_VARIABLE,
@@ -485,21 +755,62 @@ class Api:
                                          proxy_params=self._connection_info.proxy_params)
         return response.text
 
+    async def set_variables(self, values: dict, concurrency: int = DEFAULT_CONCURRENCY,
+                            retry_attempts: int = DEFAULT_RETRY_ATTEMPTS) -> BatchResult:
+        """
+        This method is used to set many secrets (aka "variables") at once, with at most
+        'concurrency' requests in flight over one connection pool.
+        Every write that lands adds a version to the variable, so writes are only retried when
+        they provably were not processed: the connection failed, or the server answered 429 or
+        503. A failure doesn't stop the other writes, the outcome of each one is reported in the
+        returned BatchResult.
+        """
+        result = BatchResult()
+
+        async def set_one(variable_id: str, value: RequestBody):
+            # A streamed value is consumed by the first attempt, so it can't be sent again
+            attempts = retry_attempts if isinstance(value, (str, bytes)) else 1
+            try:
+                result.succeeded[variable_id] = await retry_transient_errors(
+                    partial(self.set_variable, variable_id, value), attempts, is_retryable=is_unprocessed_error)
+            except Exception as err:  # pylint: disable=broad-except
+                logging.debug("Failed to set variable '%s': %s", variable_id, err)
+                result.failed[variable_id] = err
+
+        async with pooled_session(concurrency):
+            await gather_bounded((partial(set_one, variable_id, value) for variable_id, value in values.items()),
+                                 concurrency)
+        return result
+
     async def _load_policy_file(
-            self, policy_id: str, policy_file: str,
+            self, policy_id: str, policy_file: PolicySource,
             http_verb: HttpVerb) -> dict:
         """
         This method is used to load, replace or update a file-based policy into the desired
-        name.
+        name. policy_file is either the path of the policy file, or a file-like object or an
+        async iterable of bytes with the policy content. The content is streamed in chunks.
+        """
+        if not isinstance(policy_file, (str, os.PathLike)):
+            return await self._load_policy(policy_id, policy_file, http_verb)
+
+        # Opening and closing a file can block for long on network filesystems, so both are
+        # done in the default executor. aiohttp reads the chunks of the open file there as well
+        loop = asyncio.get_running_loop()
+        policy_data = await loop.run_in_executor(None, open, policy_file, 'rb')
+        try:
+            return await self._load_policy(policy_id, policy_data, http_verb)
+        finally:
+            await loop.run_in_executor(None, policy_data.close)
+
+    async def _load_policy(self, policy_id: str, policy_data: RequestBody, http_verb: HttpVerb) -> dict:
+        """
+        This method is used to load, replace or update a policy given its content
         """
         params = {
             'identifier': policy_id,
         }
         params.update(self._default_params)
 
-        with open(policy_file, 'r') as content_file:
-            policy_data = content_file.read()
-
         api_token = await self.api_token
         if api_token is None:
             raise MissingApiTokenException()
@@ -507,30 +818,93 @@ class Api:
         response = await invoke_endpoint(http_verb, ConjurEndpoint.POLICIES, params,
                                          policy_data, api_token=api_token,
                                          ssl_verification_metadata=self.ssl_verification_data,
-                                         proxy_params=self._connection_info.proxy_params)
+                                         proxy_params=self._connection_info.proxy_params,
+                                         compress=self.compress_policies)
         return response.json
 
-    async def load_policy_file(self, policy_id: str, policy_file: str) -> dict:
+    async def load_policy_file(self, policy_id: str, policy_file: PolicySource) -> dict:
         """
         This method is used to load a file-based policy into the desired
         name.
         """
         return await self._load_policy_file(policy_id, policy_file, HttpVerb.POST)
 
-    async def replace_policy_file(self, policy_id: str, policy_file: str) -> dict:
+    async def replace_policy_file(self, policy_id: str, policy_file: PolicySource) -> dict:
         """
         This method is used to replace a file-based policy into the desired
         policy ID.
         """
         return await self._load_policy_file(policy_id, policy_file, HttpVerb.PUT)
 
-    async def update_policy_file(self, policy_id: str, policy_file: str) -> dict:
+    async def update_policy_file(self, policy_id: str, policy_file: PolicySource) -> dict:
         """
         This method is used to update a file-based policy into the desired
         policy ID.
         """
         return await self._load_policy_file(policy_id, policy_file, HttpVerb.PATCH)
 
+    async def load_policy(self, policy_id: str, policy: Union[str, bytes]) -> dict:
+        """
+        This method is used to load an in-memory policy into the desired
+        name.
+        """
+        return await self._load_policy(policy_id, policy, HttpVerb.POST)
+
+    async def replace_policy(self, policy_id: str, policy: Union[str, bytes]) -> dict:
+        """
+        This method is used to replace an in-memory policy into the desired
+        policy ID.
+        """
+        return await self._load_policy(policy_id, policy, HttpVerb.PUT)
+
+    async def update_policy(self, policy_id: str, policy: Union[str, bytes]) -> dict:
+        """
+        This method is used to update an in-memory policy into the desired
+        policy ID.
+        """
+        return await self._load_policy(policy_id, policy, HttpVerb.PATCH)
+
+    async def apply_policies(self, policies: Iterable[tuple],
+                             depends_on: Mapping[str, Iterable[str]] = None,
+                             concurrency: int = DEFAULT_CONCURRENCY) -> BatchResult:
+        """
+        This method is used to apply many policies, given as (branch, source, mode) tuples,
+        with at most `concurrency` of them in flight. source is anything _load_policy_file
+        accepts, or bytes with the policy content, and mode a PolicyMode or its value.
+        depends_on maps a branch to the branches that must be applied successfully before it.
+        """
+        factories = {}
+        for branch, source, mode in policies:
+            if branch in factories:
+                raise InvalidFormatException(f"Policy branch '{branch}' appears more than once")
+            try:
+                http_verb = self.POLICY_MODE_VERBS[PolicyMode(mode)]
+            except ValueError as err:
+                raise InvalidFormatException(f"Invalid policy mode for branch '{branch}': {mode}") from err
+            factories[branch] = partial(self._load_policy_file, branch, source, http_verb)
+
+        result = BatchResult()
+
+        def timed(branch: str):
+            async def apply():
+                started_at = time.monotonic()
+                try:
+                    return await factories[branch]()
+                finally:
+                    result.durations[branch] = time.monotonic() - started_at
+            return apply
+
+        async with pooled_session(concurrency):
+            outcomes = await gather_with_dependencies({branch: timed(branch) for branch in factories},
+                                                      depends_on or {}, concurrency)
+
+        for branch, outcome in outcomes.items():
+            if isinstance(outcome, Exception):
+                result.failed[branch] = outcome
+            else:
+                result.succeeded[branch] = outcome
+        return result
+
     async def rotate_other_api_key(self, resource: Resource) -> str:
         """
         This method is used to rotate a user/host's API key that is not the current user.
@@ -639,22 +1013,7 @@ class Api:
         """
         List all members of a role, both direct and indirect
         """
-        if not parameters.resource or not parameters.resource.identifier:
-            raise MissingRequiredParameterException("Missing required parameter, 'identifier'")
-
-        if not parameters.resource or not parameters.resource.kind:
-            raise MissingRequiredParameterException("Missing required parameter, 'kind'")
-
-        params = {
-            'account': self._account,
-            'identifier': parameters.resource.identifier,
-            'kind': parameters.resource.kind,
-        }
-        params.update(self._default_params)
-
-        request_parameters = parameters.list_dictify()
-        del request_parameters['identifier']
-        del request_parameters['resource']
+        params, request_parameters = self._members_of_role_request(parameters)
 
         # Remove 'inspect' from query as it is client-side param that shouldn't get to the server.
         inspect = request_parameters.pop('inspect', None) if request_parameters else None
@@ -680,6 +1039,70 @@ class Api:
 
         return resources
 
+    def iter_members_of_role(self, parameters: ListMembersOfData,
+                             page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator:
+        """
+        This method is used to walk the members of a role page by page, using 'limit'
+        and 'offset'. Yields the same items as list_members_of_role, while only holding
+        a couple of pages in memory.
+        """
+        # Fail before the first request is scheduled
+        self._members_of_role_request(parameters)
+
+        async def fetch_page(limit: int, offset: int) -> list:
+            page_parameters = copy.copy(parameters)
+            page_parameters.limit = limit
+            page_parameters.offset = offset
+            return await self.list_members_of_role(page_parameters)
+
+        return paginate(fetch_page, page_size)
+
+    async def count_members_of_role(self, parameters: ListMembersOfData) -> int:
+        """
+        This method is used to count the members of a role using the 'count' query
+        parameter, without listing them.
+        """
+        params, request_parameters = self._members_of_role_request(parameters)
+        for client_side_or_paging_param in ('inspect', 'limit', 'offset'):
+            request_parameters.pop(client_side_or_paging_param, None)
+        request_parameters['count'] = 'true'
+
+        api_token = await self.api_token
+        if api_token is None:
+            raise MissingApiTokenException()
+
+        response = await invoke_endpoint(HttpVerb.GET,
+                                         ConjurEndpoint.ROLES_MEMBERS_OF,
+                                         params,
+                                         api_token=api_token,
+                                         query=request_parameters,
+                                         ssl_verification_metadata=self.ssl_verification_data,
+                                         proxy_params=self._connection_info.proxy_params)
+        return response.json['count']
+
+    def _members_of_role_request(self, parameters: ListMembersOfData) -> tuple[dict, dict]:
+        """
+        Validates parameters and splits them into the URL params and the query of a
+        members-of request
+        """
+        if not parameters.resource or not parameters.resource.identifier:
+            raise MissingRequiredParameterException("Missing required parameter, 'identifier'")
+
+        if not parameters.resource or not parameters.resource.kind:
+            raise MissingRequiredParameterException("Missing required parameter, 'kind'")
+
+        params = {
+            'account': self._account,
+            'identifier': parameters.resource.identifier,
+            'kind': parameters.resource.kind,
+        }
+        params.update(self._default_params)
+
+        request_parameters = parameters.list_dictify()
+        request_parameters.pop('identifier', None)
+        del request_parameters['resource']
+        return params, request_parameters
+
     async def list_permitted_roles(self, data: ListPermittedRolesData) -> dict:
         """
         Lists the roles which have the named permission on a resource.
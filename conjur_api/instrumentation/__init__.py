@@ -0,0 +1,8 @@
+"""
+Instrumentation module
+
+This module holds the request hooks of the SDK, and the instrumentation built on them
+"""
+from conjur_api.instrumentation.request_hooks import RequestHooks
+from conjur_api.instrumentation.metrics import MetricsHooks, render_prometheus
+from conjur_api.instrumentation.slow_requests import SlowRequestHooks
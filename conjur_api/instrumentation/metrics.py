@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+"""
+Metrics module
+
+This module holds the request hooks that aggregate the requests of a client into counters,
+gauges and latency histograms, and the renderer of their Prometheus text exposition
+"""
+from bisect import bisect_left
+from typing import Optional
+
+from conjur_api.instrumentation.request_hooks import RequestHooks
+from conjur_api.models.general.request_event import RequestEvent
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Status recorded for the requests that failed without a response
+NO_RESPONSE_STATUS = 0
+
+
+# pylint: disable=too-many-instance-attributes
+class MetricsHooks(RequestHooks):
+    """
+    MetricsHooks
+
+    Counts the requests per ConjurEndpoint and response status, with a fixed-bucket histogram
+    of their durations, along with a histogram per request phase, the new and reused connections,
+    the requests in flight, the retries, the cache lookups, the API token refreshes and the usage
+    of the pooled sessions.
+    Every request costs a few dict lookups and integer increments, with no locks: the hooks are
+    called on the event loop. Only clients used from several threads at once in sync mode may
+    lose an increment once in a while.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_LATENCY_BUCKETS):
+        """
+        @param buckets: Increasing upper bounds of the latency histogram buckets, in seconds.
+        A last, unbounded bucket is always added
+        """
+        self.buckets = tuple(buckets)
+        # (endpoint, status) -> [count, duration sum, count per bucket...]
+        self._series: dict[tuple[str, int], list] = {}
+        # Phase -> [count, duration sum, count per bucket...]
+        self._phases: dict[str, list] = {}
+        # [new, reused]
+        self._connections = [0, 0]
+        self._cache_lookups: dict[str, list[int]] = {}
+        self.in_flight = 0
+        self.retries = 0
+        self.pool_utilization = 0.0
+        self.peak_pool_utilization = 0.0
+
+    def on_request_start(self, event: RequestEvent):
+        self.in_flight += 1
+        if event.attempt > 1:
+            self.retries += 1
+
+    def on_request_end(self, event: RequestEvent):
+        self.in_flight -= 1
+        self._observe(self._series, (event.endpoint, event.status or NO_RESPONSE_STATUS), event.duration or 0.0)
+        for phase, duration in event.phases.items():
+            self._observe(self._phases, phase, duration)
+        if event.connection_reused is not None:
+            self._connections[event.connection_reused] += 1
+
+        if event.pool_size:
+            utilization = min(event.pool_in_flight, event.pool_size) / event.pool_size
+            self.pool_utilization = utilization
+            self.peak_pool_utilization = max(self.peak_pool_utilization, utilization)
+
+    def on_cache_lookup(self, cache: str, hit: bool):
+        lookups = self._cache_lookups.get(cache)
+        if lookups is None:
+            lookups = self._cache_lookups[cache] = [0, 0]
+        lookups[0 if hit else 1] += 1
+
+    def _observe(self, histograms: dict, key, duration: float):
+        series = histograms.get(key)
+        if series is None:
+            series = histograms[key] = [0, 0.0] + [0] * (len(self.buckets) + 1)
+        series[0] += 1
+        series[1] += duration
+        series[2 + bisect_left(self.buckets, duration)] += 1
+
+    def _histogram(self, series: list) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float('inf'),), series[2:]):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'count': series[0], 'duration_sum': series[1], 'duration_buckets': buckets}
+
+    @property
+    def token_refreshes(self) -> int:
+        """
+        @return: Number of times the API token was missing or expired and had to be fetched
+        """
+        return self._cache_lookups.get('api_token', (0, 0))[1]
+
+    def snapshot(self) -> dict:
+        """
+        @return: The current values, as a dict of plain types. Histogram buckets are cumulative
+        and keyed by their upper bound, the last one being float('inf')
+        """
+        requests = [{'endpoint': endpoint, 'status': status, **self._histogram(series)}
+                    for (endpoint, status), series in self._series.items()]
+
+        caches = {}
+        for cache, (hits, misses) in self._cache_lookups.items():
+            caches[cache] = {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses)}
+
+        return {
+            'requests': requests,
+            'phases': {phase: self._histogram(series) for phase, series in self._phases.items()},
+            'connections': {'new': self._connections[0], 'reused': self._connections[1]},
+            'in_flight': self.in_flight,
+            'retries': self.retries,
+            'caches': caches,
+            'token_refreshes': self.token_refreshes,
+            'pool': {'utilization': self.pool_utilization, 'peak_utilization': self.peak_pool_utilization},
+        }
+
+    def reset(self):
+        """
+        Zeroes the counters and histograms. Gauges keep their current value
+        """
+        self._series.clear()
+        self._phases.clear()
+        self._connections = [0, 0]
+        self._cache_lookups.clear()
+        self.retries = 0
+        self.peak_pool_utilization = self.pool_utilization
+
+
+def render_prometheus(snapshot: dict, prefix: str = 'conjur_client', labels: Optional[dict] = None) -> str:
+    """
+    Renders a MetricsHooks snapshot in the Prometheus text exposition format
+    @param snapshot: Snapshot returned by MetricsHooks.snapshot or Client.metrics
+    @param prefix: Prefix of the metric names
+    @param labels: Labels added to every sample, such as the Conjur URL or the client name
+    """
+    common = ''.join(f'{name}="{_escape(value)}",' for name, value in (labels or {}).items())
+    lines = []
+
+    def family(name: str, kind: str, description: str):
+        lines.append(f'# HELP {prefix}_{name} {description}')
+        lines.append(f'# TYPE {prefix}_{name} {kind}')
+
+    def sample(name: str, value, **sample_labels):
+        rendered = common + ''.join(f'{key}="{_escape(val)}",' for key, val in sample_labels.items())
+        lines.append(f'{prefix}_{name}{{{rendered.rstrip(",")}}} {value}' if rendered
+                     else f'{prefix}_{name} {value}')
+
+    def histogram(name: str, series: dict, **sample_labels):
+        for bound, count in series['duration_buckets'].items():
+            sample(f'{name}_bucket', count, **sample_labels, le='+Inf' if bound == float('inf') else repr(bound))
+        sample(f'{name}_sum', series['duration_sum'], **sample_labels)
+        sample(f'{name}_count', series['count'], **sample_labels)
+
+    family('requests_total', 'counter', 'HTTP requests sent to Conjur, by endpoint and status')
+    for series in snapshot['requests']:
+        sample('requests_total', series['count'], endpoint=series['endpoint'], status=series['status'])
+
+    family('request_duration_seconds', 'histogram', 'Duration of the HTTP requests sent to Conjur')
+    for series in snapshot['requests']:
+        histogram('request_duration_seconds', series, endpoint=series['endpoint'], status=series['status'])
+
+    family('request_phase_duration_seconds', 'histogram', 'Duration of the phases of the HTTP requests sent to Conjur')
+    for phase, series in snapshot['phases'].items():
+        histogram('request_phase_duration_seconds', series, phase=phase)
+
+    family('connections_total', 'counter', 'Connections used by the HTTP requests sent to Conjur, by reuse')
+    sample('connections_total', snapshot['connections']['new'], reused='false')
+    sample('connections_total', snapshot['connections']['reused'], reused='true')
+
+    family('requests_in_flight', 'gauge', 'HTTP requests to Conjur currently in flight')
+    sample('requests_in_flight', snapshot['in_flight'])
+    family('retries_total', 'counter', 'HTTP requests to Conjur that were retries of a failed one')
+    sample('retries_total', snapshot['retries'])
+
+    family('cache_lookups_total', 'counter', 'Client cache lookups, by cache and result')
+    for cache, lookups in snapshot['caches'].items():
+        sample('cache_lookups_total', lookups['hits'], cache=cache, result='hit')
+        sample('cache_lookups_total', lookups['misses'], cache=cache, result='miss')
+
+    family('token_refreshes_total', 'counter', 'API tokens fetched because the cached one was missing or expired')
+    sample('token_refreshes_total', snapshot['token_refreshes'])
+    family('pool_utilization', 'gauge', 'Share of the pooled session connections in use by the last pooled request')
+    sample('pool_utilization', snapshot['pool']['utilization'])
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+"""
+RequestHooks module
+
+This module holds the interface for observing the HTTP requests sent to Conjur, and the
+context that makes the hooks of a client visible to the requests it sends
+"""
+import logging
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import ContextManager, Iterator, Optional
+
+from conjur_api.models.general.request_event import RequestEvent
+
+# Hooks of the client whose method is running. Being a context variable, it is also visible to
+# the requests sent by authentication strategies and by the tasks spawned during the call
+_active_hooks: ContextVar[tuple] = ContextVar('conjur_api_request_hooks', default=())
+
+
+class RequestHooks:
+    """
+    RequestHooks
+
+    Base class for observing every HTTP request sent to Conjur, including authentication
+    requests and retries. Override the methods of interest, the others do nothing.
+    Hooks are called on the event loop, so they should return quickly. An exception raised
+    by a hook is logged and doesn't affect the request.
+    """
+
+    def on_request_start(self, event: RequestEvent):
+        """
+        Called right before a request is sent
+        """
+
+    def on_request_end(self, event: RequestEvent):
+        """
+        Called once a request is over, whether it succeeded or not. Always called last
+        """
+
+    def on_error(self, event: RequestEvent):
+        """
+        Called when a request failed or was cancelled, before on_request_end. event.error holds the
+        exception, an asyncio.CancelledError for cancelled requests, and event.status the response
+        status if one was received
+        """
+
+    def on_cache_lookup(self, cache: str, hit: bool):
+        """
+        Called when a client cache is consulted instead of, or before, sending a request.
+        cache is one of 'api_token', 'privilege' and 'resource_index'
+        """
+
+    def call_context(self, method: str) -> Optional[ContextManager]:  # pylint: disable=unused-argument
+        """
+        Returns a context manager to wrap every call to the given public coroutine method of the
+        client in, or None. The requests of the call are sent within it, so it can for instance
+        open a span the requests are nested under
+        """
+        return None
+
+
+def active_request_hooks() -> tuple:
+    """
+    @return: The hooks of the client whose method is running
+    """
+    return _active_hooks.get()
+
+
+@contextmanager
+def use_request_hooks(hooks: tuple) -> Iterator[None]:
+    """
+    Within this context, requests are reported to the given hooks
+    """
+    token = _active_hooks.set(hooks)
+    try:
+        yield
+    finally:
+        _active_hooks.reset(token)
+
+
+@contextmanager
+def call_contexts(hooks: tuple, method: str) -> Iterator[None]:
+    """
+    Within this context, the call contexts of the given hooks for the given method are entered
+    """
+    with ExitStack() as stack:
+        for hook in hooks:
+            try:
+                context = hook.call_context(method)
+                if context is not None:
+                    stack.enter_context(context)
+            except Exception as err:  # pylint: disable=broad-except
+                logging.warning("Request hook %s.call_context failed: %s", type(hook).__name__, err)
+        yield
+
+
+def notify(hooks: tuple, method: str, *args):
+    """
+    Calls the given method of every hook with the given arguments
+    """
+    for hook in hooks:
+        try:
+            getattr(hook, method)(*args)
+        except Exception as err:  # pylint: disable=broad-except
+            logging.warning("Request hook %s.%s failed: %s", type(hook).__name__, method, err)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+SlowRequests module
+
+This module holds the request hooks that log the requests slower than a threshold, and
+summarize the slowest endpoints over a rolling window
+"""
+import logging
+import time
+from collections import deque
+
+from conjur_api.http.endpoints import ConjurEndpoint
+from conjur_api.instrumentation.request_hooks import RequestHooks
+from conjur_api.models.general.request_event import RequestEvent
+
+DEFAULT_SLOW_REQUEST_THRESHOLD_SECONDS = 1.0
+DEFAULT_SLOW_REQUEST_WINDOW_SECONDS = 15 * 60
+# Bounds the memory of the rolling window when Conjur is slow for every request
+MAX_SLOW_REQUESTS_KEPT = 10000
+PHASES = ('queue', 'dns', 'connect', 'wait', 'receive')
+
+
+class SlowRequestHooks(RequestHooks):
+    """
+    SlowRequestHooks
+
+    Logs a warning for every request that took threshold_seconds or more, with the endpoint
+    template, the status, the attempt number and the duration of each phase, the queue phase
+    being the time spent waiting for a connection of a pooled session. The log record also
+    carries these fields as a dict in its 'conjur_request' attribute, for structured logging
+    handlers. Tokens, resource IDs and secret values are never logged.
+    The slow requests of the last window_seconds are kept, and summarized per endpoint by
+    slowest_endpoints.
+    """
+
+    def __init__(self,
+                 threshold_seconds: float = DEFAULT_SLOW_REQUEST_THRESHOLD_SECONDS,
+                 window_seconds: float = DEFAULT_SLOW_REQUEST_WINDOW_SECONDS):
+        """
+        @param threshold_seconds: Duration from which a request is considered slow
+        @param window_seconds: Age after which a slow request leaves the summary
+        """
+        self.threshold_seconds = threshold_seconds
+        self.window_seconds = window_seconds
+        # (monotonic end time, endpoint, duration)
+        self._slow_requests: deque = deque(maxlen=MAX_SLOW_REQUESTS_KEPT)
+
+    def on_request_end(self, event: RequestEvent):
+        if event.duration is None or event.duration < self.threshold_seconds:
+            return
+
+        self._slow_requests.append((time.monotonic(), event.endpoint, event.duration))
+        fields = {
+            'endpoint': event.endpoint,
+            'template': _template(event.endpoint),
+            'verb': event.verb,
+            'status': event.status,
+            'attempt': event.attempt,
+            'duration': event.duration,
+            'phases': dict(event.phases),
+            'connection_reused': event.connection_reused,
+            'error': type(event.error).__name__ if event.error is not None else None,
+        }
+        logging.warning("Slow Conjur request. Endpoint: %s %s, Status: %s, Attempt: %d, Duration: %dms, "
+                        "Phases: %s, Error: %s",
+                        event.verb, fields['template'], event.status, event.attempt, event.duration * 1000,
+                        ', '.join(f"{phase}={event.phases[phase] * 1000:.0f}ms"
+                                  for phase in PHASES if phase in event.phases) or 'unknown',
+                        fields['error'], extra={'conjur_request': fields})
+
+    def slowest_endpoints(self, limit: int = 10) -> list:
+        """
+        @return: Up to limit dicts, one per endpoint with slow requests in the window, holding the
+        endpoint name and template, the count of slow requests and their max and mean duration in
+        seconds. Sorted by the total duration of the slow requests, longest first
+        """
+        self._prune()
+        by_endpoint = {}
+        for _, endpoint, duration in self._slow_requests:
+            summary = by_endpoint.get(endpoint)
+            if summary is None:
+                summary = by_endpoint[endpoint] = [0, 0.0, 0.0]
+            summary[0] += 1
+            summary[1] += duration
+            summary[2] = max(summary[2], duration)
+
+        ranked = sorted(by_endpoint.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [{'endpoint': endpoint, 'template': _template(endpoint), 'count': count,
+                 'max_duration': max_duration, 'mean_duration': total / count}
+                for endpoint, (count, total, max_duration) in ranked]
+
+    def _prune(self):
+        oldest = time.monotonic() - self.window_seconds
+        while self._slow_requests and self._slow_requests[0][0] < oldest:
+            self._slow_requests.popleft()
+
+
+def _template(endpoint: str) -> str:
+    # The path template, without the server URL. It holds placeholders only, never IDs
+    try:
+        return ConjurEndpoint[endpoint].value.replace('{url}', '')
+    except KeyError:
+        return endpoint
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tracing module
+
+This module holds the OpenTelemetry integration, which reports the client calls and the
+HTTP requests they send as spans. It requires the 'tracing' extra:
+
+    pip install conjur-api[tracing]
+"""
+from contextlib import contextmanager
+from typing import ContextManager, Iterator, Optional
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError as import_error:  # pragma: no cover
+    raise ImportError("Tracing requires the opentelemetry-api package. "
+                      "Install it with: pip install conjur-api[tracing]") from import_error
+
+from conjur_api.instrumentation.request_hooks import RequestHooks
+from conjur_api.models.general.request_event import RequestEvent
+
+TRACER_NAME = 'conjur_api'
+
+
+class TracingHooks(RequestHooks):
+    """
+    TracingHooks
+
+    Opens a span per call to a public coroutine method of the client, named after the method,
+    and a child span per HTTP attempt, named after the verb and the ConjurEndpoint. Spans are
+    nested under the span that is current for the caller, including in sync mode.
+    Attempt spans carry the endpoint, verb, attempt number, status, body sizes, whether the
+    connection was reused and the duration of the request phases in seconds. Call spans carry
+    the number of retries and the outcome of the cache lookups. Resource IDs are only recorded
+    when record_ids is set, and tokens, secret values and error messages never are.
+    The requests of async generator methods, such as iter_resources, are nested under the span
+    that is current when the generator is advanced.
+    """
+
+    def __init__(self, tracer_provider: Optional['trace.TracerProvider'] = None, record_ids: bool = False):
+        """
+        @param tracer_provider: Provider of the tracer, the global one by default
+        @param record_ids: Whether the path parameters of the requests, such as the account and
+        the resource IDs, are recorded as span attributes
+        """
+        self.tracer = trace.get_tracer(TRACER_NAME, tracer_provider=tracer_provider)
+        self.record_ids = record_ids
+        self._spans: dict[RequestEvent, trace.Span] = {}
+        self._call_spans: set = set()
+
+    def call_context(self, method: str) -> Optional[ContextManager]:
+        return self._call_span(method)
+
+    @contextmanager
+    def _call_span(self, method: str) -> Iterator[None]:
+        # Exceptions are not recorded by the tracer, as their message may hold the URL
+        with self.tracer.start_as_current_span(f"conjur.{method}", kind=SpanKind.INTERNAL, record_exception=False,
+                                               set_status_on_exception=False) as span:
+            self._call_spans.add(span)
+            try:
+                yield
+            except Exception as err:
+                span.set_attribute('error.type', type(err).__name__)
+                span.set_status(Status(StatusCode.ERROR))
+                raise
+            finally:
+                self._call_spans.discard(span)
+
+    def on_request_start(self, event: RequestEvent):
+        attributes = {
+            'http.request.method': event.verb,
+            'conjur.endpoint': event.endpoint,
+            'conjur.attempt': event.attempt,
+        }
+        if event.attempt > 1:
+            attributes['http.request.resend_count'] = event.attempt - 1
+            self._set_call_attribute('conjur.retry_count', event.attempt - 1)
+        if event.bytes_sent is not None:
+            attributes['http.request.body.size'] = event.bytes_sent
+        if self.record_ids:
+            for key, value in event.params.items():
+                attributes[f'conjur.params.{key}'] = value
+        self._spans[event] = self.tracer.start_span(f"{event.verb} {event.endpoint}", kind=SpanKind.CLIENT,
+                                                    attributes=attributes)
+
+    def on_request_end(self, event: RequestEvent):
+        span = self._spans.pop(event, None)
+        if span is None:
+            return
+        if event.status is not None:
+            span.set_attribute('http.response.status_code', event.status)
+        if event.bytes_received is not None:
+            span.set_attribute('http.response.body.size', event.bytes_received)
+        if event.connection_reused is not None:
+            span.set_attribute('conjur.connection_reused', event.connection_reused)
+        for phase, duration in event.phases.items():
+            span.set_attribute(f'conjur.phase.{phase}', duration)
+        if event.error is not None:
+            # The message is left out, as it may hold the URL
+            span.set_attribute('error.type', type(event.error).__name__)
+            span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+    def on_cache_lookup(self, cache: str, hit: bool):
+        self._set_call_attribute(f'conjur.cache.{cache}', 'hit' if hit else 'miss')
+
+    def _set_call_attribute(self, key: str, value):
+        # Attempt spans are never made current, so the current span is the one of the call, unless
+        # the request was sent outside of a call, in which case it belongs to the caller
+        span = trace.get_current_span()
+        if span in self._call_spans:
+            span.set_attribute(key, value)
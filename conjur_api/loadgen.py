@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+
+"""
+Loadgen module
+
+This module is a load generator, for sizing Conjur and its followers. It drives a weighted mix
+of Client operations against a Conjur server, or an in-process FakeConjurServer, either at a
+target rate or with a fixed number of operations in flight, and reports the achieved QPS, the
+latency histogram and the errors of every operation, and the CPU used by the client:
+
+    CONJUR_AUTHN_API_KEY=... python -m conjur_api.loadgen --url https://conjur-follower --account myorg \\
+        --login host/loadgen --mix get=80,get_many=10,check_privilege=10 --rate 500 --duration 60
+    python -m conjur_api.loadgen --fake --fake-latency-ms 5 --concurrency 50 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from bisect import bisect_left
+from typing import Optional
+
+from conjur_api.client import Client
+from conjur_api.errors.errors import HttpStatusError
+from conjur_api.instrumentation.metrics import DEFAULT_LATENCY_BUCKETS
+from conjur_api.models import ConjurConnectionInfo, CredentialsData, SslVerificationMode
+from conjur_api.providers.authn_authentication_strategy import AuthnAuthenticationStrategy
+from conjur_api.providers.simple_credentials_provider import SimpleCredentialsProvider
+
+DEFAULT_MIX = 'get=80,get_many=10,check_privilege=10'
+DEFAULT_CONCURRENCY = 10
+# Cap of the operations in flight in rate mode, arrivals beyond it are counted as missed
+DEFAULT_RATE_MAX_IN_FLIGHT = 1000
+
+
+# pylint: disable=too-few-public-methods
+class LoadContext:
+    """
+    LoadContext
+
+    The client under load and the IDs the operations pick from
+    """
+
+    def __init__(self, client: Client, variable_ids: list, batch_size: int, seed: int):
+        self.client = client
+        self.variable_ids = variable_ids
+        self.batch_size = min(batch_size, len(variable_ids))
+        self.random = random.Random(seed)
+
+    def variable(self) -> str:
+        """
+        @return: The ID of a random variable
+        """
+        return self.random.choice(self.variable_ids)
+
+
+OPERATIONS = {
+    'get': lambda context: context.client.get(context.variable()),
+    'get_many': lambda context: context.client.get_many(*context.random.sample(context.variable_ids,
+                                                                               context.batch_size)),
+    'list': lambda context: context.client.list({'kind': 'variable', 'limit': 100}),
+    'check_privilege': lambda context: context.client.check_privilege('variable', context.variable(), 'execute'),
+    'resource_exists': lambda context: context.client.resource_exists('variable', context.variable()),
+    'whoami': lambda context: context.client.whoami(),
+    'authenticate': lambda context: context.client.authenticate(),
+}
+
+
+class OperationStats:
+    """
+    OperationStats
+
+    The latencies and the errors of one operation of the mix
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.errors: dict[str, int] = {}
+
+    def record(self, duration: float, error: Optional[Exception]):
+        """
+        Records one operation
+        """
+        self.latencies.append(duration)
+        if error is not None:
+            name = f'HTTP {error.status}' if isinstance(error, HttpStatusError) else type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        """
+        @return: The QPS, error rate, latency percentiles and histogram of the recorded operations
+        """
+        latencies = sorted(self.latencies)
+        histogram = [0] * (len(DEFAULT_LATENCY_BUCKETS) + 1)
+        for duration in latencies:
+            histogram[bisect_left(DEFAULT_LATENCY_BUCKETS, duration)] += 1
+        error_count = sum(self.errors.values())
+        return {
+            'operations': len(latencies),
+            'qps': len(latencies) / elapsed,
+            'error_rate': error_count / len(latencies) if latencies else 0.0,
+            'errors': dict(self.errors),
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p95_ms': _percentile(latencies, 0.95) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+            'histogram': {('+Inf' if bound == float('inf') else f'{bound * 1000:g}ms'): count
+                          for bound, count in zip(DEFAULT_LATENCY_BUCKETS + (float('inf'),), histogram)},
+        }
+
+
+# pylint: disable=too-few-public-methods,too-many-instance-attributes
+class LoadGenerator:
+    """
+    LoadGenerator
+
+    Runs the operations of a weighted mix for a given duration, with `concurrency` workers each
+    running one operation after the other, or, when `rate` is set, starting `rate` operations per
+    second whatever their latency, with at most `max_in_flight` of them in flight
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, context: LoadContext, mix: dict, duration: float, concurrency: int = DEFAULT_CONCURRENCY,
+                 rate: Optional[float] = None, max_in_flight: int = DEFAULT_RATE_MAX_IN_FLIGHT):
+        self.context = context
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.duration = duration
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.stats = {name: OperationStats() for name in mix}
+        self.missed = 0
+
+    async def _run_one(self):
+        name = self.context.random.choices(self.names, self.weights)[0]
+        error = None
+        started_at = time.perf_counter()
+        try:
+            await OPERATIONS[name](self.context)
+        except Exception as err:  # pylint: disable=broad-except
+            error = err
+        self.stats[name].record(time.perf_counter() - started_at, error)
+
+    async def _run_closed_loop(self, deadline: float):
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self._run_one()
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _run_open_loop(self, deadline: float):
+        in_flight = set()
+        interval = 1 / self.rate
+        next_start = time.perf_counter()
+        while next_start < deadline:
+            delay = next_start - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) < self.max_in_flight:
+                task = asyncio.ensure_future(self._run_one())
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            else:
+                self.missed += 1
+            next_start += interval
+        if in_flight:
+            await asyncio.wait(in_flight)
+
+    async def run(self) -> dict:
+        """
+        Runs the load, and returns its report
+        """
+        cpu_started_at = time.process_time()
+        started_at = time.perf_counter()
+        if self.rate:
+            await self._run_open_loop(started_at + self.duration)
+        else:
+            await self._run_closed_loop(started_at + self.duration)
+        elapsed = time.perf_counter() - started_at
+        cpu = time.process_time() - cpu_started_at
+
+        operations = {name: stats.summary(elapsed) for name, stats in self.stats.items() if stats.latencies}
+        total = sum(summary['operations'] for summary in operations.values())
+        errors = sum(sum(summary['errors'].values()) for summary in operations.values())
+        return {
+            'mode': f'rate {self.rate:g}/s' if self.rate else f'concurrency {self.concurrency}',
+            'elapsed_seconds': elapsed,
+            'operations': total,
+            'qps': total / elapsed,
+            'target_qps': self.rate,
+            'missed': self.missed,
+            'error_rate': errors / total if total else 0.0,
+            'cpu_seconds': cpu,
+            'cpu_utilization': cpu / elapsed,
+            'cpu_ms_per_operation': cpu / total * 1000 if total else 0.0,
+            'per_operation': operations,
+            'requests': self.context.client.metrics(),
+        }
+
+
+def parse_mix(value: str) -> dict:
+    """
+    Parses a mix such as 'get=80,list=20' into operation weights
+    """
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}', expected one of {', '.join(OPERATIONS)}")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError as err:
+            raise argparse.ArgumentTypeError(f"Invalid weight of '{name}': '{weight}'") from err
+        if mix[name] <= 0:
+            raise argparse.ArgumentTypeError(f"The weight of '{name}' must be positive")
+    return mix
+
+
+def format_report(report: dict) -> str:
+    """
+    Formats a load report as text
+    """
+    lines = [
+        f"Mode: {report['mode']}, elapsed: {report['elapsed_seconds']:.1f}s",
+        f"Operations: {report['operations']}, QPS: {report['qps']:.1f}"
+        + (f" (target {report['target_qps']:g}, missed {report['missed']})" if report['target_qps'] else ''),
+        f"Error rate: {report['error_rate']:.2%}",
+        f"Client CPU: {report['cpu_seconds']:.2f}s, {report['cpu_utilization']:.0%} of a core, "
+        f"{report['cpu_ms_per_operation']:.3f}ms per operation",
+        '',
+        f"{'operation':<18}{'count':>9}{'qps':>10}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'max ms':>10}",
+    ]
+    for name, summary in report['per_operation'].items():
+        lines.append(f"{name:<18}{summary['operations']:>9}{summary['qps']:>10.1f}{summary['error_rate']:>9.2%}"
+                     f"{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}"
+                     f"{summary['max_ms']:>10.2f}")
+    for name, summary in report['per_operation'].items():
+        lines.append('')
+        lines.append(f'{name} latency histogram' + (f", errors: {summary['errors']}" if summary['errors'] else ''))
+        buckets = list(summary['histogram'].items())
+        # The empty buckets below the fastest and above the slowest operation are left out
+        used = [index for index, (_, count) in enumerate(buckets) if count]
+        peak = max(count for _, count in buckets) or 1
+        for bound, count in buckets[used[0]:used[-1] + 1] if used else []:
+            lines.append(f"  <= {bound:>8} {count:>9} {'#' * round(40 * count / peak)}")
+    return '\n'.join(lines)
+
+
+def _percentile(sorted_values: list, share: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+
+def _create_client(args) -> Client:
+    if args.insecure:
+        ssl_verification_mode = SslVerificationMode.INSECURE
+    elif args.ca_cert:
+        ssl_verification_mode = SslVerificationMode.CA_BUNDLE
+    else:
+        ssl_verification_mode = SslVerificationMode.TRUST_STORE
+
+    provider = SimpleCredentialsProvider()
+    provider.save(CredentialsData(args.url, args.login, os.environ.get('CONJUR_AUTHN_PASSWORD'),
+                                  os.environ.get('CONJUR_AUTHN_API_KEY')))
+    return Client(ConjurConnectionInfo(args.url, args.account, cert_file=args.ca_cert),
+                  authn_strategy=AuthnAuthenticationStrategy(provider),
+                  ssl_verification_mode=ssl_verification_mode)
+
+
+async def run(args) -> dict:
+    """
+    Creates the client, discovers the variables unless given, and runs the load
+    """
+    server = None
+    if args.fake:
+        # Imported here, so that loading Conjur doesn't load the fake server
+        from conjur_api.testing import FakeConjurServer  # pylint: disable=import-outside-toplevel
+        server = await FakeConjurServer(variables=args.fake_variables, latency=args.fake_latency_ms / 1000,
+                                        error_rate=args.fake_error_rate).start()
+        client = Client(server.connection_info, authn_strategy=server.authn_strategy(),
+                        ssl_verification_mode=SslVerificationMode.INSECURE)
+    else:
+        client = _create_client(args)
+
+    try:
+        variable_ids = args.variable or [resource_id.split(':', 2)[2] for resource_id in
+                                         await client.list({'kind': 'variable', 'limit': args.discover})]
+        if not variable_ids:
+            raise ValueError('No variable visible to the client, pass them with --variable')
+        client.enable_metrics()
+        generator = LoadGenerator(LoadContext(client, variable_ids, args.batch_size, args.seed), args.mix,
+                                  args.duration, concurrency=args.concurrency, rate=args.rate,
+                                  max_in_flight=args.max_in_flight)
+        return await generator.run()
+    finally:
+        if server is not None:
+            await server.stop()
+
+
+def main(argv: Optional[list] = None):
+    """
+    Parses the arguments, runs the load and prints its report
+    """
+    parser = argparse.ArgumentParser(prog='python -m conjur_api.loadgen',
+                                     description='Drives a mix of client operations against Conjur and reports '
+                                                 'the achieved QPS, latencies, errors and client CPU. The password '
+                                                 'or API key is read from CONJUR_AUTHN_PASSWORD or '
+                                                 'CONJUR_AUTHN_API_KEY')
+    target = parser.add_argument_group('target')
+    target.add_argument('--url', help='Conjur URL')
+    target.add_argument('--account', help='Conjur account')
+    target.add_argument('--login', default=os.environ.get('CONJUR_AUTHN_LOGIN'),
+                        help='Login to authenticate with, CONJUR_AUTHN_LOGIN by default')
+    target.add_argument('--ca-cert', help='CA bundle of the Conjur certificate')
+    target.add_argument('--insecure', action='store_true', help='Skip the certificate verification')
+    target.add_argument('--fake', action='store_true',
+                        help='Target an in-process fake server, whose CPU counts as client CPU')
+    target.add_argument('--fake-variables', type=int, default=1000, help='Variables of the fake server')
+    target.add_argument('--fake-latency-ms', type=float, default=0.0, help='Latency added by the fake server')
+    target.add_argument('--fake-error-rate', type=float, default=0.0, help='Share of failing fake server requests')
+
+    load = parser.add_argument_group('load')
+    load.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                      help=f"Weighted operations, among {', '.join(OPERATIONS)}. Default: {DEFAULT_MIX}")
+    load.add_argument('--duration', type=float, default=10.0, help='Seconds the load runs for')
+    load.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                      help='Operations in flight, when no rate is given')
+    load.add_argument('--rate', type=float, help='Operations started per second, whatever their latency')
+    load.add_argument('--max-in-flight', type=int, default=DEFAULT_RATE_MAX_IN_FLIGHT,
+                      help='Operations in flight above which the arrivals of the rate mode are missed')
+    load.add_argument('--variable', action='append', help='Variable to read. Repeatable, discovered by default')
+    load.add_argument('--discover', type=int, default=1000, help='Maximum number of variables discovered')
+    load.add_argument('--batch-size', type=int, default=10, help='Variables per get_many')
+    load.add_argument('--seed', type=int, default=0, help='Seed of the operation and variable choices')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+    if not args.fake and not (args.url and args.account and args.login):
+        parser.error('--url, --account and --login are required, unless --fake is given')
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, default=str) if args.json else format_report(report))
+    if report['operations'] == 0 or report['error_rate'] == 1.0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
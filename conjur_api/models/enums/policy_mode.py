@@ -0,0 +1,15 @@
+"""
+PolicyMode module
+This module is used to represent the ways a policy can be applied to a branch
+"""
+
+from enum import Enum
+
+
+class PolicyMode(Enum):
+    """
+    Enumeration of the ways a policy can be applied to a policy branch
+    """
+    LOAD = 'load'  # Additive changes only
+    REPLACE = 'replace'  # Deletes whatever the new policy doesn't declare
+    UPDATE = 'update'  # Allows explicit deletions
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+"""
+BatchResult module
+
+This module represents the DTO that holds the outcome of a batch operation
+"""
+
+from conjur_api.errors.errors import BatchOperationException
+
+
+class BatchResult:
+    """
+    Used for reporting the outcome of every item of a batch operation, which doesn't
+    stop at the first failure
+    """
+
+    def __init__(self):
+        self.succeeded: dict = {}
+        self.failed: dict[str, Exception] = {}
+        # Seconds taken by each item, for operations that time them
+        self.durations: dict[str, float] = {}
+
+    @property
+    def ok(self) -> bool:
+        """
+        @return: True, if no item failed
+        """
+        return not self.failed
+
+    def raise_for_failures(self):
+        """ Raise an exception if any item failed """
+        if self.failed:
+            raise BatchOperationException(self.failed)
+
+    def __repr__(self) -> str:
+        return f"{{'succeeded': {len(self.succeeded)}, 'failed': {list(self.failed)}}}"
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+RequestEvent module
+
+This module represents the DTO that describes a single HTTP request to Conjur, as
+reported to the request hooks
+"""
+from typing import Optional
+
+
+# pylint: disable=too-many-instance-attributes,too-few-public-methods
+class RequestEvent:
+    """
+    Used for reporting a request to the request hooks. The fields that are only known once
+    the request is over are None until then, and stay None when they could not be measured
+    """
+    __slots__ = ('endpoint', 'verb', 'params', 'attempt', 'started_at', 'duration', 'status', 'bytes_sent',
+                 'bytes_received', 'connection_reused', 'phases', 'pool_size', 'pool_in_flight', 'error')
+
+    def __init__(self, endpoint: str, verb: str, attempt: int = 1, bytes_sent: Optional[int] = None):
+        # Name of the ConjurEndpoint, never the URL, which may hold resource IDs
+        self.endpoint = endpoint
+        self.verb = verb
+        # Path parameters of the endpoint, such as the account and the resource ID. Tokens and the
+        # server URL are left out
+        self.params: dict = {}
+        # 1 for the first attempt, incremented on every retry
+        self.attempt = attempt
+        # Wall clock time at which the request started, in seconds since the epoch
+        self.started_at: Optional[float] = None
+        # Seconds from the start to the end of the request
+        self.duration: Optional[float] = None
+        self.status: Optional[int] = None
+        # Size of the request body, None when it is streamed or compressed
+        self.bytes_sent = bytes_sent
+        # Size of the response body as received, so compressed when it was sent compressed. None
+        # when it is compressed without a Content-Length, as with chunked responses
+        self.bytes_received: Optional[int] = None
+        # Whether the request went over a kept-alive connection
+        self.connection_reused: Optional[bool] = None
+        # Seconds spent in each phase of the request, among 'queue' (waiting for a free connection of
+        # the pool), 'dns', 'connect' (TCP connection and TLS handshake, which aiohttp doesn't report
+        # apart), 'wait' (from the request sent to the response headers received, which is mostly
+        # server time) and 'receive' (reading the response body). Phases that didn't happen, such as
+        # dns and connect on a reused connection, are missing
+        self.phases: dict[str, float] = {}
+        # Connection limit of the pooled session the request was sent through, None outside of one
+        self.pool_size: Optional[int] = None
+        # Requests in flight on that pooled session when this one was sent, itself included. Above
+        # pool_size, requests wait for a free connection
+        self.pool_in_flight: Optional[int] = None
+        self.error: Optional[BaseException] = None
+
+    def __repr__(self) -> str:
+        return f"{{'endpoint': '{self.endpoint}', 'verb': '{self.verb}', 'attempt': {self.attempt}, " \
+               f"'status': {self.status}, 'duration': {self.duration}}}"
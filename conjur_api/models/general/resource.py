@@ -3,7 +3,7 @@
 """
 Resource module
 """
-
+import sys
 
 # pylint: disable=too-few-public-methods
 from conjur_api.errors.errors import MissingRequiredParameterException
@@ -12,29 +12,40 @@ from conjur_api.errors.errors import MissingRequiredParameterException
 class Resource:
     """
     DTO class that represents a resource in Conjur.
+    Resources are immutable and hashable, so they can be used in sets and as dictionary keys.
     """
 
+    # Resources are held by the hundreds of thousands in indexes and role graphs,
+    # so they don't carry a per-instance __dict__
+    __slots__ = ('kind', 'identifier')
+    kind: str
+    identifier: str
+
     @classmethod
     def from_full_id(cls, full_id: str):
         """
-        Factory method for
+        Factory method for building a resource from an ID in the 'kind:identifier'
+        or 'account:kind:identifier' format
         """
-        id_parts = full_id.split(':', 2)
-        if len(id_parts) == 3:
-            # If identifier contains also the account part, remove it.
-            id_parts.pop(0)
-        elif len(id_parts) != 2:
+        first, separator, rest = full_id.partition(':')
+        if not separator:
             raise MissingRequiredParameterException(
                 f"Resource ID missing 'kind:' prefix: {full_id}")
 
-        return Resource(kind=id_parts[0], identifier=id_parts[1])
+        kind, separator, identifier = rest.partition(':')
+        if not separator:
+            # The ID doesn't contain the account part
+            kind, identifier = first, rest
+
+        return cls(kind=kind, identifier=identifier)
 
     def __init__(self, kind: str, identifier: str):
         """
         Used for representing Conjur resources
         """
-        self.kind = kind
-        self.identifier = identifier
+        # There are only a handful of kinds, so all resources share the same kind strings
+        object.__setattr__(self, 'kind', sys.intern(kind) if isinstance(kind, str) else kind)
+        object.__setattr__(self, 'identifier', identifier)
 
     def full_id(self):
         """
@@ -42,11 +53,25 @@ class Resource:
         """
         return f"{self.kind}:{self.identifier}"
 
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Resource is immutable, cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Resource is immutable, cannot delete '{name}'")
+
+    def __reduce__(self):
+        return self.__class__, (self.kind, self.identifier)
+
     def __eq__(self, other):
         """
         Method for comparing resources by their values and not by reference
         """
+        if not isinstance(other, Resource):
+            return NotImplemented
         return self.kind == other.kind and self.identifier == other.identifier
 
+    def __hash__(self):
+        return hash((self.kind, self.identifier))
+
     def __repr__(self):
         return f"'kind': '{self.kind}', 'identifier': '{self.identifier}'"
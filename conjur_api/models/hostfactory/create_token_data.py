@@ -23,7 +23,8 @@ class CreateTokenData:
                  cidr: str = "",
                  days: int = 0,
                  hours: int = 0,
-                 minutes: int = 0):
+                 minutes: int = 0,
+                 count: int = 1):
         self.host_factory = host_factory
         self.cidr = cidr.split(',') if cidr is not None else []
 
@@ -41,6 +42,10 @@ class CreateTokenData:
                                          "Solution: provide one of the required parameters or "
                                          "make sure they are positive numbers")
 
+        if not isinstance(count, int) or count <= 0:
+            raise InvalidFormatException(f"'count' must be a positive integer, got: {count}")
+        self.count = count
+
         self.duration = self._set_duration(self.days, self.hours, self.minutes)
 
     def _set_duration(self, days, hours, minutes):
@@ -63,10 +68,12 @@ class CreateTokenData:
         return {
             'host_factory': self.host_factory,
             'cidr[]': self.cidr,
-            'expiration': self.duration
+            'expiration': self.duration,
+            'count': self.count
         }
 
     def __repr__(self) -> str:
         return f"{{'host_factory': '{self.host_factory}', " \
                f"'cidr': '{self.cidr}', " \
-               f"'expiration': '{self.duration}'}}"
+               f"'expiration': '{self.duration}', " \
+               f"'count': '{self.count}'}}"
@@ -16,6 +16,8 @@ class ListData:
     Used for organizing the the params the user passed in to execute the list command
     """
 
+    __slots__ = ('kind', 'inspect', 'search', 'limit', 'offset', 'role')
+
     def __init__(self, **arg_params):
         self.kind = get_param('kind', **arg_params)
         self.inspect = get_param('inspect', **arg_params)
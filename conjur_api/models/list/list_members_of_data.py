@@ -18,6 +18,8 @@ class ListMembersOfData(ListData):
     Used for organizing the the params the user passed in to execute the list members-of command
     """
 
+    __slots__ = ('resource', 'identifier')
+
     def __init__(self, **arg_params):
         super().__init__(**arg_params)
         self.resource = None
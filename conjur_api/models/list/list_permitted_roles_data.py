@@ -15,6 +15,8 @@ class ListPermittedRolesData:
     Used for organizing the params the user passed in to execute the list permitted-roles command
     """
 
+    __slots__ = ('identifier', 'privilege', 'kind')
+
     def __init__(self, identifier: str, privilege: str, kind: str = None):
         self.identifier = identifier
         self.privilege = privilege
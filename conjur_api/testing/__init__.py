@@ -0,0 +1,7 @@
+"""
+Testing module
+
+This module holds the helpers to test and load-test code that uses the client without a live
+Conjur. It is not imported by conjur_api
+"""
+from conjur_api.testing.fake_server import FakeConjurServer
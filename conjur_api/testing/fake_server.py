@@ -0,0 +1,551 @@
+# -*- coding: utf-8 -*-
+
+"""
+FakeConjurServer module
+
+This module holds an in-process stand-in for a Conjur server, for load-testing and
+benchmarking the client without a live Conjur
+"""
+import asyncio
+import base64
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import unquote
+
+from aiohttp import web
+
+from conjur_api.models import ConjurConnectionInfo, CredentialsData
+from conjur_api.providers.authn_authentication_strategy import AuthnAuthenticationStrategy
+from conjur_api.providers.simple_credentials_provider import SimpleCredentialsProvider
+
+DEFAULT_ACCOUNT = 'fake'
+ADMIN_LOGIN = 'admin'
+ADMIN_PASSWORD = 'FakePassword1!'
+ADMIN_API_KEY = 'fake-admin-api-key'
+DEFAULT_TOKEN_TTL = timedelta(minutes=8)
+VARIABLE_PRIVILEGES = ('read', 'execute')
+
+
+# pylint: disable=too-many-instance-attributes,too-many-public-methods
+class FakeConjurServer:
+    """
+    FakeConjurServer
+
+    An aiohttp server, run in-process over plain HTTP, that implements the endpoints of
+    ConjurEndpoint the client uses: login and authn, secrets and batch secrets, resources,
+    privilege checks, roles and memberships, policies and the host factory. Meant for
+    load-testing caching, pooling and retries on a laptop, not for checking Conjur semantics:
+    policies are accepted without being applied.
+
+    The dataset holds the 'admin' user, which has every privilege, `groups` groups, `hosts`
+    hosts, each a member of one group, and `variables` variables, each readable by one group.
+    Every request waits `latency` seconds plus up to `latency_jitter` seconds, then fails
+    with `error_status` with a probability of `error_rate`. When `rate_limit` is set, requests
+    beyond that many per second are rejected with 429. These settings can be changed while the
+    server runs, and fail_next injects a given number of failures.
+    request_counts counts the received requests per ConjurEndpoint name.
+
+        async with FakeConjurServer(variables=10000, latency=0.005) as server:
+            client = Client(server.connection_info, authn_strategy=server.authn_strategy(),
+                            ssl_verification_mode=SslVerificationMode.INSECURE)
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self,
+                 account: str = DEFAULT_ACCOUNT,
+                 variables: int = 100,
+                 hosts: int = 10,
+                 groups: int = 2,
+                 latency: float = 0.0,
+                 latency_jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 error_status: int = 503,
+                 rate_limit: Optional[float] = None,
+                 token_ttl: timedelta = DEFAULT_TOKEN_TTL,
+                 seed: int = 0):
+        """
+        @param account: Conjur account of the dataset
+        @param variables: Number of variables in the dataset
+        @param hosts: Number of hosts in the dataset
+        @param groups: Number of groups the hosts and the variable permissions are spread across
+        @param latency: Seconds every request waits before being answered
+        @param latency_jitter: Maximum of a random delay added to latency, in seconds
+        @param error_rate: Probability, from 0 to 1, of a request failing with error_status
+        @param error_status: Status of the injected failures
+        @param rate_limit: Requests per second above which requests fail with 429, None for no limit
+        @param token_ttl: Lifetime of the issued API tokens
+        @param seed: Seed of the randomness of the jitter and of the injected failures
+        """
+        self.account = account
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.token_ttl = token_ttl
+        self.request_counts: Counter = Counter()
+        self._random = random.Random(seed)
+        self._forced_failures: list[list] = []
+        self._bucket = (0.0, 0.0)
+        self._runner: Optional[web.AppRunner] = None
+        self._port: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._api_keys = {ADMIN_LOGIN: ADMIN_API_KEY}
+        self._tokens: dict[str, tuple[str, float]] = {}
+        self._host_factory_tokens: dict[str, str] = {}
+        self._policy_version = 0
+        self._resources: dict[str, dict] = {}
+        self._secrets: dict[str, list[bytes]] = {}
+        # Role ID -> IDs of the roles it is directly a member of
+        self._memberships: dict[str, list[str]] = {}
+        self._populate(variables, hosts, groups)
+
+    # Lifecycle
+
+    async def start(self) -> 'FakeConjurServer':
+        """
+        Starts listening on a free local port
+        """
+        self._runner = web.AppRunner(self._create_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self._port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        return self
+
+    async def stop(self):
+        """
+        Stops listening
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'FakeConjurServer':
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def start_in_thread(self) -> 'FakeConjurServer':
+        """
+        Starts the server on an event loop of its own, in a daemon thread. Needed to serve
+        clients in sync mode, whose calls each run their own event loop
+        """
+        started = threading.Event()
+
+        def serve():
+            self._thread_loop = asyncio.new_event_loop()
+            self._thread_loop.run_until_complete(self.start())
+            started.set()
+            self._thread_loop.run_forever()
+            self._thread_loop.run_until_complete(self.stop())
+            self._thread_loop.close()
+
+        self._thread = threading.Thread(target=serve, name='fake-conjur-server', daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop_thread(self):
+        """
+        Stops a server started with start_in_thread
+        """
+        if self._thread is not None:
+            self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'FakeConjurServer':
+        return self.start_in_thread()
+
+    def __exit__(self, *exc_info):
+        self.stop_thread()
+
+    # Client settings
+
+    @property
+    def url(self) -> str:
+        """
+        @return: Base URL of the running server
+        """
+        return f'http://127.0.0.1:{self._port}'
+
+    @property
+    def connection_info(self) -> ConjurConnectionInfo:
+        """
+        @return: Connection info of the running server, to create a Client with
+        """
+        return ConjurConnectionInfo(conjur_url=self.url, account=self.account)
+
+    def authn_strategy(self, login: str = ADMIN_LOGIN) -> AuthnAuthenticationStrategy:
+        """
+        @return: An authn strategy holding the credentials of the given login, the admin user by default.
+        Host logins have the 'host/' prefix
+        """
+        provider = SimpleCredentialsProvider()
+        provider.save(CredentialsData(self.url, login, ADMIN_PASSWORD if login == ADMIN_LOGIN else None,
+                                      self._api_keys[login]))
+        return AuthnAuthenticationStrategy(provider)
+
+    def fail_next(self, count: int = 1, status: int = 503, endpoint: Optional[str] = None):
+        """
+        Makes the next count requests fail with the given status, only the requests to the given
+        ConjurEndpoint name when one is given
+        """
+        self._forced_failures.append([count, status, endpoint])
+
+    # Dataset
+
+    def _full_id(self, kind: str, identifier: str) -> str:
+        return f'{self.account}:{kind}:{identifier}'
+
+    def _add_resource(self, kind: str, identifier: str, permissions: list = ()) -> str:
+        full_id = self._full_id(kind, identifier)
+        self._resources[full_id] = {
+            'created_at': '2024-01-01T00:00:00.000+00:00',
+            'id': full_id,
+            'owner': self._full_id('user', ADMIN_LOGIN),
+            'policy': self._full_id('policy', 'root'),
+            'permissions': [{'privilege': privilege, 'role': role, 'policy': self._full_id('policy', 'root')}
+                            for role in permissions for privilege in VARIABLE_PRIVILEGES],
+            'annotations': [],
+        }
+        if kind in ('user', 'host', 'group', 'layer', 'policy'):
+            self._memberships.setdefault(full_id, [])
+        return full_id
+
+    def _populate(self, variables: int, hosts: int, groups: int):
+        self._add_resource('policy', 'root')
+        self._add_resource('user', ADMIN_LOGIN)
+        self._add_resource('host_factory', 'factory')
+        group_ids = [self._add_resource('group', f'group-{index}') for index in range(groups)]
+        for index in range(hosts):
+            host_id = self._add_resource('host', f'host-{index}')
+            self._api_keys[f'host/host-{index}'] = f'fake-host-api-key-{index}'
+            if group_ids:
+                self._memberships[host_id].append(group_ids[index % groups])
+        for index in range(variables):
+            readers = [group_ids[index % groups]] if group_ids else []
+            variable_id = self._add_resource('variable', f'app-{index % max(groups, 1)}/secret-{index}', readers)
+            self._resources[variable_id]['secrets'] = [{'version': 1, 'expires_at': None}]
+            self._secrets[variable_id] = [f'value-{index}'.encode()]
+
+    def _transitive_memberships(self, role_id: str) -> set:
+        seen = {role_id}
+        pending = [role_id]
+        while pending:
+            for parent in self._memberships.get(pending.pop(), ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    pending.append(parent)
+        return seen
+
+    def _is_permitted(self, role_id: str, resource_id: str, privilege: str) -> bool:
+        if role_id == self._full_id('user', ADMIN_LOGIN):
+            return True
+        roles = self._transitive_memberships(role_id)
+        return any(permission['privilege'] == privilege and permission['role'] in roles
+                   for permission in self._resources[resource_id]['permissions'])
+
+    # Request pipeline
+
+    def _create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._simulate], client_max_size=1024 ** 3)
+        routes = (
+            ('LOGIN', '/authn/{account}/login', {'GET': self._login}),
+            ('AUTHENTICATE', '/authn/{account}/{login}/authenticate', {'POST': self._authenticate}),
+            ('WHOAMI', '/whoami', {'GET': self._whoami}),
+            ('BATCH_SECRETS', '/secrets', {'GET': self._get_batch_secrets}),
+            ('SECRETS', '/secrets/{account}/{kind}/{identifier:.+}',
+             {'GET': self._get_secret, 'POST': self._set_secret}),
+            ('RESOURCES', '/resources/{account}', {'GET': self._list_resources}),
+            ('RESOURCE', '/resources/{account}/{kind}/{identifier:.+}',
+             {'GET': self._get_resource, 'HEAD': self._get_resource}),
+            ('ROLE', '/roles/{account}/{kind}/{identifier:.+}', {'GET': self._get_role, 'HEAD': self._get_role}),
+            ('POLICIES', '/policies/{account}/policy/{identifier:.+}',
+             {'POST': self._load_policy, 'PUT': self._load_policy, 'PATCH': self._load_policy}),
+            ('HOST_FACTORY_TOKENS', '/host_factory_tokens', {'POST': self._create_tokens}),
+            ('HOST_FACTORY_REVOKE_TOKEN', '/host_factory_tokens/{token}', {'DELETE': self._revoke_token}),
+            ('HOST_FACTORY_HOSTS', '/host_factories/hosts', {'POST': self._create_host}),
+        )
+        for name, path, handlers in routes:
+            resource = app.router.add_resource(path, name=name)
+            for method, handler in handlers.items():
+                resource.add_route(method, handler)
+        return app
+
+    @staticmethod
+    def _endpoint_of(request: web.Request) -> str:
+        route = request.match_info.route
+        name = route.resource.name if route.resource is not None else 'UNKNOWN'
+        if name == 'RESOURCE' and 'check' in request.query:
+            return 'PRIVILEGE'
+        if name == 'RESOURCE' and 'permitted_roles' in request.query:
+            return 'RESOURCES_PERMITTED_ROLES'
+        if name == 'ROLE' and 'members' in request.query:
+            return 'ROLES_MEMBERS_OF'
+        if name == 'ROLE' and ('all' in request.query or 'memberships' in request.query):
+            return 'ROLES_MEMBERSHIPS'
+        return name
+
+    @web.middleware
+    async def _simulate(self, request: web.Request, handler):
+        endpoint = self._endpoint_of(request)
+        self.request_counts[endpoint] += 1
+
+        if self.rate_limit is not None and not self._take_rate_limit_token():
+            return web.json_response({'error': {'code': 'too_many_requests'}}, status=429,
+                                     headers={'Retry-After': '1'})
+
+        delay = self.latency + (self._random.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        status = self._injected_failure(endpoint)
+        if status is not None:
+            return web.json_response({'error': {'code': 'injected_failure'}}, status=status)
+        return await handler(request)
+
+    def _take_rate_limit_token(self) -> bool:
+        # Token bucket holding up to one second worth of requests
+        now = time.monotonic()
+        tokens, updated_at = self._bucket
+        tokens = min(self.rate_limit, tokens + (now - updated_at) * self.rate_limit)
+        if tokens < 1:
+            self._bucket = (tokens, now)
+            return False
+        self._bucket = (tokens - 1, now)
+        return True
+
+    def _injected_failure(self, endpoint: str) -> Optional[int]:
+        for failure in self._forced_failures:
+            count, status, failing_endpoint = failure
+            if failing_endpoint is None or failing_endpoint == endpoint:
+                failure[0] = count - 1
+                if failure[0] <= 0:
+                    self._forced_failures.remove(failure)
+                return status
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self.error_status
+        return None
+
+    def _authenticated_role(self, request: web.Request) -> str:
+        """
+        @return: ID of the role the API token of the request was issued to
+        """
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Token token="'):
+            raise web.HTTPUnauthorized()
+        try:
+            token = base64.b64decode(header[len('Token token="'):-1]).decode()
+        except ValueError as err:
+            raise web.HTTPUnauthorized() from err
+        login, expires_at = self._tokens.get(token, (None, 0))
+        if login is None or expires_at < time.time():
+            raise web.HTTPUnauthorized()
+        kind, _, identifier = login.partition('/') if login.startswith('host/') else ('user', '', login)
+        return self._full_id(kind, identifier)
+
+    def _resource_id(self, request: web.Request) -> str:
+        resource_id = self._full_id(request.match_info['kind'], unquote(request.match_info['identifier']))
+        if resource_id not in self._resources:
+            raise web.HTTPNotFound()
+        return resource_id
+
+    # Authentication
+
+    async def _login(self, request: web.Request) -> web.Response:
+        auth = request.headers.get('Authorization', '')
+        try:
+            username, _, password = base64.b64decode(auth[len('Basic '):]).decode().partition(':')
+        except ValueError as err:
+            raise web.HTTPUnauthorized() from err
+        if username != ADMIN_LOGIN or password != ADMIN_PASSWORD:
+            raise web.HTTPUnauthorized()
+        return web.Response(text=ADMIN_API_KEY)
+
+    async def _authenticate(self, request: web.Request) -> web.Response:
+        login = unquote(request.match_info['login'])
+        if self._api_keys.get(login) != await request.text():
+            raise web.HTTPUnauthorized()
+        issued_at = time.time()
+        expires_at = issued_at + self.token_ttl.total_seconds()
+        payload = json.dumps({'sub': login, 'iat': int(issued_at), 'exp': int(expires_at)})
+        token = json.dumps({
+            'protected': base64.b64encode(b'{"alg":"fake"}').decode(),
+            'payload': base64.b64encode(payload.encode()).decode(),
+            'signature': secrets.token_urlsafe(32),
+        })
+        self._tokens[token] = (login, expires_at)
+        return web.Response(text=token, content_type='application/json')
+
+    async def _whoami(self, request: web.Request) -> web.Response:
+        _, kind, identifier = self._authenticated_role(request).split(':', 2)
+        username = identifier if kind == 'user' else f'{kind}/{identifier}'
+        return web.json_response({'account': self.account, 'username': username,
+                                  'client_ip': request.remote, 'user_agent': request.headers.get('User-Agent'),
+                                  'token_issued_at': datetime.now(timezone.utc).isoformat()})
+
+    # Secrets
+
+    async def _get_secret(self, request: web.Request) -> web.Response:
+        role_id = self._authenticated_role(request)
+        variable_id = self._resource_id(request)
+        if not self._is_permitted(role_id, variable_id, 'execute'):
+            raise web.HTTPForbidden()
+        versions = self._secrets.get(variable_id)
+        if not versions:
+            raise web.HTTPNotFound()
+        version = int(request.query.get('version', len(versions)))
+        if not 1 <= version <= len(versions):
+            raise web.HTTPNotFound()
+        return web.Response(body=versions[version - 1], content_type='application/octet-stream')
+
+    async def _set_secret(self, request: web.Request) -> web.Response:
+        role_id = self._authenticated_role(request)
+        variable_id = self._resource_id(request)
+        if not self._is_permitted(role_id, variable_id, 'update'):
+            raise web.HTTPForbidden()
+        self._secrets.setdefault(variable_id, []).append(await request.read())
+        self._resources[variable_id]['secrets'] = [{'version': version, 'expires_at': None}
+                                                   for version in range(1, len(self._secrets[variable_id]) + 1)]
+        return web.Response(status=201)
+
+    async def _get_batch_secrets(self, request: web.Request) -> web.Response:
+        role_id = self._authenticated_role(request)
+        values = {}
+        for variable_id in request.query.get('variable_ids', '').split(','):
+            if not self._secrets.get(variable_id):
+                raise web.HTTPNotFound()
+            if not self._is_permitted(role_id, variable_id, 'execute'):
+                raise web.HTTPForbidden()
+            values[variable_id] = self._secrets[variable_id][-1].decode(errors='replace')
+        return web.json_response(values)
+
+    # Resources and roles
+
+    def _visible_resources(self, role_id: str, query) -> list:
+        kind = query.get('kind')
+        search = query.get('search')
+        return [resource for resource_id, resource in self._resources.items()
+                if (kind is None or resource_id.split(':', 2)[1] == kind)
+                and (search is None or search in resource_id)
+                and self._is_permitted(role_id, resource_id, 'read')]
+
+    async def _list_resources(self, request: web.Request) -> web.Response:
+        resources = self._visible_resources(self._authenticated_role(request), request.query)
+        if request.query.get('count') == 'true':
+            return web.json_response({'count': len(resources)})
+        return web.json_response(_page(resources, request.query))
+
+    async def _get_resource(self, request: web.Request) -> web.Response:
+        role_id = self._authenticated_role(request)
+        resource_id = self._resource_id(request)
+
+        if 'check' in request.query:
+            check_role = request.query.get('role') or role_id
+            if check_role.count(':') == 1:
+                check_role = f'{self.account}:{check_role}'
+            # Like Conjur, a missing privilege is answered as a missing resource
+            if check_role not in self._memberships or \
+                    not self._is_permitted(check_role, resource_id, request.query.get('privilege', '')):
+                raise web.HTTPNotFound()
+            return web.Response(status=204)
+
+        if not self._is_permitted(role_id, resource_id, 'read'):
+            raise web.HTTPNotFound()
+        if 'permitted_roles' in request.query:
+            privilege = request.query.get('privilege', '')
+            return web.json_response([member for member in self._memberships
+                                      if self._is_permitted(member, resource_id, privilege)])
+        if request.method == 'HEAD':
+            return web.Response()
+        return web.json_response(self._resources[resource_id])
+
+    async def _get_role(self, request: web.Request) -> web.Response:
+        self._authenticated_role(request)
+        role_id = self._resource_id(request)
+        if role_id not in self._memberships:
+            raise web.HTTPNotFound()
+
+        if 'memberships' in request.query:
+            return web.json_response([self._membership(parent, role_id) for parent in self._memberships[role_id]])
+        if 'all' in request.query:
+            return web.json_response(sorted(self._transitive_memberships(role_id)))
+        members = [self._membership(role_id, member) for member, parents in self._memberships.items()
+                   if role_id in parents]
+        if 'members' in request.query:
+            search = request.query.get('search')
+            members = [member for member in members if search is None or search in member['member']]
+            if request.query.get('count') == 'true':
+                return web.json_response({'count': len(members)})
+            return web.json_response(_page(members, request.query))
+        if request.method == 'HEAD':
+            return web.Response()
+        return web.json_response({'created_at': '2024-01-01T00:00:00.000+00:00', 'id': role_id,
+                                  'policy': self._full_id('policy', 'root'), 'members': members})
+
+    def _membership(self, role_id: str, member_id: str) -> dict:
+        return {'admin_option': False, 'ownership': False, 'role': role_id, 'member': member_id,
+                'policy': self._full_id('policy', 'root')}
+
+    # Policies and host factory
+
+    async def _load_policy(self, request: web.Request) -> web.Response:
+        role_id = self._authenticated_role(request)
+        if role_id != self._full_id('user', ADMIN_LOGIN):
+            raise web.HTTPForbidden()
+        # The body is read, so that uploads take their real time, but not applied
+        await request.read()
+        self._policy_version += 1
+        return web.json_response({'created_roles': {}, 'version': self._policy_version}, status=201)
+
+    async def _create_tokens(self, request: web.Request) -> web.Response:
+        self._authenticated_role(request)
+        form = await request.post()
+        host_factory = form.get('host_factory', '')
+        if host_factory not in self._resources:
+            raise web.HTTPNotFound()
+        tokens = []
+        for _ in range(int(form.get('count', 1))):
+            token = secrets.token_urlsafe(24)
+            self._host_factory_tokens[token] = host_factory
+            tokens.append({'expiration': form.get('expiration'), 'cidr': form.getall('cidr[]', []),
+                           'token': token})
+        return web.json_response(tokens)
+
+    async def _revoke_token(self, request: web.Request) -> web.Response:
+        self._authenticated_role(request)
+        if self._host_factory_tokens.pop(unquote(request.match_info['token']), None) is None:
+            raise web.HTTPNotFound()
+        return web.Response(status=204)
+
+    async def _create_host(self, request: web.Request) -> web.Response:
+        header = request.headers.get('Authorization', '')
+        if header[len('Token token="'):-1] not in self._host_factory_tokens:
+            raise web.HTTPUnauthorized()
+        form = await request.post()
+        host_id = self._add_resource('host', form['id'])
+        api_key = secrets.token_urlsafe(24)
+        self._api_keys[f"host/{form['id']}"] = api_key
+        annotations = {key[len('annotations['):-1]: value for key, value in form.items()
+                       if key.startswith('annotations[')}
+        self._resources[host_id]['annotations'] = [{'name': name, 'value': value,
+                                                    'policy': self._full_id('policy', 'root')}
+                                                   for name, value in annotations.items()]
+        return web.json_response({**self._resources[host_id], 'api_key': api_key}, status=201)
+
+
+def _page(items: list, query) -> list:
+    offset = int(query.get('offset', 0))
+    limit = query.get('limit')
+    return items[offset:offset + int(limit)] if limit is not None else items[offset:]
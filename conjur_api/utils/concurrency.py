@@ -0,0 +1,151 @@
+"""
+Concurrency module
+
+This module holds helpers for running many requests with bounded parallelism
+"""
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Iterable, Mapping
+
+from conjur_api.errors.errors import DependencyFailedException, InvalidFormatException
+
+DEFAULT_CONCURRENCY = 10
+
+
+async def iter_bounded(factories: Iterable[Callable[[], Awaitable]],
+                       concurrency: int = DEFAULT_CONCURRENCY,
+                       ordered: bool = False) -> AsyncIterator:
+    """
+    Runs the coroutines produced by factories with at most `concurrency` of them in flight
+    and yields their results.
+    When ordered is False results are yielded as they arrive, otherwise in the order of factories.
+    The first failure is raised to the caller and the remaining work is cancelled.
+    """
+    if not isinstance(concurrency, int) or concurrency <= 0:
+        raise InvalidFormatException(f"concurrency must be a positive integer, got: {concurrency}")
+
+    factories = iter(factories)
+    in_flight = {}
+    finished = {}
+    started = 0
+    next_index = 0
+
+    def start_next() -> bool:
+        nonlocal started
+        # When ordered, results wait for the earlier ones, so work is started at most `concurrency`
+        # results ahead of the next one to yield, which bounds the results held back too
+        if len(in_flight) >= concurrency or (ordered and started >= next_index + concurrency):
+            return False
+        factory = next(factories, None)
+        if factory is None:
+            return False
+        in_flight[asyncio.ensure_future(factory())] = started
+        started += 1
+        return True
+
+    try:
+        while start_next():
+            pass
+
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = in_flight.pop(task)
+                result = task.result()
+                if not ordered:
+                    start_next()
+                    yield result
+                    continue
+                finished[index] = result
+                while next_index in finished:
+                    result = finished.pop(next_index)
+                    next_index += 1
+                    while start_next():
+                        pass
+                    yield result
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def gather_bounded(factories: Iterable[Callable[[], Awaitable]],
+                         concurrency: int = DEFAULT_CONCURRENCY) -> list[Any]:
+    """
+    Runs the coroutines produced by factories with at most `concurrency` of them in flight
+    and returns their results in the order of factories.
+    """
+    return [result async for result in iter_bounded(factories, concurrency, ordered=True)]
+
+
+async def gather_with_dependencies(factories: Mapping[Hashable, Callable[[], Awaitable]],
+                                   dependencies: Mapping[Hashable, Iterable[Hashable]],
+                                   concurrency: int = DEFAULT_CONCURRENCY) -> dict:
+    """
+    Runs the coroutines produced by factories, keyed by name, with at most `concurrency` of them
+    in flight. A coroutine only starts once all the names it depends on have succeeded, and among
+    the ready ones the order of factories is kept. Dependencies on names missing from factories
+    are considered satisfied.
+    Failures don't stop the other work: the returned dict maps every name, in the order of
+    factories, to its result or to the exception it raised. Names that depend on a failed one
+    aren't run, and are mapped to a DependencyFailedException.
+    """
+    if not isinstance(concurrency, int) or concurrency <= 0:
+        raise InvalidFormatException(f"concurrency must be a positive integer, got: {concurrency}")
+
+    waiting = {name: {dependency for dependency in dependencies.get(name, ()) if dependency in factories}
+               for name in factories}
+    dependents = {name: [] for name in factories}
+    for name, names_depended_on in waiting.items():
+        for dependency in names_depended_on:
+            dependents[dependency].append(name)
+    __check_acyclic(waiting, dependents)
+
+    outcomes = {}
+    ready = deque(name for name, names_depended_on in waiting.items() if not names_depended_on)
+    in_flight = {}
+
+    def skip_dependents(failed_name):
+        skipped = deque(dependents[failed_name])
+        while skipped:
+            name = skipped.popleft()
+            if name not in outcomes:
+                outcomes[name] = DependencyFailedException(name, failed_name)
+                skipped.extend(dependents[name])
+
+    try:
+        while ready or in_flight:
+            while ready and len(in_flight) < concurrency:
+                name = ready.popleft()
+                in_flight[asyncio.ensure_future(factories[name]())] = name
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = in_flight.pop(task)
+                if task.exception() is not None:
+                    outcomes[name] = task.exception()
+                    skip_dependents(name)
+                    continue
+                outcomes[name] = task.result()
+                for dependent in dependents[name]:
+                    waiting[dependent].discard(name)
+                    if not waiting[dependent] and dependent not in outcomes:
+                        ready.append(dependent)
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    return {name: outcomes[name] for name in factories}
+
+
+def __check_acyclic(waiting: dict, dependents: dict):
+    remaining = {name: len(names_depended_on) for name, names_depended_on in waiting.items()}
+    ready = [name for name, count in remaining.items() if count == 0]
+    while ready:
+        for dependent in dependents[ready.pop()]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+
+    cycle = [name for name, count in remaining.items() if count > 0]
+    if cycle:
+        raise InvalidFormatException(f"Dependencies form a cycle between: {', '.join(map(str, cycle))}")
@@ -6,7 +6,9 @@ This module holds all the decorators of the SDK
 import logging
 import inspect
 import asyncio
+import functools
 from conjur_api.errors.errors import SyncInvocationInsideEventLoopError
+from conjur_api.instrumentation.request_hooks import call_contexts, use_request_hooks
 
 
 def allow_sync_invocation():
@@ -16,18 +18,18 @@ def allow_sync_invocation():
     """
 
     def allow_sync_mode(func):
-        def wrapper(self, *args):
+        def wrapper(self, *args, **kwargs):
             should_run_async = getattr(self, "async_mode")
             should_run_async |= func.__name__.startswith("_")  # omit private functions
             if should_run_async:  # Function should remain async
-                return func(self, *args)
+                return func(self, *args, **kwargs)
             loop = _get_event_loop()
             if loop is not None and loop.is_running():
                 logging.error(
                     "Failed to run conjur_api %s function in sync mode "
                     "because code is running inside event loop", func.__name__)
                 raise SyncInvocationInsideEventLoopError()
-            return asyncio.run(func(self, *args))
+            return asyncio.run(func(self, *args, **kwargs))
 
         return wrapper
 
@@ -39,6 +41,56 @@ def allow_sync_invocation():
     return decorate
 
 
+def bind_request_hooks():
+    """
+    A class decorator, used to report the requests sent by the public async methods and async
+    generators of the class to the hooks held by its '_request_hooks' attribute. Calls to the
+    coroutines also run within the call contexts of the hooks.
+    Should be applied before allow_sync_invocation
+    """
+
+    def bind_coroutine(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            hooks = self._request_hooks  # pylint: disable=protected-access
+            with use_request_hooks(hooks):
+                if not hooks:
+                    return await func(self, *args, **kwargs)
+                with call_contexts(hooks, func.__name__):
+                    return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    def bind_async_generator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            generator = func(self, *args, **kwargs)
+            try:
+                while True:
+                    # Bound one step at a time, as every step may run in a different context
+                    with use_request_hooks(self._request_hooks):  # pylint: disable=protected-access
+                        try:
+                            item = await anext(generator)
+                        except StopAsyncIteration:
+                            return
+                    yield item
+            finally:
+                await generator.aclose()
+
+        return wrapper
+
+    def decorate(cls):
+        for name, func in inspect.getmembers(cls, inspect.iscoroutinefunction):
+            if not name.startswith('_'):
+                setattr(cls, name, bind_coroutine(func))
+        for name, func in inspect.getmembers(cls, inspect.isasyncgenfunction):
+            if not name.startswith('_'):
+                setattr(cls, name, bind_async_generator(func))
+        return cls
+
+    return decorate
+
+
 def _get_event_loop():
     try:
         return asyncio.get_event_loop()
@@ -0,0 +1,41 @@
+"""
+Pagination module
+
+This module holds the logic for walking Conjur's limit/offset list endpoints
+"""
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable
+
+from conjur_api.errors.errors import InvalidFormatException
+
+DEFAULT_PAGE_SIZE = 100
+
+
+async def paginate(fetch_page: Callable[[int, int], Awaitable[list]],
+                   page_size: int = DEFAULT_PAGE_SIZE) -> AsyncIterator:
+    """
+    Yields the items of a limit/offset endpoint one by one.
+    fetch_page is called with (limit, offset) and should return a single page as a list.
+    The next page is requested in the background while the caller consumes the current one,
+    so at most two pages are held in memory at any time.
+    The walk ends on the first empty page, which keeps it correct even when the server caps
+    the page size below the requested limit.
+    """
+    if not isinstance(page_size, int) or page_size <= 0:
+        raise InvalidFormatException(f"page_size must be a positive integer, got: {page_size}")
+
+    offset = 0
+    next_page = asyncio.ensure_future(fetch_page(page_size, offset))
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+            if page:
+                offset += len(page)
+                next_page = asyncio.ensure_future(fetch_page(page_size, offset))
+            for item in page:
+                yield item
+    finally:
+        # The caller stopped iterating early, don't leave the prefetch running
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
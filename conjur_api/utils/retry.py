@@ -0,0 +1,73 @@
+"""
+Retry module
+
+This module holds the logic for retrying requests that failed with a transient error
+"""
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+from conjur_api.errors.errors import HttpError, HttpSslError, HttpStatusError
+
+DEFAULT_RETRY_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF_SECONDS = 0.2
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+# Statuses with which the server reports that it turned the request down without processing it
+UNPROCESSED_STATUSES = (429, 503)
+
+# Number of the attempt in progress, reported with the requests it sends
+current_attempt: ContextVar[int] = ContextVar('conjur_api_attempt', default=1)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    @return: True, if the request may succeed when sent again: a timeout, a connection failure,
+    or a status that reports a temporarily unavailable or overloaded server
+    """
+    if isinstance(error, HttpStatusError):
+        return error.status in RETRYABLE_STATUSES
+    if isinstance(error, HttpSslError):
+        return False
+    return isinstance(error, (HttpError, asyncio.TimeoutError))
+
+
+def is_unprocessed_error(error: Exception) -> bool:
+    """
+    @return: True, if the request provably wasn't processed by the server, so that sending it
+    again can't apply it twice: the connection could not be established, or the server turned
+    the request down as overloaded or unavailable. Timeouts and lost connections don't qualify,
+    as the request may have been processed before the response was lost
+    """
+    if isinstance(error, HttpStatusError):
+        return error.status in UNPROCESSED_STATUSES
+    if isinstance(error, HttpSslError) or not isinstance(error, HttpError):
+        return False
+    # Only raised by a failed request, once aiohttp is imported
+    from aiohttp import ClientConnectorError  # pylint: disable=import-outside-toplevel
+    return isinstance(error.__cause__, ClientConnectorError)
+
+
+async def retry_transient_errors(func: Callable[[], Awaitable],
+                                 attempts: int = DEFAULT_RETRY_ATTEMPTS,
+                                 backoff_seconds: float = DEFAULT_RETRY_BACKOFF_SECONDS,
+                                 is_retryable: Callable[[Exception], bool] = is_transient_error):
+    """
+    Awaits func(), calling it again with an exponential backoff as long as it fails with an
+    error for which is_retryable returns True, up to 'attempts' calls in total.
+    With the default is_transient_error, only meant for requests that are safe to send more
+    than once. Requests that aren't can be retried with is_unprocessed_error.
+    """
+    for attempt in range(1, attempts + 1):
+        token = current_attempt.set(attempt)
+        try:
+            return await func()
+        except Exception as err:  # pylint: disable=broad-except
+            if attempt == attempts or not is_retryable(err):
+                raise
+            delay = backoff_seconds * 2 ** (attempt - 1)
+            logging.debug("Attempt %d failed with a transient error, retrying in %.2fs: %s", attempt, delay, err)
+        finally:
+            current_attempt.reset(token)
+        await asyncio.sleep(delay)
+    return None
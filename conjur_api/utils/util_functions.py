@@ -4,6 +4,7 @@ Utils module
 This module holds common logic across the codebase
 """
 import platform
+from functools import lru_cache
 
 from conjur_api.errors.errors import MissingRequiredParameterException
 from conjur_api.models.enums.os_types import OSTypes
@@ -14,13 +15,32 @@ def list_dictify(obj):
     Function for building a dictionary from all attributes that have values
     """
     list_dict = {}
-    for attr, value in obj.__dict__.items():
+    for attr in _attribute_names(obj):
+        value = getattr(obj, attr, None)
         if value:
             list_dict[str(attr)] = value
 
     return list_dict
 
 
+def _attribute_names(obj) -> tuple:
+    if hasattr(obj, '__dict__'):
+        return tuple(obj.__dict__)
+    return _slot_names(type(obj))
+
+
+@lru_cache(maxsize=None)
+def _slot_names(cls) -> tuple:
+    """
+    Names of the __slots__ declared along the class hierarchy, base classes first
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return tuple(names)
+
+
 def get_param(name: str, **kwargs):
     """
     Return value of name if name in kwargs; None otherwise.
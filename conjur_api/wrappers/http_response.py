@@ -5,8 +5,10 @@ Http response
 This class wraps the aiohttp.ClientResponse for easy access
 """
 import json
+from typing import TYPE_CHECKING, Mapping
 
-from aiohttp import ClientResponse
+if TYPE_CHECKING:  # pragma: no cover
+    from aiohttp import ClientResponse
 
 
 class HttpResponse:
@@ -15,14 +17,14 @@ class HttpResponse:
     """
 
     @staticmethod
-    async def from_client_response(client_response: ClientResponse) -> 'HttpResponse':
+    async def from_client_response(client_response: 'ClientResponse') -> 'HttpResponse':
         """ Create HttpResponse wrapper from aiohttp.ClientReponse, and read the response body """
         text = await client_response.text('utf-8')
         content = await client_response.read()
         return HttpResponse(client_response, text, content)
 
     def __init__(self,
-                 client_response: ClientResponse,
+                 client_response: 'ClientResponse',
                  text: str,
                  content: bytes):
         self._client_response = client_response
@@ -38,6 +40,11 @@ class HttpResponse:
         """ Return the response body as utf-8 text """
         return self._client_response.status
 
+    @property
+    def headers(self) -> Mapping[str, str]:
+        """ Return the response headers """
+        return self._client_response.headers
+
     @property
     def text(self) -> str:
         """ Return the response body as utf-8 text """
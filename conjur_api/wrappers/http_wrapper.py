@@ -9,25 +9,129 @@ HTTP-based endpoints in a generic way
 import base64
 import logging
 import re
-import ssl
 import time
+from contextlib import asynccontextmanager
+from contextvars import Context, ContextVar, copy_context
 from enum import Enum
-from typing import Union
+from functools import lru_cache
+from typing import IO, TYPE_CHECKING, AsyncIterable, AsyncIterator, Optional, Union
 from urllib.parse import quote
 
-import async_timeout
-import urllib3
-from aiohttp import BasicAuth, ClientError, ClientResponseError, ClientSSLError, ClientSession
-
 from conjur_api.errors.errors import CertificateHostnameMismatchException, HttpSslError, HttpError, HttpStatusError
 from conjur_api.http.endpoints import ConjurEndpoint
 from conjur_api.http.ssl import ssl_context_factory
+from conjur_api.instrumentation.request_hooks import active_request_hooks, notify
 from conjur_api.models import SslVerificationMetadata, SslVerificationMode
 from conjur_api.models.general.proxy_params import ProxyParams
+from conjur_api.models.general.request_event import RequestEvent
+from conjur_api.utils.retry import current_attempt
 from conjur_api.wrappers.http_response import HttpResponse
 
+# aiohttp, async_timeout and ssl are imported by the first request rather than with conjur_api,
+# as they make most of its import time
+if TYPE_CHECKING:  # pragma: no cover
+    import ssl
+    from aiohttp import ClientResponseError, ClientSession, TraceConfig
+
 REQUEST_TIMEOUT_SECONDS = 10
 
+# Request bodies are sent as is. File-like objects and async iterables are streamed
+# in chunks by aiohttp instead of being read into memory first
+RequestBody = Union[str, bytes, IO, AsyncIterable[bytes]]
+DEFAULT_POOL_SIZE = 10
+# Path parameters that are not reported to the request hooks
+_UNREPORTED_PARAMS = ('url', 'token')
+
+
+# The callbacks below record the phases of the requests that carry a RequestEvent as trace_request_ctx.
+# Start times are kept on trace_config_ctx, which aiohttp creates per request
+
+
+async def _on_connection_queued_start(_session, trace_config_ctx, _params):
+    trace_config_ctx.queued_at = time.monotonic()
+
+
+async def _on_connection_queued_end(_session, trace_config_ctx, _params):
+    if trace_config_ctx.trace_request_ctx is not None:
+        trace_config_ctx.trace_request_ctx.phases['queue'] = time.monotonic() - trace_config_ctx.queued_at
+
+
+async def _on_connection_create_start(_session, trace_config_ctx, _params):
+    trace_config_ctx.connecting_at = time.monotonic()
+
+
+async def _on_dns_resolvehost_start(_session, trace_config_ctx, _params):
+    trace_config_ctx.resolving_at = time.monotonic()
+
+
+async def _on_dns_resolvehost_end(_session, trace_config_ctx, _params):
+    if trace_config_ctx.trace_request_ctx is not None:
+        trace_config_ctx.trace_request_ctx.phases['dns'] = time.monotonic() - trace_config_ctx.resolving_at
+
+
+async def _on_connection_create_end(_session, trace_config_ctx, _params):
+    event = trace_config_ctx.trace_request_ctx
+    if event is not None:
+        event.connection_reused = False
+        # Connection creation includes the DNS resolution, which has a phase of its own
+        event.phases['connect'] = time.monotonic() - trace_config_ctx.connecting_at - event.phases.get('dns', 0.0)
+
+
+async def _on_connection_reuseconn(_session, trace_config_ctx, _params):
+    if trace_config_ctx.trace_request_ctx is not None:
+        trace_config_ctx.trace_request_ctx.connection_reused = True
+
+
+async def _on_request_headers_sent(_session, trace_config_ctx, _params):
+    trace_config_ctx.sent_at = time.monotonic()
+
+
+async def _on_request_end(_session, trace_config_ctx, _params):
+    event = trace_config_ctx.trace_request_ctx
+    if event is not None:
+        # Fired once the response headers are received
+        event.phases['wait'] = time.monotonic() - trace_config_ctx.sent_at
+
+
+@lru_cache(maxsize=None)
+def _trace_config() -> 'TraceConfig':
+    """
+    Records the connection details and the phases of the requests that carry a RequestEvent
+    """
+    from aiohttp import TraceConfig  # pylint: disable=import-outside-toplevel
+
+    trace_config = TraceConfig()
+    trace_config.on_connection_queued_start.append(_on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(_on_connection_queued_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    trace_config.on_request_headers_sent.append(_on_request_headers_sent)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
+
+
+class _PooledSession:  # pylint: disable=too-few-public-methods
+    """
+    Session shared by the requests of a pooled_session context, with the SSL contexts of its requests
+    keyed by verification mode and CA path. Connections are only reused by requests with the same SSL
+    context object, so the contexts are shared too
+    """
+    __slots__ = ('session', 'ssl_contexts', 'size', 'in_flight')
+
+    def __init__(self, session: 'ClientSession', size: int):
+        self.session = session
+        self.ssl_contexts: dict = {}
+        self.size = size
+        self.in_flight = 0
+
+
+# Being a context variable, the pooled session is only visible to the task that opened the context
+# and to the tasks it spawns
+_pooled_session: ContextVar[Optional[_PooledSession]] = ContextVar('conjur_api_pooled_session', default=None)
+
 
 class HttpVerb(Enum):
     """
@@ -42,11 +146,57 @@ class HttpVerb(Enum):
     HEAD = 6
 
 
-# pylint: disable=too-many-locals,consider-using-f-string,too-many-arguments
+@asynccontextmanager
+async def pooled_session(pool_size: int = DEFAULT_POOL_SIZE) -> AsyncIterator['ClientSession']:
+    """
+    Within this context, requests reuse the connections of a single session instead of
+    opening a new session per request. Meant for bulk operations that send many requests
+    to the same server. Nested contexts reuse the outermost session
+    """
+    pooled = _pooled_session.get()
+    if pooled is not None:
+        yield pooled.session
+        return
+
+    from aiohttp import ClientSession, TCPConnector  # pylint: disable=import-outside-toplevel
+
+    async with ClientSession(connector=TCPConnector(limit=pool_size), trace_configs=[_trace_config()]) as session:
+        token = _pooled_session.set(_PooledSession(session, pool_size))
+        try:
+            yield session
+        finally:
+            _pooled_session.reset(token)
+
+
+@asynccontextmanager
+async def pooled_context(pool_size: int = DEFAULT_POOL_SIZE) -> AsyncIterator[Context]:
+    """
+    Like pooled_session, but leaves the current context untouched and yields a copy of it in
+    which requests reuse the pooled session. Meant for async generators, which run in the
+    context of their consumer: tasks started with the copy's run method send their requests
+    over the pooled session, which is then not visible to the consumer between yields
+    """
+    context = copy_context()
+    if context.get(_pooled_session) is not None:
+        yield context
+        return
+
+    from aiohttp import ClientSession, TCPConnector  # pylint: disable=import-outside-toplevel
+
+    async with ClientSession(connector=TCPConnector(limit=pool_size), trace_configs=[_trace_config()]) as session:
+        context.run(_pooled_session.set, _PooledSession(session, pool_size))
+        try:
+            yield context
+        finally:
+            # Tasks started with the context once it is exited don't get the closed session
+            context.run(_pooled_session.set, None)
+
+
+# pylint: disable=too-many-locals,consider-using-f-string,too-many-arguments,too-many-branches
 async def invoke_endpoint(http_verb: HttpVerb,
                           endpoint: ConjurEndpoint,
                           params: dict,
-                          data: str = "",
+                          data: RequestBody = "",
                           check_errors: bool = True,
                           ssl_verification_metadata: SslVerificationMetadata = None,
                           auth: tuple = None,
@@ -54,24 +204,29 @@ async def invoke_endpoint(http_verb: HttpVerb,
                           query: dict = None,
                           headers=None,
                           decode_token=True,
-                          proxy_params: ProxyParams = None) -> HttpResponse:
+                          proxy_params: ProxyParams = None,
+                          compress: bool = False) -> HttpResponse:
     """
-    This method flexibly invokes HTTP calls from 'aiohttp' module
+    This method flexibly invokes HTTP calls from 'aiohttp' module.
+    When compress is set, a non-empty request body is sent gzip-encoded. Compressed responses
+    are negotiated and decoded by aiohttp in any case
     """
     if ssl_verification_metadata is None:
         ssl_verification_metadata = SslVerificationMetadata(SslVerificationMode.TRUST_STORE)
-    # pylint: disable=logging-fstring-interpolation
-    logging.debug(f"Invoke endpoint. Verb: '{http_verb.name}', Endpoint: '{endpoint.name}', Params: '{params}', "
-                  f"Data length: '{len(data)}', Check errors: '{check_errors}', SSL verification metadata: "
-                  f"'{ssl_verification_metadata}', Basic auth user: '{auth[0] if auth else ''}', using API token: "
-                  f"'{api_token is not None}', Query params: '{query}', Headers: '{headers}', Decode token: "
-                  f"'{decode_token}'")
+    # Checked once, so that nothing is formatted for the debug logs when they are disabled
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    if debug:
+        logging.debug("Invoke endpoint. Verb: '%s', Endpoint: '%s', Params: '%s', Data length: '%s', "
+                      "Check errors: '%s', SSL verification metadata: '%s', Basic auth user: '%s', "
+                      "using API token: '%s', Query params: '%s', Headers: '%s', Decode token: '%s', "
+                      "Compress: '%s'", http_verb.name, endpoint.name, params, _body_length(data), check_errors,
+                      ssl_verification_metadata, auth[0] if auth else '', api_token is not None, query, headers,
+                      decode_token, compress)
     start = time.monotonic()
 
     if headers is None:
         headers = {}
 
-    urllib3.disable_warnings()
     orig_params = params or {}
     # Escape all params
     params = {}
@@ -89,80 +244,202 @@ async def invoke_endpoint(http_verb: HttpVerb,
 
         headers['Authorization'] = f'Token token="{api_token}"'
 
-    response = await invoke_request(http_verb,
-                                    url,
-                                    data,
-                                    query=query,
-                                    ssl_verification_metadata=ssl_verification_metadata,
-                                    auth=auth,
-                                    headers=headers,
-                                    proxy_params=proxy_params)
-
-    if check_errors:
-        # takes the response object and expands the raise_for_status method
-        # to return more helpful errors for debug logs
-        try:
-            response.raise_for_status()
-        except ClientResponseError as http_error:
-            if response.text:
-                logging.debug(HttpError(f"{http_error.status} "
-                                        f"{http_error.message} "
-                                        f"{response.text}"))
-
-            if http_error.status != 0:
-                raise HttpStatusError(status=http_error.status,
-                                      message=http_error.message,
-                                      url=str(http_error.request_info.real_url),
-                                      response=response.text) from http_error
-
-            raise HttpError from http_error
-        except Exception as general_error:
-            raise HttpError from general_error
-
-    duration_ms = int((time.monotonic() - start) * 1000)
-    logging.debug("Invoke endpoint succeeded. Duration: %dms, Request: %s %s, Response: %s",
-                  duration_ms, http_verb.name, url, response)
+    hooks = active_request_hooks()
+    event = None
+    if hooks:
+        # The size of a compressed body is only known to aiohttp
+        event = RequestEvent(endpoint.name, http_verb.name, current_attempt.get(),
+                             None if compress and data else _body_size(data))
+        event.params = {key: value for key, value in orig_params.items() if key not in _UNREPORTED_PARAMS}
+        event.started_at = time.time()
+        notify(hooks, 'on_request_start', event)
+
+    try:
+        response = await invoke_request(http_verb,
+                                        url,
+                                        data,
+                                        query=query,
+                                        ssl_verification_metadata=ssl_verification_metadata,
+                                        auth=auth,
+                                        headers=headers,
+                                        proxy_params=proxy_params,
+                                        compress=compress and bool(data),
+                                        trace_request_ctx=event)
+        if check_errors:
+            __raise_for_status(response)
+    except BaseException as err:
+        # BaseException, so that cancelled requests are reported too, with an asyncio.CancelledError
+        if event is not None:
+            event.duration = time.monotonic() - start
+            event.status = getattr(err, 'status', None)
+            event.error = err
+            notify(hooks, 'on_error', event)
+            notify(hooks, 'on_request_end', event)
+        raise
+
+    if event is not None:
+        event.duration = time.monotonic() - start
+        event.status = response.status
+        event.bytes_received = _received_size(response)
+        notify(hooks, 'on_request_end', event)
+
+    if debug:
+        logging.debug("Invoke endpoint succeeded. Duration: %dms, Request: %s %s, Response: %s",
+                      (time.monotonic() - start) * 1000, http_verb.name, url, response)
 
     return response
 
 
+def __raise_for_status(response: HttpResponse):
+    """
+    Raises the error reported by the response status, if any
+    """
+    # takes the response object and expands the raise_for_status method
+    # to return more helpful errors for debug logs
+    try:
+        response.raise_for_status()
+    except Exception as error:
+        # Imported here rather than before the try, to keep it off the path of successful requests
+        from aiohttp import ClientResponseError  # pylint: disable=import-outside-toplevel
+        if isinstance(error, ClientResponseError):
+            __raise_status_error(response, error)
+        raise HttpError from error
+
+
+def __raise_status_error(response: HttpResponse, http_error: 'ClientResponseError'):
+    if response.text:
+        logging.debug("%s %s %s", http_error.status, http_error.message, response.text)
+
+    if http_error.status != 0:
+        raise HttpStatusError(status=http_error.status,
+                              message=http_error.message,
+                              url=str(http_error.request_info.real_url),
+                              response=response.text) from http_error
+
+    raise HttpError from http_error
+
+
 # pylint: disable=too-many-arguments
 async def invoke_request(http_verb: HttpVerb,
                          url: str,
-                         data: str,
+                         data: RequestBody,
                          query: dict,
                          ssl_verification_metadata: SslVerificationMetadata,
                          auth: tuple,
                          headers: dict,
-                         proxy_params: ProxyParams) -> HttpResponse:
+                         proxy_params: ProxyParams,
+                         compress: bool = False,
+                         trace_request_ctx: Optional[RequestEvent] = None) -> HttpResponse:
     """
     This method preforms the actual request and catches possible SSLErrors to
-    perform more user-friendly messages
-    """
-    async with ClientSession() as session:
-        async with async_timeout.timeout(REQUEST_TIMEOUT_SECONDS):
-            ssl_context = __create_ssl_context(ssl_verification_metadata)
-            try:
-                async with session.request(http_verb.name,
-                                           url,
-                                           data=data,
-                                           params=query,
-                                           ssl=ssl_context,
-                                           auth=BasicAuth(*auth) if auth else None,
-                                           headers=headers,
-                                           proxy=proxy_params.proxy_url if proxy_params else None) as response:
+    perform more user-friendly messages.
+    When a trace_request_ctx event is given, the connection and pool details are recorded on it
+    """
+    pooled = _pooled_session.get()
+    if pooled is not None:
+        ssl_key = (ssl_verification_metadata.mode, ssl_verification_metadata.ca_cert_path)
+        if ssl_key not in pooled.ssl_contexts:
+            pooled.ssl_contexts[ssl_key] = __create_ssl_context(ssl_verification_metadata)
+        pooled.in_flight += 1
+        if trace_request_ctx is not None:
+            trace_request_ctx.pool_size = pooled.size
+            trace_request_ctx.pool_in_flight = pooled.in_flight
+        try:
+            return await __send_request(pooled.session, http_verb, url, data, query, pooled.ssl_contexts[ssl_key],
+                                        auth, headers, proxy_params, compress, trace_request_ctx)
+        finally:
+            pooled.in_flight -= 1
+
+    from aiohttp import ClientSession  # pylint: disable=import-outside-toplevel
+
+    async with ClientSession(trace_configs=[_trace_config()]) as session:
+        return await __send_request(session, http_verb, url, data, query,
+                                    __create_ssl_context(ssl_verification_metadata), auth,
+                                    headers, proxy_params, compress, trace_request_ctx)
+
+
+# pylint: disable=too-many-arguments
+async def __send_request(session: 'ClientSession',
+                         http_verb: HttpVerb,
+                         url: str,
+                         data: RequestBody,
+                         query: dict,
+                         ssl_context: Union[bool, 'ssl.SSLContext'],
+                         auth: tuple,
+                         headers: dict,
+                         proxy_params: ProxyParams,
+                         compress: bool,
+                         trace_request_ctx: Optional[RequestEvent]) -> HttpResponse:
+    # pylint: disable=import-outside-toplevel
+    import async_timeout
+    from aiohttp import BasicAuth, ClientError, ClientSSLError
+
+    options = {}
+    if compress:
+        # aiohttp gzips the body on the fly, streamed bodies included, and sends it chunked
+        options['compress'] = 'gzip'
+    if trace_request_ctx is not None:
+        options['trace_request_ctx'] = trace_request_ctx
+    async with async_timeout.timeout(REQUEST_TIMEOUT_SECONDS):
+        try:
+            async with session.request(http_verb.name,
+                                       url,
+                                       data=data,
+                                       params=query,
+                                       ssl=ssl_context,
+                                       auth=BasicAuth(*auth) if auth else None,
+                                       headers=headers,
+                                       proxy=proxy_params.proxy_url if proxy_params else None,
+                                       **options) as response:
+                if trace_request_ctx is None:
                     return await HttpResponse.from_client_response(response)
+                receiving_at = time.monotonic()
+                http_response = await HttpResponse.from_client_response(response)
+                trace_request_ctx.phases['receive'] = time.monotonic() - receiving_at
+                return http_response
+
+        except ClientSSLError as ssl_error:
+            host_mismatch_message = re.search("hostname '.+' doesn't match", str(ssl_error))
+            if host_mismatch_message:
+                raise CertificateHostnameMismatchException from ssl_error
+            raise HttpSslError(message=str(ssl_error)) from ssl_error
+        except ClientError as request_error:
+            raise HttpError() from request_error
+
 
-            except ClientSSLError as ssl_error:
-                host_mismatch_message = re.search("hostname '.+' doesn't match", str(ssl_error))
-                if host_mismatch_message:
-                    raise CertificateHostnameMismatchException from ssl_error
-                raise HttpSslError(message=str(ssl_error)) from ssl_error
-            except ClientError as request_error:
-                raise HttpError() from request_error
+def _body_size(data: RequestBody) -> Optional[int]:
+    """
+    Size in bytes of a request body, or None for streamed bodies
+    """
+    if isinstance(data, bytes):
+        return len(data)
+    if isinstance(data, str):
+        return len(data) if data.isascii() else len(data.encode())
+    return None
+
+
+def _received_size(response: HttpResponse) -> Optional[int]:
+    """
+    Size in bytes of a response body as received, before aiohttp decodes it, or None when it
+    is encoded and its size is not announced by a Content-Length header, as with chunked
+    compressed responses
+    """
+    if response.headers.get('Content-Encoding', 'identity').lower() == 'identity':
+        return len(response.content)
+    content_length = response.headers.get('Content-Length')
+    return int(content_length) if content_length is not None and content_length.isdigit() else None
+
+
+def _body_length(data: RequestBody) -> Union[int, str]:
+    """
+    Length of a request body for logging purposes, without consuming streamed bodies
+    """
+    if isinstance(data, (str, bytes)):
+        return len(data)
+    return 'streamed'
 
 
-def __create_ssl_context(ssl_verification_metadata: SslVerificationMetadata) -> Union[bool, ssl.SSLContext]:
+def __create_ssl_context(ssl_verification_metadata: SslVerificationMetadata) -> Union[bool, 'ssl.SSLContext']:
     """
     Return new SSLContext object to verify the TLS.
     If ssl_verify is False/None/empty, return False which instructs SSL usage without certificate validation.
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import timedelta
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from conjur_api.cache import HostFactoryTokenPool
+from conjur_api.errors.errors import InvalidFormatException
+
+
+class HostFactoryTokenPoolTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.minted = []
+        self.revoked = []
+        patcher = patch('conjur_api.cache.host_factory_token_pool.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_pool(self, **kwargs):
+        async def create_tokens(create_token_data):
+            self.minted.append((create_token_data.host_factory, create_token_data.count))
+            return [f'{create_token_data.host_factory}-{len(self.minted)}-{index}'
+                    for index in range(create_token_data.count)]
+
+        async def revoke_tokens(tokens):
+            self.revoked.extend(tokens)
+            return len(tokens)
+
+        kwargs.setdefault('duration', timedelta(minutes=10))
+        kwargs.setdefault('refresh_margin', timedelta(minutes=2))
+        return HostFactoryTokenPool(create_tokens, revoke_tokens, **kwargs)
+
+    async def test_pre_mints_and_hands_out_tokens_in_turn(self):
+        pool = self.create_pool(size=2)
+        await pool.fill(['hf-a', 'hf-b'])
+
+        self.assertCountEqual([('hf-a', 2), ('hf-b', 2)], self.minted)
+        self.assertEqual(['hf-a-1-0', 'hf-a-1-1', 'hf-a-1-0'],
+                         [await pool.get_token('hf-a') for _ in range(3)])
+        self.assertEqual(4, len(pool))
+        self.assertEqual(2, len(self.minted))
+
+    async def test_mints_on_demand_when_empty(self):
+        pool = self.create_pool(size=3)
+        self.assertEqual('hf-1-0', await pool.get_token('hf'))
+        self.assertEqual([('hf', 3)], self.minted)
+
+    async def test_replaces_tokens_before_they_expire(self):
+        pool = self.create_pool(size=2)
+        await pool.fill(['hf'])
+
+        # Within the refresh margin, the tokens are not handed out anymore
+        self.now += 9 * 60
+        self.assertEqual('hf-2-0', await pool.get_token('hf'))
+        self.assertEqual([('hf', 2), ('hf', 2)], self.minted)
+
+    async def test_tops_up_in_the_background_while_tokens_are_left(self):
+        pool = self.create_pool(size=2)
+        await pool.fill(['hf'])
+        pool._tokens['hf'].pop()
+
+        self.assertEqual('hf-1-0', await pool.get_token('hf'))
+        await asyncio.sleep(0)
+        self.assertEqual([('hf', 2), ('hf', 1)], self.minted)
+        self.assertEqual(2, len(pool))
+
+    async def test_revoke_all_empties_the_pool(self):
+        pool = self.create_pool(size=2)
+        await pool.fill(['hf-a', 'hf-b'])
+
+        self.assertEqual(4, await pool.revoke_all())
+        self.assertCountEqual(['hf-a-1-0', 'hf-a-1-1', 'hf-b-2-0', 'hf-b-2-1'], self.revoked)
+        self.assertEqual(0, len(pool))
+
+    async def test_revoke_all_waits_for_the_refills_in_progress(self):
+        pool = self.create_pool(size=2)
+        await pool.fill(['hf'])
+        pool._tokens['hf'].pop()
+        self.assertEqual('hf-1-0', await pool.get_token('hf'))
+
+        # The background refill has not run yet, its token is revoked too
+        self.assertEqual(2, await pool.revoke_all())
+        self.assertCountEqual(['hf-1-0', 'hf-2-0'], self.revoked)
+        self.assertEqual(0, len(pool))
+
+    async def test_get_token_fails_when_no_usable_token_is_minted(self):
+        async def create_tokens(create_token_data):
+            # Minting takes longer than the tokens stay usable
+            self.now += 9 * 60
+            return ['hf-0']
+
+        async def revoke_tokens(tokens):
+            return len(tokens)
+
+        pool = HostFactoryTokenPool(create_tokens, revoke_tokens, duration=timedelta(minutes=10),
+                                    refresh_margin=timedelta(minutes=2))
+        with self.assertRaises(ValueError):
+            await pool.get_token('hf')
+
+    def test_validates_its_configuration(self):
+        with self.assertRaises(InvalidFormatException):
+            self.create_pool(size=0)
+        with self.assertRaises(InvalidFormatException):
+            self.create_pool(refresh_margin=timedelta(minutes=10))
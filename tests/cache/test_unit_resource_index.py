@@ -0,0 +1,91 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from conjur_api.cache import ResourceIndex
+from conjur_api.models import Resource
+
+
+class ResourceIndexTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.loads = 0
+        self.resource_ids = ['test:host:app', 'test:variable:app', 'test:user:alice']
+
+    def create_index(self, **kwargs):
+        async def load_resources():
+            self.loads += 1
+            for resource_id in list(self.resource_ids):
+                yield resource_id
+        return ResourceIndex(load_resources, **kwargs)
+
+    async def test_index_loads_once_and_answers_lookups(self):
+        index = self.create_index()
+        await index.ensure_fresh()
+        await index.ensure_fresh()
+
+        self.assertEqual(1, self.loads)
+        self.assertEqual(3, len(index))
+        self.assertEqual(['host:app', 'variable:app'],
+                         sorted(resource.full_id() for resource in index.find_resources_by_identifier('app')))
+        self.assertEqual([Resource('user', 'alice')], index.resources_of_kind('user'))
+        self.assertTrue(index.contains('host', 'app'))
+        self.assertFalse(index.contains('host', 'alice'))
+        self.assertEqual(Resource('user', 'alice'), index.get('test:user:alice'))
+        self.assertEqual(Resource('user', 'alice'), index.get('user:alice'))
+        self.assertIsNone(index.get('user:bob'))
+
+    async def test_expired_index_serves_snapshot_while_refreshing(self):
+        index = self.create_index(ttl_seconds=0)
+        await index.ensure_fresh()
+        self.resource_ids.append('test:user:bob')
+
+        await index.ensure_fresh()
+        self.assertFalse(index.contains('user', 'bob'))
+
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.assertEqual(2, self.loads)
+        self.assertTrue(index.contains('user', 'bob'))
+
+    async def test_expired_index_refreshes_in_place_without_background_refresh(self):
+        index = self.create_index(ttl_seconds=0, background_refresh=False)
+        await index.ensure_fresh()
+        self.resource_ids.remove('test:user:alice')
+
+        await index.ensure_fresh()
+        self.assertFalse(index.contains('user', 'alice'))
+
+    async def test_invalidated_index_waits_for_refresh(self):
+        index = self.create_index()
+        await index.ensure_fresh()
+        self.resource_ids.append('test:layer:web')
+        index.invalidate()
+
+        await index.ensure_fresh()
+        self.assertEqual(2, self.loads)
+        self.assertEqual([Resource('layer', 'web')], index.resources_of_kind('layer'))
+
+    async def test_invalidate_discards_the_refresh_in_progress(self):
+        gate = asyncio.Event()
+
+        async def load_resources():
+            self.loads += 1
+            resource_ids = list(self.resource_ids)
+            if self.loads == 1:
+                await gate.wait()
+            for resource_id in resource_ids:
+                yield resource_id
+
+        index = ResourceIndex(load_resources)
+        lookup = asyncio.ensure_future(index.ensure_fresh())
+        while self.loads == 0:
+            await asyncio.sleep(0)
+        # A policy load creates a resource while the first enumeration is in progress
+        self.resource_ids.append('test:layer:web')
+        index.invalidate()
+        gate.set()
+
+        await lookup
+        self.assertEqual(2, self.loads)
+        self.assertTrue(index.is_fresh)
+        self.assertEqual([Resource('layer', 'web')], index.resources_of_kind('layer'))
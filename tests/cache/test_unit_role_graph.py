@@ -0,0 +1,57 @@
+from unittest import IsolatedAsyncioTestCase
+
+from conjur_api.cache import RoleGraph
+
+
+class RoleGraphTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.memberships = {
+            'acct:user:alice': ['acct:group:devs'],
+            'acct:user:bob': ['acct:group:ops'],
+            'acct:group:devs': ['acct:group:staff'],
+            'acct:group:ops': ['acct:group:staff', 'acct:group:devs'],
+            'acct:group:staff': [],
+        }
+        self.loaded = []
+
+    def create_graph(self):
+        async def load_role_ids():
+            for role_id in list(self.memberships):
+                yield role_id
+
+        async def load_direct_memberships(role_ids):
+            self.loaded.append(list(role_ids))
+            return [self.memberships[role_id] for role_id in role_ids]
+
+        return RoleGraph('acct', load_role_ids, load_direct_memberships)
+
+    async def test_transitive_queries(self):
+        graph = self.create_graph()
+        await graph.refresh()
+
+        self.assertEqual(5, len(graph))
+        self.assertEqual({'acct:user:bob', 'acct:group:ops', 'acct:group:devs', 'acct:group:staff'},
+                         graph.memberships('user:bob'))
+        self.assertEqual({'acct:group:devs', 'acct:user:alice', 'acct:group:ops', 'acct:user:bob'},
+                         graph.members('acct:group:devs'))
+        self.assertTrue(graph.is_member('user:alice', 'group:staff'))
+        self.assertTrue(graph.is_member('user:alice', 'user:alice'))
+        self.assertFalse(graph.is_member('user:alice', 'group:ops'))
+        self.assertFalse(graph.is_member('user:unknown', 'group:staff'))
+        self.assertEqual({'acct:group:staff', 'acct:group:devs'}, graph.direct_memberships('group:ops'))
+        self.assertIn('group:staff', graph)
+
+    async def test_refresh_roles_patches_memberships(self):
+        graph = self.create_graph()
+        await graph.refresh()
+        self.assertTrue(graph.is_member('user:bob', 'group:devs'))
+
+        self.memberships['acct:group:ops'] = ['acct:group:staff']
+        self.memberships['acct:user:carol'] = ['acct:group:ops']
+        await graph.refresh_roles(['group:ops', 'user:carol'])
+
+        self.assertEqual(['acct:group:ops', 'acct:user:carol'], self.loaded[-1])
+        self.assertFalse(graph.is_member('user:bob', 'group:devs'))
+        self.assertEqual({'acct:group:ops', 'acct:user:bob', 'acct:user:carol'}, graph.members('group:ops'))
+        self.assertTrue(graph.is_member('user:carol', 'group:staff'))
@@ -0,0 +1,48 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from conjur_api.cache import TTLCache
+from conjur_api.errors.errors import InvalidFormatException
+
+
+class TTLCacheTest(TestCase):
+
+    @patch('conjur_api.cache.ttl_cache.time.monotonic')
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        cache = TTLCache(ttl_seconds=10)
+        cache.set('key', False)
+
+        mock_monotonic.return_value = 109
+        self.assertIs(False, cache.get('key'))
+        self.assertIn('key', cache)
+
+        mock_monotonic.return_value = 110
+        self.assertIsNone(cache.get('key'))
+        self.assertNotIn('key', cache)
+        self.assertEqual(0, len(cache))
+
+    def test_oldest_entry_is_evicted_when_full(self):
+        cache = TTLCache(ttl_seconds=10, max_size=2)
+        cache.set('one', 1)
+        cache.set('two', 2)
+        cache.set('three', 3)
+
+        self.assertNotIn('one', cache)
+        self.assertEqual(2, cache.get('two'))
+        self.assertEqual(3, cache.get('three'))
+
+    def test_rejects_a_max_size_that_is_not_positive(self):
+        for max_size in (0, -1, 1.5):
+            with self.assertRaises(InvalidFormatException):
+                TTLCache(ttl_seconds=10, max_size=max_size)
+
+    def test_invalidate_and_clear(self):
+        cache = TTLCache(ttl_seconds=10)
+        cache.set('one', 1)
+        cache.set('two', 2)
+
+        cache.invalidate('one')
+        self.assertNotIn('one', cache)
+        cache.clear()
+        self.assertEqual(0, len(cache))
@@ -12,6 +12,10 @@ class Container:
         await asyncio.sleep(0.0001)
         return "Run successfully"
 
+    async def async_func_with_kwargs(self, value, suffix=""):
+        await asyncio.sleep(0.0001)
+        return f"{value}{suffix}"
+
 
 class AllowSyncModeDecoratorTest(TestCase):
 
@@ -22,3 +26,7 @@ class AllowSyncModeDecoratorTest(TestCase):
     def test_async_function_decoration(self):
         c = Container(True)
         self.assertEqual("Run successfully", asyncio.run(c.async_func()))
+
+    def test_sync_function_passes_keyword_arguments(self):
+        c = Container(False)
+        self.assertEqual("Run successfully", c.async_func_with_kwargs("Run", suffix=" successfully"))
@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import contextmanager
+from unittest import IsolatedAsyncioTestCase
+
+from conjur_api.instrumentation import RequestHooks
+from conjur_api.instrumentation.request_hooks import active_request_hooks
+from conjur_api.utils.decorators import bind_request_hooks
+
+
+class ContextHooks(RequestHooks):
+    def __init__(self):
+        self.calls = []
+
+    def call_context(self, method):
+        @contextmanager
+        def context():
+            self.calls.append(('enter', method))
+            try:
+                yield
+            finally:
+                self.calls.append(('exit', method))
+
+        return context()
+
+
+class FailingContextHooks(RequestHooks):
+    def call_context(self, method):
+        raise RuntimeError('hooks must not break calls')
+
+
+@bind_request_hooks()
+class Container:
+    def __init__(self, hooks):
+        self._request_hooks = hooks
+
+    async def public_func(self):
+        await asyncio.sleep(0)
+        return active_request_hooks()
+
+    async def public_generator(self):
+        for _ in range(2):
+            await asyncio.sleep(0)
+            yield active_request_hooks()
+
+    async def _private_func(self):
+        return active_request_hooks()
+
+
+class BindRequestHooksDecoratorTest(IsolatedAsyncioTestCase):
+
+    async def test_public_methods_see_the_hooks_of_their_instance(self):
+        first, second = Container(('first',)), Container(('second',))
+
+        self.assertEqual([('first',), ('second',)], await asyncio.gather(first.public_func(), second.public_func()))
+        self.assertEqual([('first',), ('first',)], [hooks async for hooks in first.public_generator()])
+        self.assertEqual((), active_request_hooks())
+
+    async def test_private_methods_are_not_bound(self):
+        self.assertEqual((), await Container(('hooks',))._private_func())
+
+    async def test_coroutine_calls_run_within_the_call_contexts_of_the_hooks(self):
+        hooks = ContextHooks()
+        container = Container((FailingContextHooks(), hooks))
+
+        self.assertEqual(container._request_hooks, await container.public_func())
+        self.assertEqual([('enter', 'public_func'), ('exit', 'public_func')], hooks.calls)
+
+        await container._private_func()
+        self.assertEqual(2, len(hooks.calls))
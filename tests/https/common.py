@@ -1,10 +1,11 @@
 class MockResponse:
-    def __init__(self, text: str, status: int):
+    def __init__(self, text: str, status: int, headers: dict = None):
         self._text = text
         self.status = status
+        self.headers = headers or {}
 
     async def read(self):
-        pass
+        return self._text.encode()
 
     async def text(self, encoding: str = 'utf-8'):
         return self._text
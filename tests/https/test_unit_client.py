@@ -1,13 +1,24 @@
 
+import asyncio
+import io
+import json
+import subprocess
+import sys
+import threading
 from datetime import datetime, timedelta
 from unittest import mock, IsolatedAsyncioTestCase
 from unittest.mock import PropertyMock, mock_open, patch
 
-from conjur_api.errors.errors import HttpError, HttpStatusError
+from aiohttp import ClientResponseError
+
+from conjur_api.errors.errors import BatchOperationException, DependencyFailedException, HttpError, \
+    HttpStatusError, InvalidFormatException, MissingRequiredParameterException
 
 from conjur_api.client import Client
 from conjur_api.http.api import Api
-from conjur_api.models import SslVerificationMode, CredentialsData
+from conjur_api.http.endpoints import ConjurEndpoint
+from conjur_api.instrumentation import RequestHooks
+from conjur_api.models import SslVerificationMode, CredentialsData, PolicyMode
 from conjur_api.models.general.conjur_connection_info import ConjurConnectionInfo
 from conjur_api.models.general.proxy_params import ProxyParams
 from conjur_api.models.general.resource import Resource
@@ -19,6 +30,8 @@ from conjur_api.models.ssl.ssl_verification_metadata import SslVerificationMetad
 from conjur_api.providers.authn_authentication_strategy import AuthnAuthenticationStrategy
 from conjur_api.providers.oidc_authentication_strategy import OidcAuthenticationStrategy
 from conjur_api.providers.simple_credentials_provider import SimpleCredentialsProvider
+from conjur_api.wrappers import http_wrapper
+from conjur_api.wrappers.http_wrapper import HttpVerb
 from conjur_api.wrappers.http_response import HttpResponse
 from tests.https.test_unit_http import MockResponse
 
@@ -59,6 +72,36 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.client._api.api_token_expiration = datetime.now() + timedelta(days=1)
         self.oidc_client._api.api_token_expiration = datetime.now() + timedelta(days=1)
 
+    def test_client_construction_leaves_the_logging_configuration_alone(self):
+        with patch('logging.basicConfig') as mock_basic_config:
+            Client(self.conjur_data, authn_strategy=self.authn_provider)
+            mock_basic_config.assert_not_called()
+
+            Client(self.conjur_data, authn_strategy=self.authn_provider, debug=True)
+            mock_basic_config.assert_called_once()
+
+    def test_client_construction_does_not_import_the_transport(self):
+        code = "import sys\n" \
+               "import conjur_api\n" \
+               "assert 'conjur_api.models' not in sys.modules\n" \
+               "from conjur_api.models import ConjurConnectionInfo\n" \
+               "conjur_api.Client(ConjurConnectionInfo('https://conjur', 'account'))\n" \
+               "print(','.join(name for name in ('aiohttp', 'async_timeout', 'urllib3') if name in sys.modules))"
+
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, check=True, text=True).stdout
+
+        self.assertEqual('', output.strip())
+
+    def test_star_import_binds_the_public_names(self):
+        namespace = {}
+        exec('from conjur_api import *', namespace)  # pylint: disable=exec-used
+
+        self.assertIs(Client, namespace['Client'])
+        for name in ('CredentialsProviderInterface', 'AuthenticationStrategyInterface', 'models', 'errors',
+                     'providers'):
+            self.assertIn(name, namespace)
+        self.assertNotIn('TYPE_CHECKING', namespace)
+
     async def test_client_login_invokes_api(self):
         with mock.patch('conjur_api.providers.authn_authentication_strategy.AuthnAuthenticationStrategy.login') as mock_api_login:
             await self.client.login()
@@ -82,6 +125,92 @@ class ClientTest(IsolatedAsyncioTestCase):
       self.assertTrue(exists_in_args('abcdefg', args))
       mock_invoke_endpoint.assert_called_once()
 
+    @patch('asyncio.sleep')
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_create_hosts_spreads_hosts_across_minted_tokens(self, mock_api_token,
+                                                                          mock_invoke_endpoint, mock_sleep):
+        mock_api_token.return_value = 'test_token'
+        used_tokens = {}
+
+        async def respond(*args, **kwargs):
+            endpoint = args[1]
+            if endpoint == ConjurEndpoint.HOST_FACTORY_TOKENS:
+                self.assertIn('count=2', args[3])
+                return HttpResponse(mock.MagicMock(), '[{"token": "t1"}, {"token": "t2"}]', b'')
+            if endpoint == ConjurEndpoint.HOST_FACTORY_REVOKE_TOKEN:
+                return HttpResponse(mock.MagicMock(), '', b'')
+            host_id = dict(pair.split('=') for pair in args[3].split('&'))['id']
+            used_tokens[host_id] = kwargs['api_token']
+            if host_id == 'bad':
+                raise HttpStatusError(status=422)
+            return HttpResponse(mock.MagicMock(), json.dumps({'api_key': f'key-{host_id}'}), b'')
+        mock_invoke_endpoint.side_effect = respond
+
+        token_data = CreateTokenData(host_factory='hf', days=1)
+        result = await self.client.create_hosts(
+            token_data, ['web-1', CreateHostData('web-2', 'ignored', {'env': 'prod'}), 'bad'], hosts_per_token=2)
+
+        self.assertEqual({'web-1': 'key-web-1', 'web-2': 'key-web-2'}, result.succeeded)
+        self.assertEqual(422, result.failed['bad'].status)
+        self.assertEqual({'web-1': 't1', 'web-2': 't2', 'bad': 't1'}, used_tokens)
+        revoked = [call.args[2]['token'] for call in mock_invoke_endpoint.call_args_list
+                   if call.args[1] == ConjurEndpoint.HOST_FACTORY_REVOKE_TOKEN]
+        self.assertCountEqual(['t1', 't2'], revoked)
+        self.assertEqual('hf', token_data.host_factory)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_host_factory_token_pool_mints_and_revokes_through_api(self, mock_api_token,
+                                                                                mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+
+        async def respond(*args, **kwargs):
+            if args[1] == ConjurEndpoint.HOST_FACTORY_TOKENS:
+                return HttpResponse(mock.MagicMock(), '[{"token": "t1"}, {"token": "t2"}]', b'')
+            if args[2]['token'] == 't2':
+                raise HttpStatusError(status=404)
+            return HttpResponse(mock.MagicMock(status=204), '', b'')
+        mock_invoke_endpoint.side_effect = respond
+
+        pool = self.client.create_host_factory_token_pool(size=2)
+        await pool.fill(['hf'])
+        self.assertIn(await pool.get_token('hf'), ['t1', 't2'])
+        self.assertIn('count=2', mock_invoke_endpoint.call_args_list[0].args[3])
+
+        result = await pool.revoke_all()
+        self.assertEqual({'t1': 204}, result.succeeded)
+        self.assertEqual(['t2'], list(result.failed))
+
+    @patch('asyncio.sleep')
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_request_hooks_see_every_attempt(self, mock_api_token, mock_invoke_request, mock_sleep):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_request.side_effect = [
+            HttpResponse(mock.MagicMock(status=503, raise_for_status=mock.MagicMock(
+                side_effect=ClientResponseError(mock.MagicMock(), (), status=503))), '', b''),
+            HttpResponse(mock.MagicMock(status=201), '', b''),
+            HttpResponse(mock.MagicMock(status=201), '', b''),
+        ]
+        events = []
+
+        class Hooks(RequestHooks):
+            def on_request_end(self, event):
+                events.append(event)
+
+        hooks = Hooks()
+        self.client.add_request_hooks(hooks)
+        await self.client.set_many({'one': 'secret'})
+
+        self.assertEqual([('SECRETS', 'POST', 1, 503), ('SECRETS', 'POST', 2, 201)],
+                         [(event.endpoint, event.verb, event.attempt, event.status) for event in events])
+        self.assertEqual(6, events[0].bytes_sent)
+
+        self.client.remove_request_hooks(hooks)
+        await self.client.set('one', 'secret')
+        self.assertEqual(2, len(events))
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_whoami_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -151,6 +280,37 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.assertTrue(exists_in_args('dummy-var', args) and exists_in_args('dummy-value', args))
         mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.utils.retry.asyncio.sleep')
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_set_many_reports_each_variable(self, mock_api_token, mock_invoke_endpoint, mock_sleep):
+        mock_api_token.return_value = 'test_token'
+        attempts = {}
+
+        async def respond(*args, **kwargs):
+            variable_id = args[2]['identifier']
+            attempts[variable_id] = attempts.get(variable_id, 0) + 1
+            if variable_id == 'flaky' and attempts[variable_id] == 1:
+                raise HttpStatusError(status=503)
+            if variable_id == 'forbidden':
+                raise HttpStatusError(status=403)
+            if variable_id == 'timed-out':
+                # The write may have landed, so it is not sent again
+                raise asyncio.TimeoutError()
+            return HttpResponse(201, '', 'OK')
+        mock_invoke_endpoint.side_effect = respond
+
+        result = await self.client.set_many({'one': 'a', 'flaky': 'b', 'forbidden': 'c', 'timed-out': 'd'},
+                                            concurrency=2)
+
+        self.assertCountEqual(['one', 'flaky'], result.succeeded)
+        self.assertCountEqual(['forbidden', 'timed-out'], result.failed)
+        self.assertEqual(403, result.failed['forbidden'].status)
+        self.assertFalse(result.ok)
+        self.assertEqual({'one': 1, 'flaky': 2, 'forbidden': 1, 'timed-out': 1}, attempts)
+        with self.assertRaises(BatchOperationException):
+            result.raise_for_failures()
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_load_policy_file_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -164,6 +324,149 @@ class ClientTest(IsolatedAsyncioTestCase):
             self.assertTrue(exists_in_args('test', args))
             mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_load_policy_file_streams_file_objects(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        policy = io.BytesIO(b'- !variable dummy-var')
+        await self.client.load_policy_file('test', policy)
+
+        args, _ = mock_invoke_endpoint.call_args
+        self.assertIs(policy, args[3])
+        self.assertEqual(0, policy.tell())
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_load_policy_file_opens_paths_without_reading(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        with patch('builtins.open', mock_open(read_data=b'- !variable dummy-var')) as mock_file:
+            await self.client.load_policy_file('test', 'my-policy.yml')
+
+            mock_file.assert_called_once_with('my-policy.yml', 'rb')
+            mock_file.return_value.read.assert_not_called()
+            args, _ = mock_invoke_endpoint.call_args
+            self.assertIs(mock_file.return_value, args[3])
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_load_policy_file_opens_files_off_the_event_loop(self, mock_api_token,
+                                                                          mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        loop_thread = threading.get_ident()
+        opened_in = []
+
+        def opener(*args):
+            opened_in.append(threading.get_ident())
+            return io.BytesIO(b'- !variable dummy-var')
+
+        with patch('builtins.open', side_effect=opener):
+            await self.client.load_policy_file('test', 'my-policy.yml')
+
+        self.assertEqual(1, len(opened_in))
+        self.assertNotEqual(loop_thread, opened_in[0])
+        self.assertTrue(mock_invoke_endpoint.call_args.args[3].closed)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_in_memory_policies_use_the_policy_verbs(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        self.client._resource_index = mock.MagicMock()
+        policy = '- !variable dummy-var'
+
+        with patch('builtins.open') as mock_file:
+            await self.client.load_policy('root', policy)
+            await self.client.replace_policy('root', policy.encode())
+            await self.client.update_policy('root', policy)
+            mock_file.assert_not_called()
+
+        calls = mock_invoke_endpoint.call_args_list
+        self.assertEqual([HttpVerb.POST, HttpVerb.PUT, HttpVerb.PATCH], [call.args[0] for call in calls])
+        self.assertEqual([policy, policy.encode(), policy], [call.args[3] for call in calls])
+        self.assertTrue(all(call.args[2]['identifier'] == 'root' for call in calls))
+        self.assertEqual(3, self.client._resource_index.invalidate.call_count)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_policy_compression_is_opt_in(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        await self.client.load_policy('root', '- !variable dummy-var')
+        self.assertFalse(mock_invoke_endpoint.call_args.kwargs['compress'])
+
+        self.client.enable_policy_compression()
+        await self.client.update_policy('root', '- !variable dummy-var')
+        self.assertTrue(mock_invoke_endpoint.call_args.kwargs['compress'])
+
+        self.client.disable_policy_compression()
+        await self.client.replace_policy('root', '- !variable dummy-var')
+        self.assertFalse(mock_invoke_endpoint.call_args.kwargs['compress'])
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_apply_policies_follows_dependencies(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        applied = []
+
+        async def respond(*args, **kwargs):
+            branch = args[2]['identifier']
+            applied.append((branch, args[0], args[3]))
+            if branch == 'broken':
+                raise HttpStatusError(status=422)
+            return HttpResponse(mock.MagicMock(), '{"version": 1}', b'')
+        mock_invoke_endpoint.side_effect = respond
+        self.client._resource_index = mock.MagicMock()
+
+        result = await self.client.apply_policies(
+            [('root/apps', b'- !layer', 'update'),
+             ('root', b'- !policy apps', PolicyMode.LOAD),
+             ('broken', b'- !bad', 'replace'),
+             ('broken/child', b'- !host', 'load')],
+            depends_on={'root/apps': ['root'], 'broken/child': ['broken']},
+            concurrency=1)
+
+        self.assertEqual([('root', HttpVerb.POST, b'- !policy apps'),
+                          ('broken', HttpVerb.PUT, b'- !bad'),
+                          ('root/apps', HttpVerb.PATCH, b'- !layer')], applied)
+        self.assertEqual({'root': {'version': 1}, 'root/apps': {'version': 1}}, result.succeeded)
+        self.assertEqual(422, result.failed['broken'].status)
+        self.assertIsInstance(result.failed['broken/child'], DependencyFailedException)
+        self.assertCountEqual(['root', 'root/apps', 'broken'], result.durations)
+        self.client._resource_index.invalidate.assert_called_once()
+
+    async def test_client_apply_policies_validates_branches_and_modes(self):
+        with self.assertRaises(InvalidFormatException):
+            await self.client.apply_policies([('root', b'', 'load'), ('root', b'', 'update')])
+        with self.assertRaises(InvalidFormatException):
+            await self.client.apply_policies([('root', b'', 'merge')])
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_set_streams_async_iterables(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+
+        async def chunks():
+            yield b'sec'
+            yield b'ret'
+        value = chunks()
+        await self.client.set('dummy-var', value)
+
+        args, _ = mock_invoke_endpoint.call_args
+        self.assertIs(value, args[3])
+
+    @patch('asyncio.sleep')
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_set_many_does_not_retry_streamed_values(self, mock_api_token, mock_invoke_endpoint,
+                                                                  mock_sleep):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.side_effect = HttpStatusError(status=503)
+
+        result = await self.client.set_many({'streamed': io.BytesIO(b'secret'), 'text': 'secret'})
+
+        self.assertCountEqual(['streamed', 'text'], result.failed)
+        sent = [call.args[2]['identifier'] for call in mock_invoke_endpoint.call_args_list]
+        self.assertEqual(1, sent.count('streamed'))
+        self.assertEqual(3, sent.count('text'))
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_replace_policy_file_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -258,6 +561,39 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.assertIn('host:myHost', kwargs.get('query').get('search'))
         mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_resource_index_answers_lookups_locally(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.side_effect = [
+            HttpResponse(200, '[{"id":"test:host:myHost"},{"id":"test:variable:myHost"}]', 'OK'),
+            HttpResponse(200, '[]', 'OK'),
+        ]
+        self.client.enable_resource_index()
+
+        resources = await self.client.find_resources_by_identifier('myHost')
+        self.assertEqual(['host:myHost', 'variable:myHost'], sorted(resource.full_id() for resource in resources))
+        self.assertTrue(await self.client.resource_exists('host', 'myHost'))
+        self.assertFalse(await self.client.resource_exists('user', 'myHost'))
+        with self.assertRaises(MissingRequiredParameterException):
+            await self.client.find_resource_by_identifier('myHost')
+
+        # A single paginated enumeration served all the lookups
+        self.assertEqual(2, mock_invoke_endpoint.call_count)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_load_policy_invalidates_resource_index(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.return_value = HttpResponse(200, '{}', 'OK')
+        index = self.client.enable_resource_index()
+        await index.refresh()
+
+        with patch('builtins.open', mock_open(read_data='- !variable dummy-var')):
+            await self.client.load_policy_file('test', 'my-policy.yml')
+
+        self.assertFalse(index.is_loaded)
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_list_members_of_role_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -273,6 +609,46 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.assertTrue(exists_in_args('dummy-var', args))
         mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_iter_members_of_role_walks_pages(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.side_effect = [
+            HttpResponse(200, '[{"member":"test:user:one"},{"member":"test:user:two"}]', 'OK'),
+            HttpResponse(200, '[{"member":"test:user:three"}]', 'OK'),
+            HttpResponse(200, '[]', 'OK'),
+        ]
+        data = ListMembersOfData(kind='user', identifier='admins')
+        data.set_resource(Resource(kind='group', identifier='admins'))
+
+        members = [member async for member in self.client.iter_members_of_role(data, page_size=2)]
+
+        self.assertEqual(['test:user:one', 'test:user:two', 'test:user:three'], members)
+        args, kwargs = mock_invoke_endpoint.call_args
+        self.assertEqual(ConjurEndpoint.ROLES_MEMBERS_OF, args[1])
+        self.assertTrue(exists_in_args('admins', args))
+        # An offset of 0 is the server default, so it is omitted from the first query
+        self.assertEqual([{'kind': 'user', 'limit': 2}, {'kind': 'user', 'limit': 2, 'offset': 2},
+                          {'kind': 'user', 'limit': 2, 'offset': 3}],
+                         [kwargs.get('query') for _, kwargs in mock_invoke_endpoint.call_args_list])
+        # The caller's parameters are left untouched
+        self.assertIsNone(data.limit)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_count_members_of_role_invokes_api(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.return_value = HttpResponse(200, '{"count": 42}', 'OK')
+        data = ListMembersOfData(identifier='admins', limit=10, inspect=True)
+        data.set_resource(Resource(kind='group', identifier='admins'))
+
+        self.assertEqual(42, await self.client.count_members_of_role(data))
+
+        args, kwargs = mock_invoke_endpoint.call_args
+        self.assertEqual({'count': 'true'}, kwargs.get('query'))
+        self.assertEqual('proxy.com', kwargs.get('proxy_params').proxy_url)
+        mock_invoke_endpoint.assert_called_once()
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_list_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -285,6 +661,116 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.assertIn('host', kwargs.get('query').get('type'))
         mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_iter_resources_walks_pages(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.side_effect = [
+            HttpResponse(200, '[{"id":"test:host:one"},{"id":"test:host:two"}]', 'OK'),
+            HttpResponse(200, '[{"id":"test:host:three"}]', 'OK'),
+            HttpResponse(200, '[]', 'OK'),
+        ]
+
+        resources = [resource async for resource in self.client.iter_resources(kind='host', page_size=2)]
+
+        self.assertEqual(['test:host:one', 'test:host:two', 'test:host:three'], resources)
+        queries = [kwargs.get('query') for _, kwargs in mock_invoke_endpoint.call_args_list]
+        self.assertEqual([{'kind': 'host', 'limit': 2, 'offset': 0},
+                          {'kind': 'host', 'limit': 2, 'offset': 2},
+                          {'kind': 'host', 'limit': 2, 'offset': 3}], queries)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_iter_resources_stops_fetching_when_caller_breaks(self, mock_api_token,
+                                                                           mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.return_value = HttpResponse(200, '[{"id":"test:host:one"}]', 'OK')
+
+        iterator = self.client.iter_resources(page_size=1)
+        async for _ in iterator:
+            break
+        await iterator.aclose()
+
+        self.assertLessEqual(mock_invoke_endpoint.call_count, 2)
+
+    async def test_client_iter_resources_rejects_invalid_page_size(self):
+        with self.assertRaises(InvalidFormatException):
+            async for _ in self.client.iter_resources(page_size=0):
+                pass
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_count_resources_invokes_api(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.return_value = HttpResponse(200, '{"count": 12}', 'OK')
+
+        count = await self.client.count_resources(kind='variable', search='db')
+
+        args, kwargs = mock_invoke_endpoint.call_args
+        self.assertEqual(12, count)
+        self.assertEqual({'kind': 'variable', 'search': 'db', 'count': 'true'}, kwargs.get('query'))
+        self.assertEqual('proxy.com', kwargs.get('proxy_params').proxy_url)
+        mock_invoke_endpoint.assert_called_once()
+
+    @staticmethod
+    def _paged_resources_response(total):
+        async def respond(*args, **kwargs):
+            query = kwargs.get('query')
+            if query.get('count'):
+                return HttpResponse(200, f'{{"count": {total}}}', 'OK')
+            offset, limit = query['offset'], query['limit']
+            # Let earlier pages arrive last to exercise ordering
+            await asyncio.sleep(0.001 * (total - offset))
+            page = [{'id': f'test:host:{i}'} for i in range(offset, min(offset + limit, total))]
+            return HttpResponse(200, json.dumps(page), 'OK')
+        return respond
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_iter_resources_concurrently_keeps_order(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.side_effect = self._paged_resources_response(7)
+
+        resources = [resource async for resource in
+                     self.client.iter_resources_concurrently(kind='host', page_size=2, concurrency=3)]
+
+        self.assertEqual([f'test:host:{i}' for i in range(7)], resources)
+        # One count request and four page requests
+        self.assertEqual(5, mock_invoke_endpoint.call_count)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_iter_resources_concurrently_unordered(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        mock_invoke_endpoint.side_effect = self._paged_resources_response(7)
+
+        resources = [resource async for resource in
+                     self.client.iter_resources_concurrently(page_size=2, concurrency=4, ordered=False)]
+
+        self.assertCountEqual([f'test:host:{i}' for i in range(7)], resources)
+        self.assertEqual('test:host:6', resources[0])
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_iter_resources_concurrently_shares_a_pooled_session(self, mock_api_token,
+                                                                               mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        respond = self._paged_resources_response(7)
+        sessions = []
+
+        async def record_session(*args, **kwargs):
+            sessions.append(http_wrapper._pooled_session.get())
+            return await respond(*args, **kwargs)
+        mock_invoke_endpoint.side_effect = record_session
+
+        async for _ in self.client.iter_resources_concurrently(page_size=2, concurrency=2):
+            # The consumer does not see the pooled session, so it is not left behind by the break
+            self.assertIsNone(http_wrapper._pooled_session.get())
+            break
+
+        self.assertIsNotNone(sessions[0])
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_get_resource_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -311,6 +797,64 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.assertTrue(exists_in_args('dummy', args))
         mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_resources_exist_checks_each_id(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+
+        async def respond(*args, **kwargs):
+            if args[2]['identifier'] == 'missing':
+                raise HttpStatusError(status=404)
+            return HttpResponse(200, '', 'OK')
+        mock_invoke_endpoint.side_effect = respond
+
+        exists = await self.client.resources_exist(['host:present', 'test:variable:missing'])
+
+        self.assertEqual({'host:present': True, 'test:variable:missing': False}, exists)
+        self.assertEqual(2, mock_invoke_endpoint.call_count)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_resources_exist_uses_list_pass_when_cheaper(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        listed = [{'id': f'test:variable:var-{i}'} for i in range(150)]
+
+        async def respond(*args, **kwargs):
+            query = kwargs.get('query')
+            if query is None:
+                # Individual check of an ID missing from the list
+                raise HttpStatusError(status=404)
+            if query.get('count'):
+                return HttpResponse(200, '{"count": 150}', 'OK')
+            page = listed[query['offset']:query['offset'] + query['limit']]
+            return HttpResponse(200, json.dumps(page), 'OK')
+        mock_invoke_endpoint.side_effect = respond
+
+        resource_ids = [f'variable:var-{i}' for i in range(120)] + ['variable:unknown']
+        exists = await self.client.resources_exist(resource_ids)
+
+        self.assertEqual(resource_ids, list(exists))
+        self.assertTrue(all(exists[f'variable:var-{i}'] for i in range(120)))
+        self.assertFalse(exists['variable:unknown'])
+        # One count, two pages and one individual check
+        self.assertEqual(4, mock_invoke_endpoint.call_count)
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_roles_exist_invokes_api(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+
+        async def respond(*args, **kwargs):
+            if args[2]['identifier'] == 'bob':
+                raise HttpStatusError(status=404)
+            return HttpResponse(200, '', 'OK')
+        mock_invoke_endpoint.side_effect = respond
+
+        exists = await self.client.roles_exist(['user:alice', 'user:bob', 'group:admins'])
+
+        self.assertEqual({'user:alice': True, 'user:bob': False, 'group:admins': True}, exists)
+        self.assertTrue(all(call.args[1] == ConjurEndpoint.ROLE for call in mock_invoke_endpoint.call_args_list))
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_get_many_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -383,6 +927,30 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.assertTrue(exists_in_args('all', args))
         mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_build_role_graph_fetches_direct_memberships(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        roles = {'user': ['test:user:alice'], 'group': ['test:group:devs', 'test:group:staff']}
+        memberships = {'alice': ['test:group:devs'], 'devs': ['test:group:staff'], 'staff': []}
+
+        async def respond(*args, **kwargs):
+            if args[1] == ConjurEndpoint.ROLES_MEMBERSHIPS:
+                self.assertEqual('memberships', args[2]['membership'])
+                return HttpResponse(200, json.dumps([{'role': role} for role in memberships[args[2]['identifier']]]),
+                                    'OK')
+            kind_roles = roles.get(kwargs.get('query')['kind'], [])
+            if kwargs.get('query').get('count'):
+                return HttpResponse(200, json.dumps({'count': len(kind_roles)}), 'OK')
+            return HttpResponse(200, json.dumps([{'id': role_id} for role_id in kind_roles]), 'OK')
+        mock_invoke_endpoint.side_effect = respond
+
+        graph = await self.client.build_role_graph()
+
+        self.assertEqual(3, len(graph))
+        self.assertTrue(graph.is_member('user:alice', 'group:staff'))
+        self.assertEqual({'test:user:alice', 'test:group:devs', 'test:group:staff'}, graph.members('group:staff'))
+
     @patch('conjur_api.http.api.invoke_endpoint')
     @patch.object(Api, '_api_token', new_callable=PropertyMock)
     async def test_client_check_privilege_invokes_api(self, mock_api_token, mock_invoke_endpoint):
@@ -398,6 +966,50 @@ class ClientTest(IsolatedAsyncioTestCase):
         self.assertTrue(exists_in_args('dummy3', args))
         mock_invoke_endpoint.assert_called_once()
 
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_check_privileges_keeps_order_and_deduplicates(self, mock_api_token,
+                                                                         mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+
+        sessions = []
+
+        async def respond(*args, **kwargs):
+            sessions.append(http_wrapper._pooled_session.get())
+            if args[2]['identifier'] == 'denied':
+                raise HttpStatusError(status=404)
+            return mock.MagicMock()
+        mock_invoke_endpoint.side_effect = respond
+
+        decisions = await self.client.check_privileges([
+            ('variable', 'allowed', 'read'),
+            ('variable', 'denied', 'read', 'user:alice'),
+            ('variable', 'allowed', 'read'),
+        ], concurrency=2)
+
+        self.assertEqual([True, False, True], decisions)
+        self.assertEqual(2, mock_invoke_endpoint.call_count)
+        self.assertIsNotNone(sessions[0])
+        self.assertIs(sessions[0], sessions[1])
+
+    @patch('conjur_api.http.api.invoke_endpoint')
+    @patch.object(Api, '_api_token', new_callable=PropertyMock)
+    async def test_client_privilege_cache_serves_repeated_checks(self, mock_api_token, mock_invoke_endpoint):
+        mock_api_token.return_value = 'test_token'
+        self.client.enable_privilege_cache()
+
+        self.assertTrue(await self.client.check_privilege('variable', 'dummy', 'read'))
+        self.assertEqual([True, True], await self.client.check_privileges(
+            [('variable', 'dummy', 'read'), ('variable', 'dummy', 'read', None)]))
+        self.assertEqual(1, mock_invoke_endpoint.call_count)
+
+        with patch('builtins.open', mock_open(read_data='- !variable dummy')):
+            await self.client.update_policy_file('root', 'my-policy.yml')
+        await self.client.check_privilege('variable', 'dummy', 'read')
+
+        # The policy load and a new privilege check after the cache was cleared
+        self.assertEqual(3, mock_invoke_endpoint.call_count)
+
     @patch('aiohttp.ClientSession.request')
     async def test_client_enable_valid_authenticator(self, mock_request):
         mock_request.return_value = MockResponse('', 204)
@@ -1,23 +1,55 @@
 import asyncio
+import gzip
+import logging
 import ssl
 import unittest
 
 from enum import Enum
-from unittest.mock import patch, call
+from unittest.mock import MagicMock, patch, call
 
+import aiohttp
 from aiounittest import AsyncTestCase
-from aiohttp import ClientSSLError
+from aiohttp import ClientResponseError, ClientSSLError, web
+from aiohttp.test_utils import TestServer
 from aiohttp.client_reqrep import ConnectionKey
 from asynctest import patch
 
 from aiohttp import BasicAuth
 
 from conjur_api.models import SslVerificationMode, SslVerificationMetadata, ProxyParams
-from conjur_api.errors.errors import HttpSslError
-from conjur_api.wrappers.http_wrapper import HttpVerb, invoke_endpoint
+from conjur_api.errors.errors import HttpSslError, HttpStatusError
+from conjur_api.wrappers import http_wrapper
+from conjur_api.instrumentation import MetricsHooks, RequestHooks
+from conjur_api.instrumentation.request_hooks import use_request_hooks
+from conjur_api.wrappers.http_wrapper import HttpVerb, invoke_endpoint, pooled_context, pooled_session
 from tests.https.common import MockResponse
 
 
+class RecordingHooks(RequestHooks):
+    def __init__(self):
+        self.calls = []
+
+    def on_request_start(self, event):
+        self.calls.append(('start', event))
+
+    def on_request_end(self, event):
+        self.calls.append(('end', event))
+
+    def on_error(self, event):
+        self.calls.append(('error', event))
+
+
+class MockStatusResponse(MockResponse):
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise ClientResponseError(MagicMock(), (), status=self.status, message='Failed')
+
+
+class FailingHooks(RequestHooks):
+    def on_request_start(self, event):
+        raise RuntimeError('hooks must not break requests')
+
+
 class HttpVerbTest(unittest.TestCase):
     def test_http_verb_has_all_the_verbs_expected(self):
         self.assertTrue(HttpVerb.GET)
@@ -238,3 +270,198 @@ class HttpInvokeEndpointTest(AsyncTestCase):
         response = await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None)
 
         self.assertEqual(response.json, {'a': 123})
+
+    @patch('aiohttp.ClientSession.request')
+    async def test_invoke_endpoint_compresses_non_empty_bodies_on_request(self, mock_request):
+        mock_request.return_value = MockResponse('', 200)
+        await invoke_endpoint(HttpVerb.POST, self.MockEndpoint.NO_PARAMS, {}, 'policy', compress=True)
+        self.assertEqual('gzip', mock_request.call_args.kwargs['compress'])
+
+        await invoke_endpoint(HttpVerb.POST, self.MockEndpoint.NO_PARAMS, {}, '', compress=True)
+        self.assertNotIn('compress', mock_request.call_args.kwargs)
+
+    @patch('aiohttp.ClientSession.request')
+    async def test_invoke_endpoint_reports_requests_to_hooks(self, mock_request):
+        hooks = RecordingHooks()
+        mock_request.side_effect = [MockResponse('{"a": 123}', 200), MockStatusResponse('missing', 404)]
+
+        with use_request_hooks((FailingHooks(), hooks)):
+            await invoke_endpoint(HttpVerb.POST, self.MockEndpoint.NO_PARAMS, {}, 'body')
+            with self.assertRaises(HttpStatusError):
+                await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, {})
+
+        self.assertEqual(['start', 'end', 'start', 'error', 'end'], [call for call, _ in hooks.calls])
+        ok, failed = hooks.calls[1][1], hooks.calls[3][1]
+        self.assertEqual(('NO_PARAMS', 'POST', 1, 200, 4, 10),
+                         (ok.endpoint, ok.verb, ok.attempt, ok.status, ok.bytes_sent, ok.bytes_received))
+        self.assertIsNotNone(ok.duration)
+        self.assertIsNone(ok.error)
+        self.assertEqual(('GET', 404), (failed.verb, failed.status))
+        self.assertIsInstance(failed.error, HttpStatusError)
+        self.assertIs(ok, mock_request.call_args_list[0].kwargs['trace_request_ctx'])
+
+    async def test_invoke_endpoint_reports_cancelled_requests_to_hooks(self):
+        async def hanging(_request):
+            await asyncio.sleep(10)
+            return web.Response(text='ok')
+
+        app = web.Application()
+        app.router.add_get('/no/params', hanging)
+        hooks, metrics = RecordingHooks(), MetricsHooks()
+        async with TestServer(app) as server:
+            with use_request_hooks((hooks, metrics)):
+                request = asyncio.ensure_future(invoke_endpoint(HttpVerb.GET, self.MockEndpoint.WITH_URL,
+                                                                {'url': str(server.make_url('')).rstrip('/')}))
+                while metrics.in_flight == 0:
+                    await asyncio.sleep(0.001)
+                request.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await request
+
+        self.assertEqual(['start', 'error', 'end'], [call for call, _ in hooks.calls])
+        self.assertIsInstance(hooks.calls[2][1].error, asyncio.CancelledError)
+        self.assertIsNotNone(hooks.calls[2][1].duration)
+        self.assertEqual(0, metrics.in_flight)
+
+    async def test_invoke_endpoint_reports_the_received_size_before_decoding(self):
+        body = b'{"a": 123}' * 100
+        compressed = gzip.compress(body)
+
+        async def compressed_with_length(_request):
+            return web.Response(body=compressed, headers={'Content-Encoding': 'gzip'})
+
+        async def compressed_chunked(_request):
+            response = web.StreamResponse(headers={'Content-Encoding': 'gzip'})
+            response.enable_chunked_encoding()
+            await response.prepare(_request)
+            await response.write(compressed)
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_get('/no/params', compressed_with_length)
+        app.router.add_post('/no/params', compressed_chunked)
+        hooks = RecordingHooks()
+        async with TestServer(app) as server:
+            params = {'url': str(server.make_url('')).rstrip('/')}
+            with use_request_hooks((hooks,)):
+                response = await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.WITH_URL, params)
+                await invoke_endpoint(HttpVerb.POST, self.MockEndpoint.WITH_URL, params, 'policy', compress=True)
+
+        self.assertEqual(body, response.content)
+        sent_and_received = [(event.bytes_sent, event.bytes_received) for call, event in hooks.calls if call == 'end']
+        # The compressed request body is sized by aiohttp only, and the chunked response is not announced
+        self.assertEqual([(0, len(compressed)), (None, None)], sent_and_received)
+
+    @patch('aiohttp.ClientSession.request')
+    async def test_invoke_endpoint_formats_no_debug_log_when_debug_is_disabled(self, mock_request):
+        mock_request.return_value = MockResponse('', 200)
+        headers = MagicMock()
+        with patch('logging.debug') as mock_debug, patch.object(logging.getLogger(), 'level', logging.WARNING):
+            await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, {}, headers=headers)
+
+        self.assertFalse([args for args, _ in mock_debug.call_args_list if args[0].startswith('Invoke endpoint')])
+        headers.__str__.assert_not_called()
+
+    @patch('aiohttp.ClientSession.request')
+    async def test_invoke_endpoint_debug_log_is_lazy(self, mock_request):
+        mock_request.return_value = MockResponse('', 200)
+        with self.assertLogs(level='DEBUG') as logs:
+            await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, {}, api_token='secret-token')
+
+        self.assertIn("Invoke endpoint. Verb: 'GET', Endpoint: 'NO_PARAMS'", logs.output[0])
+        self.assertIn("using API token: 'True'", logs.output[0])
+        self.assertNotIn('secret-token', ''.join(logs.output))
+
+    @patch('aiohttp.ClientSession.request')
+    async def test_invoke_endpoint_without_hooks_sends_no_trace_context(self, mock_request):
+        mock_request.return_value = MockResponse('', 200)
+        await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, {})
+        self.assertNotIn('trace_request_ctx', mock_request.call_args.kwargs)
+
+    async def test_hooks_report_connection_reuse(self):
+        app = web.Application()
+        app.router.add_get('/no/params', lambda request: web.Response(text='ok'))
+        hooks = RecordingHooks()
+        async with TestServer(app) as server:
+            with use_request_hooks((hooks,)):
+                async with pooled_session():
+                    for _ in range(2):
+                        await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.WITH_URL,
+                                              {'url': str(server.make_url('')).rstrip('/')})
+
+        self.assertEqual([False, True], [event.connection_reused for call, event in hooks.calls if call == 'end'])
+
+    async def test_hooks_report_request_phases(self):
+        app = web.Application()
+        app.router.add_get('/no/params', lambda request: web.Response(text='ok'))
+        hooks = RecordingHooks()
+        async with TestServer(app) as server:
+            with use_request_hooks((hooks,)):
+                async with pooled_session():
+                    for _ in range(2):
+                        await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.WITH_URL,
+                                              {'url': str(server.make_url('')).rstrip('/')})
+
+        first, second = [event.phases for call, event in hooks.calls if call == 'end']
+        self.assertEqual({'connect', 'wait', 'receive'}, set(first))
+        self.assertEqual({'wait', 'receive'}, set(second))
+        self.assertTrue(all(duration >= 0 for duration in [*first.values(), *second.values()]))
+
+    async def test_hooks_report_pool_usage(self):
+        async def slow(_request):
+            await asyncio.sleep(0.01)
+            return web.Response(text='ok')
+
+        app = web.Application()
+        app.router.add_get('/no/params', slow)
+        hooks = RecordingHooks()
+        async with TestServer(app) as server:
+            params = {'url': str(server.make_url('')).rstrip('/')}
+            with use_request_hooks((hooks,)):
+                await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.WITH_URL, params)
+                async with pooled_session(pool_size=2):
+                    await asyncio.gather(*(invoke_endpoint(HttpVerb.GET, self.MockEndpoint.WITH_URL, params)
+                                           for _ in range(3)))
+
+        self.assertEqual(1, sum('queue' in event.phases for call, event in hooks.calls if call == 'end'))
+        self.assertEqual([(2, 1), (2, 2), (2, 3), (None, None)],
+                         sorted(((event.pool_size, event.pool_in_flight) for call, event in hooks.calls
+                                 if call == 'end'), key=str))
+
+    @patch('aiohttp.ClientSession.request')
+    async def test_invoke_endpoint_reuses_pooled_session(self, mock_request):
+        mock_request.return_value = MockResponse('', 200)
+        with patch('aiohttp.ClientSession', wraps=aiohttp.ClientSession) as mock_session:
+            async with pooled_session():
+                await asyncio.gather(invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None),
+                                     invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None))
+                async with pooled_session():
+                    await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None)
+
+            self.assertEqual(1, mock_session.call_count)
+            self.assertEqual(3, mock_request.call_count)
+
+            await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None)
+            self.assertEqual(2, mock_session.call_count)
+
+    @patch('aiohttp.ClientSession.request')
+    async def test_invoke_endpoint_reuses_pooled_context_session(self, mock_request):
+        mock_request.return_value = MockResponse('', 200)
+        with patch('aiohttp.ClientSession', wraps=aiohttp.ClientSession) as mock_session:
+            async with pooled_context() as context:
+                await asyncio.gather(*(
+                    context.run(asyncio.ensure_future, invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None))
+                    for _ in range(2)))
+                self.assertEqual(1, mock_session.call_count)
+
+                # The current context is left untouched
+                await invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None)
+                self.assertEqual(2, mock_session.call_count)
+
+            async with pooled_session():
+                async with pooled_context() as context:
+                    await context.run(asyncio.ensure_future,
+                                      invoke_endpoint(HttpVerb.GET, self.MockEndpoint.NO_PARAMS, None))
+            self.assertEqual(3, mock_session.call_count)
+            self.assertEqual(4, mock_request.call_count)
@@ -0,0 +1,116 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import IsolatedAsyncioTestCase, mock
+from unittest.mock import patch
+
+from conjur_api.client import Client
+from conjur_api.instrumentation import MetricsHooks, render_prometheus
+from conjur_api.models import SslVerificationMode
+from conjur_api.models.general.conjur_connection_info import ConjurConnectionInfo
+from conjur_api.models.general.request_event import RequestEvent
+from conjur_api.wrappers.http_response import HttpResponse
+
+
+def request(hooks: MetricsHooks, endpoint='SECRETS', status=200, duration=0.02, attempt=1, pool=None, phases=None,
+            reused=None):
+    event = RequestEvent(endpoint, 'GET', attempt)
+    hooks.on_request_start(event)
+    event.status, event.duration, event.connection_reused = status, duration, reused
+    event.phases = phases or {}
+    if pool:
+        event.pool_size, event.pool_in_flight = pool
+    hooks.on_request_end(event)
+
+
+class MetricsHooksTest(unittest.TestCase):
+
+    def test_requests_are_counted_per_endpoint_and_status_in_cumulative_buckets(self):
+        hooks = MetricsHooks(buckets=(0.01, 0.1))
+        request(hooks, duration=0.005)
+        request(hooks, duration=0.1)
+        request(hooks, duration=3)
+        request(hooks, status=None, duration=0.05)
+
+        self.assertEqual([
+            {'endpoint': 'SECRETS', 'status': 200, 'count': 3, 'duration_sum': 3.105,
+             'duration_buckets': {0.01: 1, 0.1: 2, float('inf'): 3}},
+            {'endpoint': 'SECRETS', 'status': 0, 'count': 1, 'duration_sum': 0.05,
+             'duration_buckets': {0.01: 0, 0.1: 1, float('inf'): 1}},
+        ], hooks.snapshot()['requests'])
+
+    def test_phases_and_connections(self):
+        hooks = MetricsHooks(buckets=(0.01,))
+        request(hooks, phases={'connect': 0.02, 'wait': 0.005}, reused=False)
+        request(hooks, phases={'wait': 0.001}, reused=True)
+        request(hooks, phases={'wait': 0.001}, reused=True)
+
+        snapshot = hooks.snapshot()
+        self.assertEqual({'count': 1, 'duration_sum': 0.02, 'duration_buckets': {0.01: 0, float('inf'): 1}},
+                         snapshot['phases']['connect'])
+        self.assertEqual({0.01: 3, float('inf'): 3}, snapshot['phases']['wait']['duration_buckets'])
+        self.assertEqual({'new': 1, 'reused': 2}, snapshot['connections'])
+        self.assertIn('conjur_client_request_phase_duration_seconds_count{phase="connect"} 1\n',
+                      render_prometheus(snapshot))
+        self.assertIn('conjur_client_connections_total{reused="true"} 2\n', render_prometheus(snapshot))
+
+    def test_gauges_retries_caches_and_pool(self):
+        hooks = MetricsHooks()
+        hooks.on_request_start(RequestEvent('SECRETS', 'GET'))
+        request(hooks, attempt=2, pool=(4, 6))
+        request(hooks, pool=(4, 1))
+        for hit in (True, True, True, False):
+            hooks.on_cache_lookup('privilege', hit)
+        hooks.on_cache_lookup('api_token', False)
+
+        snapshot = hooks.snapshot()
+        self.assertEqual((1, 1, 1), (snapshot['in_flight'], snapshot['retries'], snapshot['token_refreshes']))
+        self.assertEqual({'hits': 3, 'misses': 1, 'hit_ratio': 0.75}, snapshot['caches']['privilege'])
+        self.assertEqual({'utilization': 0.25, 'peak_utilization': 1.0}, snapshot['pool'])
+
+        hooks.reset()
+        self.assertEqual(([], 0, 1), (hooks.snapshot()['requests'], hooks.snapshot()['retries'],
+                                      hooks.snapshot()['in_flight']))
+
+    def test_render_prometheus(self):
+        hooks = MetricsHooks(buckets=(0.1,))
+        request(hooks, duration=0.05)
+        hooks.on_cache_lookup('api_token', True)
+
+        rendered = render_prometheus(hooks.snapshot(), labels={'conjur': 'https://conjur'})
+
+        self.assertIn('# TYPE conjur_client_request_duration_seconds histogram\n', rendered)
+        self.assertIn('conjur_client_requests_total{conjur="https://conjur",endpoint="SECRETS",status="200"} 1\n',
+                      rendered)
+        self.assertIn('conjur_client_request_duration_seconds_bucket{conjur="https://conjur",endpoint="SECRETS",'
+                      'status="200",le="0.1"} 1\n', rendered)
+        self.assertIn('status="200",le="+Inf"} 1\n', rendered)
+        self.assertIn('conjur_client_cache_lookups_total{conjur="https://conjur",cache="api_token",result="hit"} 1\n',
+                      rendered)
+        self.assertIn('conjur_client_token_refreshes_total{conjur="https://conjur"} 0\n', rendered)
+
+
+class ClientMetricsTest(IsolatedAsyncioTestCase):
+
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    async def test_client_metrics(self, mock_invoke_request):
+        mock_invoke_request.return_value = HttpResponse(mock.MagicMock(status=204), '', b'')
+        client = Client(ConjurConnectionInfo(conjur_url='https://conjur-https', account='test'),
+                        ssl_verification_mode=SslVerificationMode.INSECURE)
+        client._api._api_token = 'token'
+        client._api.api_token_expiration = datetime.now() + timedelta(days=1)
+        self.assertIsNone(client.metrics())
+
+        hooks = client.enable_metrics()
+        self.assertIs(hooks, client.enable_metrics())
+        client.enable_privilege_cache()
+        for _ in range(2):
+            await client.check_privilege('variable', 'db/password', 'read')
+
+        metrics = client.metrics()
+        self.assertEqual([('PRIVILEGE', 204, 1)],
+                         [(series['endpoint'], series['status'], series['count']) for series in metrics['requests']])
+        self.assertEqual(0.5, metrics['caches']['privilege']['hit_ratio'])
+
+        client.disable_metrics()
+        self.assertIsNone(client.metrics())
+        self.assertEqual((), client._request_hooks)
@@ -0,0 +1,80 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import IsolatedAsyncioTestCase, mock
+from unittest.mock import patch
+
+from conjur_api.client import Client
+from conjur_api.instrumentation import SlowRequestHooks
+from conjur_api.models import SslVerificationMode
+from conjur_api.models.general.conjur_connection_info import ConjurConnectionInfo
+from conjur_api.models.general.request_event import RequestEvent
+from conjur_api.wrappers.http_response import HttpResponse
+
+
+def request(hooks: SlowRequestHooks, endpoint='SECRETS', duration=2.0, attempt=1, phases=None):
+    event = RequestEvent(endpoint, 'GET', attempt)
+    event.params = {'account': 'test', 'identifier': 'db/password'}
+    event.status, event.duration, event.phases = 200, duration, phases or {}
+    hooks.on_request_end(event)
+
+
+class SlowRequestHooksTest(unittest.TestCase):
+
+    def test_slow_requests_are_logged_with_their_phases(self):
+        hooks = SlowRequestHooks(threshold_seconds=1)
+
+        with self.assertLogs(level='WARNING') as logs:
+            request(hooks, duration=0.5)
+            request(hooks, attempt=2, phases={'queue': 0.3, 'wait': 1.5, 'connect': 0.1})
+
+        self.assertEqual(1, len(logs.records))
+        record = logs.records[0]
+        self.assertEqual("Slow Conjur request. Endpoint: GET /secrets/{account}/{kind}/{identifier}, Status: 200, "
+                         "Attempt: 2, Duration: 2000ms, Phases: queue=300ms, connect=100ms, wait=1500ms, Error: None",
+                         record.getMessage())
+        self.assertEqual({'endpoint': 'SECRETS', 'template': '/secrets/{account}/{kind}/{identifier}', 'verb': 'GET',
+                          'status': 200, 'attempt': 2, 'duration': 2.0,
+                          'phases': {'queue': 0.3, 'wait': 1.5, 'connect': 0.1}, 'connection_reused': None,
+                          'error': None}, record.conjur_request)
+        self.assertNotIn('db/password', record.getMessage())
+
+    @patch('conjur_api.instrumentation.slow_requests.time.monotonic')
+    def test_slowest_endpoints_over_the_window(self, mock_monotonic):
+        hooks = SlowRequestHooks(threshold_seconds=1, window_seconds=60)
+        mock_monotonic.return_value = 0
+        with self.assertLogs(level='WARNING'):
+            request(hooks, endpoint='RESOURCES', duration=30)
+            mock_monotonic.return_value = 50
+            request(hooks, duration=2)
+            request(hooks, duration=4)
+            request(hooks, endpoint='AUTHENTICATE', duration=1)
+
+        self.assertEqual([('RESOURCES', 1), ('SECRETS', 2), ('AUTHENTICATE', 1)],
+                         [(summary['endpoint'], summary['count']) for summary in hooks.slowest_endpoints()])
+
+        mock_monotonic.return_value = 100
+        self.assertEqual([{'endpoint': 'SECRETS', 'template': '/secrets/{account}/{kind}/{identifier}', 'count': 2,
+                           'max_duration': 4, 'mean_duration': 3.0}], hooks.slowest_endpoints(limit=1))
+
+
+class ClientSlowEndpointsTest(IsolatedAsyncioTestCase):
+
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    async def test_client_slow_endpoints(self, mock_invoke_request):
+        mock_invoke_request.return_value = HttpResponse(mock.MagicMock(status=200), 'secret', b'secret')
+        client = Client(ConjurConnectionInfo(conjur_url='https://conjur-https', account='test'),
+                        ssl_verification_mode=SslVerificationMode.INSECURE)
+        client._api._api_token = 'token'
+        client._api.api_token_expiration = datetime.now() + timedelta(days=1)
+        self.assertEqual([], client.slow_endpoints())
+
+        client.enable_slow_request_log(threshold_seconds=0)
+        with self.assertLogs(level='WARNING') as logs:
+            await client.get('db/password')
+
+        self.assertEqual(['SECRETS'], [summary['endpoint'] for summary in client.slow_endpoints()])
+        self.assertNotIn('secret', logs.output[0].replace('/secrets/', ''))
+        self.assertNotIn('token', logs.output[0])
+
+        client.disable_slow_request_log()
+        self.assertEqual([], client.slow_endpoints())
@@ -0,0 +1,115 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import IsolatedAsyncioTestCase, mock
+from unittest.mock import patch
+
+from aiohttp import ClientResponseError
+
+from conjur_api.client import Client
+from conjur_api.models import SslVerificationMode
+from conjur_api.models.general.conjur_connection_info import ConjurConnectionInfo
+from conjur_api.wrappers.http_response import HttpResponse
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.trace import StatusCode
+except ImportError:  # pragma: no cover
+    TracerProvider = None
+
+
+def response(status: int, text: str = '') -> HttpResponse:
+    raise_for_status = mock.MagicMock()
+    if status >= 400:
+        raise_for_status.side_effect = ClientResponseError(mock.MagicMock(), (), status=status)
+    return HttpResponse(mock.MagicMock(status=status, raise_for_status=raise_for_status), text, text.encode())
+
+
+@unittest.skipIf(TracerProvider is None, 'opentelemetry-sdk is not installed')
+class TracingHooksTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.provider = TracerProvider()
+        self.provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        self.tracer = self.provider.get_tracer('test')
+
+        self.client = Client(ConjurConnectionInfo(conjur_url='https://conjur-https', account='test'),
+                             ssl_verification_mode=SslVerificationMode.INSECURE)
+        self.client._api._api_token = 'token'
+        self.client._api.api_token_expiration = datetime.now() + timedelta(days=1)
+        self.hooks = self.client.enable_tracing(self.provider)
+
+    def spans(self) -> dict:
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+    @patch('asyncio.sleep')
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    async def test_attempt_spans_are_nested_under_the_call_span_of_the_caller(self, mock_invoke_request, _):
+        mock_invoke_request.side_effect = [response(503), response(201)]
+
+        with self.tracer.start_as_current_span('caller'):
+            await self.client.set_many({'db/password': 'secret'})
+
+        spans = self.exporter.get_finished_spans()
+        self.assertEqual(['POST SECRETS', 'POST SECRETS', 'conjur.set_many', 'caller'],
+                         [span.name for span in spans])
+        first, second, call, caller = spans
+        self.assertEqual(caller.context.span_id, call.parent.span_id)
+        self.assertEqual([call.context.span_id] * 2, [first.parent.span_id, second.parent.span_id])
+        self.assertEqual((503, 1, 'HttpStatusError', StatusCode.ERROR),
+                         (first.attributes['http.response.status_code'], first.attributes['conjur.attempt'],
+                          first.attributes['error.type'], first.status.status_code))
+        self.assertEqual((201, 2, 1), (second.attributes['http.response.status_code'],
+                                       second.attributes['conjur.attempt'],
+                                       second.attributes['http.request.resend_count']))
+        self.assertEqual(1, call.attributes['conjur.retry_count'])
+        self.assertEqual('hit', call.attributes['conjur.cache.api_token'])
+
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    async def test_ids_and_secrets_are_not_recorded(self, mock_invoke_request):
+        mock_invoke_request.return_value = response(201)
+
+        await self.client.set('db/password', 'secret')
+
+        for span in self.exporter.get_finished_spans():
+            self.assertNotIn('db/password', str(span.attributes))
+            self.assertNotIn('secret', str(span.attributes))
+
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    async def test_ids_are_recorded_when_opted_in(self, mock_invoke_request):
+        mock_invoke_request.return_value = response(201)
+        self.client.remove_request_hooks(self.hooks)
+        self.client.enable_tracing(self.provider, record_ids=True)
+
+        await self.client.set('db/password', 'secret')
+
+        attributes = self.spans()['POST SECRETS'].attributes
+        self.assertEqual('db/password', attributes['conjur.params.identifier'])
+        self.assertNotIn('secret', str(attributes))
+
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    async def test_cache_lookups_are_recorded_on_the_call_span(self, mock_invoke_request):
+        mock_invoke_request.return_value = response(204)
+        self.client.enable_privilege_cache()
+
+        await self.client.check_privilege('variable', 'db/password', 'read')
+        self.assertEqual('miss', self.spans()['conjur.check_privilege'].attributes['conjur.cache.privilege'])
+        self.exporter.clear()
+
+        await self.client.check_privilege('variable', 'db/password', 'read')
+        self.assertEqual('hit', self.spans()['conjur.check_privilege'].attributes['conjur.cache.privilege'])
+        self.assertEqual(1, mock_invoke_request.call_count)
+
+    @patch('conjur_api.wrappers.http_wrapper.invoke_request')
+    async def test_failed_calls_are_marked_without_the_error_message(self, mock_invoke_request):
+        mock_invoke_request.return_value = response(404, 'not found: db/password')
+
+        with self.assertRaises(Exception):
+            await self.client.get('db/password')
+
+        call = self.spans()['conjur.get']
+        self.assertEqual(StatusCode.ERROR, call.status.status_code)
+        self.assertIsNone(call.status.description)
+        self.assertEqual((), call.events)
@@ -1,6 +1,7 @@
 import unittest
 
-from conjur_api.models import CreateHostData
+from conjur_api.errors.errors import InvalidFormatException
+from conjur_api.models import CreateHostData, CreateTokenData
 
 
 class HostFactoryTest(unittest.TestCase):
@@ -10,3 +11,9 @@ class HostFactoryTest(unittest.TestCase):
         self.assertDictEqual({"id": "1234"}, create_host_data.get_host_id())
         self.assertDictEqual({"annotations[creator]": "john", "annotations[date]": "today"},
                              create_host_data.get_annotations())
+
+    def test_create_token_data_count(self):
+        self.assertEqual(1, CreateTokenData(host_factory='hf', days=1).to_dict()['count'])
+        self.assertEqual(3, CreateTokenData(host_factory='hf', days=1, count=3).to_dict()['count'])
+        with self.assertRaises(InvalidFormatException):
+            CreateTokenData(host_factory='hf', days=1, count=0)
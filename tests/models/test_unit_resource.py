@@ -0,0 +1,48 @@
+import copy
+import pickle
+import unittest
+
+from conjur_api.errors.errors import MissingRequiredParameterException
+from conjur_api.models import ListMembersOfData, Resource
+
+
+class ResourceTest(unittest.TestCase):
+
+    def test_from_full_id_parses_ids_with_and_without_account(self):
+        self.assertEqual(Resource('host', 'app/web'), Resource.from_full_id('host:app/web'))
+        self.assertEqual(Resource('host', 'app/web'), Resource.from_full_id('acct:host:app/web'))
+        self.assertEqual(Resource('variable', 'a:b'), Resource.from_full_id('acct:variable:a:b'))
+
+    def test_from_full_id_requires_kind(self):
+        with self.assertRaises(MissingRequiredParameterException):
+            Resource.from_full_id('no-kind')
+
+    def test_resources_are_hashable_and_deduplicated_by_value(self):
+        resources = {Resource('user', 'alice'), Resource.from_full_id('acct:user:alice'), Resource('user', 'bob')}
+        self.assertEqual(2, len(resources))
+        self.assertEqual('x', {Resource('user', 'alice'): 'x'}[Resource.from_full_id('user:alice')])
+        self.assertNotEqual(Resource('user', 'alice'), 'user:alice')
+
+    def test_resources_are_immutable(self):
+        resource = Resource('user', 'alice')
+        with self.assertRaises(AttributeError):
+            resource.kind = 'host'
+        with self.assertRaises(AttributeError):
+            resource.extra = 'value'
+
+    def test_resources_share_kind_strings(self):
+        first = Resource.from_full_id('acct:variable:one')
+        second = Resource.from_full_id('acct:variable:two')
+        self.assertIs(first.kind, second.kind)
+
+    def test_resources_can_be_copied_and_pickled(self):
+        resource = Resource('user', 'alice')
+        self.assertEqual(resource, copy.copy(resource))
+        self.assertEqual(resource, pickle.loads(pickle.dumps(resource)))
+
+    def test_list_data_dictify_with_slots(self):
+        data = ListMembersOfData(kind='group', identifier='admins', limit=10)
+        data.set_resource(Resource('group', 'admins'))
+        self.assertEqual({'kind': 'group', 'limit': 10, 'resource': Resource('group', 'admins'),
+                          'identifier': 'admins'}, data.list_dictify())
+        self.assertFalse(hasattr(data, '__dict__'))
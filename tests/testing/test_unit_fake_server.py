@@ -0,0 +1,110 @@
+import time
+from unittest import IsolatedAsyncioTestCase
+import unittest
+
+from conjur_api.client import Client
+from conjur_api.errors.errors import HttpStatusError
+from conjur_api.models import CreateHostData, CreateTokenData, SslVerificationMode
+from conjur_api.testing import FakeConjurServer
+
+
+def client_of(server: FakeConjurServer, login: str = 'admin', async_mode: bool = True) -> Client:
+    return Client(server.connection_info, authn_strategy=server.authn_strategy(login),
+                  ssl_verification_mode=SslVerificationMode.INSECURE, async_mode=async_mode)
+
+
+class FakeConjurServerTest(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = await FakeConjurServer(variables=6, hosts=4, groups=2).start()
+        self.client = client_of(self.server)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def test_secrets_can_be_read_and_written(self):
+        self.assertEqual(b'value-0', await self.client.get('app-0/secret-0'))
+        self.assertEqual({'app-0/secret-0': 'value-0', 'app-1/secret-3': 'value-3'},
+                         await self.client.get_many('app-0/secret-0', 'app-1/secret-3'))
+
+        await self.client.set('app-0/secret-0', 'rotated')
+
+        self.assertEqual(b'rotated', await self.client.get('app-0/secret-0'))
+        self.assertEqual(b'value-0', await self.client.get('app-0/secret-0', version='1'))
+
+    async def test_resources_are_listed_and_counted(self):
+        variables = await self.client.list({'kind': 'variable'})
+
+        self.assertEqual(6, len(variables))
+        self.assertEqual(2, len(await self.client.list({'kind': 'variable', 'limit': 2, 'offset': 4})))
+        self.assertEqual(4, await self.client.count_resources(kind='host'))
+        self.assertEqual(3, await self.client.count_resources(kind='variable', search='app-1'))
+
+    async def test_privileges_follow_group_memberships(self):
+        self.assertTrue(await self.client.check_privilege('variable', 'app-0/secret-2', 'execute',
+                                                          'fake:host:host-0'))
+        self.assertFalse(await self.client.check_privilege('variable', 'app-1/secret-1', 'execute',
+                                                           'fake:host:host-0'))
+        self.assertEqual(['fake:group:group-1', 'fake:host:host-1'],
+                         await self.client.role_memberships('host', 'host-1'))
+
+        host_client = client_of(self.server, 'host/host-1')
+        self.assertEqual(b'value-1', await host_client.get('app-1/secret-1'))
+        with self.assertRaises(HttpStatusError) as context:
+            await host_client.get('app-0/secret-0')
+        self.assertEqual(403, context.exception.status)
+
+    async def test_hosts_are_created_with_the_host_factory(self):
+        tokens = await self.client.create_token(CreateTokenData(host_factory='factory', days=1))
+        token = tokens[0]['token']
+
+        host = await self.client.create_host(CreateHostData(host_id='new-host', token=token))
+
+        self.assertEqual('fake:host:new-host', host['id'])
+        self.assertEqual('host/new-host', (await client_of(self.server, 'host/new-host').whoami())['username'])
+        self.assertEqual(204, await self.client.revoke_token(token))
+
+    async def test_injected_failures_are_retried_by_batch_operations(self):
+        self.server.fail_next(2, 503, endpoint='SECRETS')
+
+        result = await self.client.set_many({'app-0/secret-0': 'a', 'app-1/secret-1': 'b'})
+
+        self.assertEqual(2, len(result.succeeded))
+        self.assertEqual(4, self.server.request_counts['SECRETS'])
+
+    async def test_error_rate_fails_requests_with_the_error_status(self):
+        self.server.error_rate, self.server.error_status = 1.0, 502
+
+        with self.assertRaises(HttpStatusError) as context:
+            await self.client.whoami()
+        self.assertEqual(502, context.exception.status)
+
+    async def test_rate_limit_rejects_requests_beyond_the_limit(self):
+        await self.client.whoami()
+        self.server.rate_limit = 2
+
+        statuses = []
+        for _ in range(4):
+            try:
+                await self.client.whoami()
+                statuses.append(200)
+            except HttpStatusError as err:
+                statuses.append(err.status)
+
+        self.assertEqual([200, 200, 429, 429], statuses)
+
+    async def test_latency_delays_every_request(self):
+        await self.client.whoami()
+        self.server.latency = 0.05
+
+        started_at = time.monotonic()
+        await self.client.whoami()
+
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.05)
+
+
+class FakeConjurServerThreadTest(unittest.TestCase):
+
+    def test_sync_clients_are_served_from_a_thread(self):
+        with FakeConjurServer(variables=1) as server:
+            self.assertEqual(b'value-0', client_of(server, async_mode=False).get('app-0/secret-0'))
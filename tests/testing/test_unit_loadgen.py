@@ -0,0 +1,84 @@
+import argparse
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest import IsolatedAsyncioTestCase
+
+from conjur_api.client import Client
+from conjur_api.loadgen import LoadContext, LoadGenerator, format_report, main, parse_mix
+from conjur_api.models import SslVerificationMode
+from conjur_api.testing import FakeConjurServer
+
+VARIABLES = ['app-0/secret-0', 'app-1/secret-1', 'app-0/secret-2']
+
+
+class ParseMixTest(unittest.TestCase):
+
+    def test_mix_is_parsed_into_weights(self):
+        self.assertEqual({'get': 80.0, 'list': 20.0, 'whoami': 1.0}, parse_mix('get=80, list=20,whoami'))
+
+    def test_unknown_operations_and_invalid_weights_are_rejected(self):
+        for mix in ('get=80,fetch=20', 'get=many', 'get=0'):
+            with self.subTest(mix=mix), self.assertRaises(argparse.ArgumentTypeError):
+                parse_mix(mix)
+
+
+class LoadGeneratorTest(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = await FakeConjurServer(variables=3).start()
+        self.client = Client(self.server.connection_info, authn_strategy=self.server.authn_strategy(),
+                             ssl_verification_mode=SslVerificationMode.INSECURE)
+        self.client.enable_metrics()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def test_closed_loop_reports_every_operation_of_the_mix(self):
+        generator = LoadGenerator(LoadContext(self.client, VARIABLES, batch_size=2, seed=1),
+                                  {'get': 3, 'get_many': 1, 'check_privilege': 1}, duration=0.3, concurrency=4)
+
+        report = await generator.run()
+
+        self.assertEqual('concurrency 4', report['mode'])
+        self.assertEqual({'get', 'get_many', 'check_privilege'}, set(report['per_operation']))
+        self.assertEqual(report['operations'], sum(summary['operations']
+                                                   for summary in report['per_operation'].values()))
+        self.assertEqual(report['operations'], sum(report['per_operation']['get']['histogram'].values()) +
+                         sum(report['per_operation']['get_many']['histogram'].values()) +
+                         sum(report['per_operation']['check_privilege']['histogram'].values()))
+        self.assertEqual(0.0, report['error_rate'])
+        self.assertGreater(report['cpu_seconds'], 0)
+        self.assertIn('get latency histogram', format_report(report))
+
+    async def test_open_loop_starts_operations_at_the_target_rate(self):
+        generator = LoadGenerator(LoadContext(self.client, VARIABLES, batch_size=2, seed=1), {'get': 1},
+                                  duration=0.5, rate=40)
+
+        report = await generator.run()
+
+        self.assertEqual(20, report['operations'])
+        self.assertEqual(0, report['missed'])
+
+    async def test_errors_are_counted_by_status(self):
+        self.server.error_rate = 1.0
+        generator = LoadGenerator(LoadContext(self.client, VARIABLES, batch_size=2, seed=1), {'whoami': 1},
+                                  duration=0.1, concurrency=1)
+
+        report = await generator.run()
+
+        self.assertEqual(1.0, report['error_rate'])
+        self.assertEqual({'HTTP 503': report['operations']}, report['per_operation']['whoami']['errors'])
+
+
+class MainTest(unittest.TestCase):
+
+    def test_fake_server_load_is_reported_as_json(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(['--fake', '--fake-variables', '5', '--duration', '0.2', '--mix', 'get=1,list=1', '--json'])
+
+        report = json.loads(output.getvalue())
+        self.assertGreater(report['operations'], 0)
+        self.assertLessEqual(set(report['per_operation']), {'get', 'list'})
@@ -0,0 +1,87 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from conjur_api.errors.errors import DependencyFailedException, InvalidFormatException
+from conjur_api.utils.concurrency import gather_with_dependencies, iter_bounded
+
+
+class IterBoundedTest(IsolatedAsyncioTestCase):
+
+    async def test_ordered_does_not_run_ahead_of_a_stalled_result(self):
+        first_done = asyncio.Event()
+        started = []
+
+        def factory(index):
+            async def run():
+                started.append(index)
+                if index == 0:
+                    await first_done.wait()
+                return index
+            return run
+
+        results = iter_bounded((factory(index) for index in range(10)), concurrency=3, ordered=True)
+        first = asyncio.ensure_future(results.__anext__())
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        # The other results are held back until the first one is in, so no more than
+        # concurrency are started
+        self.assertEqual([0, 1, 2], started)
+
+        first_done.set()
+        self.assertEqual(0, await first)
+        self.assertEqual(list(range(1, 10)), [result async for result in results])
+        self.assertEqual(list(range(10)), started)
+
+
+class GatherWithDependenciesTest(IsolatedAsyncioTestCase):
+
+    async def test_runs_dependencies_first_within_the_concurrency_limit(self):
+        started, in_flight, peak = [], set(), []
+
+        def factory(name):
+            async def run():
+                started.append(name)
+                in_flight.add(name)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0)
+                in_flight.discard(name)
+                return name.upper()
+            return run
+
+        names = ['apps', 'apps/web', 'apps/db', 'db', 'root']
+        outcomes = await gather_with_dependencies({name: factory(name) for name in names},
+                                                  {'apps/web': ['apps', 'db'], 'apps/db': ['apps'],
+                                                   'apps': ['root', 'not-in-batch']},
+                                                  concurrency=2)
+
+        self.assertEqual({name: name.upper() for name in names}, outcomes)
+        self.assertEqual(names, list(outcomes))
+        self.assertLess(started.index('root'), started.index('apps'))
+        self.assertLess(started.index('apps'), started.index('apps/db'))
+        self.assertLess(started.index('db'), started.index('apps/web'))
+        self.assertLessEqual(max(peak), 2)
+
+    async def test_skips_the_dependents_of_failures(self):
+        async def fail():
+            raise ValueError('boom')
+
+        async def succeed():
+            return 'ok'
+
+        outcomes = await gather_with_dependencies(
+            {'root': fail, 'apps': succeed, 'apps/web': succeed, 'other': succeed},
+            {'apps': ['root'], 'apps/web': ['apps']})
+
+        self.assertIsInstance(outcomes['root'], ValueError)
+        self.assertIsInstance(outcomes['apps'], DependencyFailedException)
+        self.assertEqual(('apps/web', 'root'), (outcomes['apps/web'].item, outcomes['apps/web'].dependency))
+        self.assertEqual('ok', outcomes['other'])
+
+    async def test_rejects_cycles(self):
+        async def succeed():
+            return 'ok'
+
+        with self.assertRaises(InvalidFormatException):
+            await gather_with_dependencies({'a': succeed, 'b': succeed, 'c': succeed},
+                                           {'a': ['b'], 'b': ['a']})
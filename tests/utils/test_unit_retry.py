@@ -0,0 +1,59 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, Mock, patch
+
+from aiohttp import ClientConnectorError, ServerDisconnectedError
+
+from conjur_api.errors.errors import HttpError, HttpSslError, HttpStatusError
+from conjur_api.utils.retry import is_transient_error, is_unprocessed_error, retry_transient_errors
+
+
+class RetryTest(IsolatedAsyncioTestCase):
+
+    def test_transient_errors(self):
+        self.assertTrue(is_transient_error(HttpStatusError(status=503)))
+        self.assertTrue(is_transient_error(HttpError()))
+        self.assertTrue(is_transient_error(asyncio.TimeoutError()))
+        self.assertFalse(is_transient_error(HttpStatusError(status=404)))
+        self.assertFalse(is_transient_error(HttpSslError()))
+        self.assertFalse(is_transient_error(ValueError()))
+
+    def test_unprocessed_errors(self):
+        def http_error(cause: Exception) -> HttpError:
+            error = HttpError()
+            error.__cause__ = cause
+            return error
+
+        self.assertTrue(is_unprocessed_error(HttpStatusError(status=429)))
+        self.assertTrue(is_unprocessed_error(HttpStatusError(status=503)))
+        self.assertTrue(is_unprocessed_error(http_error(ClientConnectorError(Mock(), ConnectionRefusedError()))))
+        self.assertFalse(is_unprocessed_error(HttpStatusError(status=502)))
+        self.assertFalse(is_unprocessed_error(HttpStatusError(status=504)))
+        self.assertFalse(is_unprocessed_error(http_error(ServerDisconnectedError())))
+        self.assertFalse(is_unprocessed_error(asyncio.TimeoutError()))
+        self.assertFalse(is_unprocessed_error(HttpSslError()))
+
+    @patch('conjur_api.utils.retry.asyncio.sleep', new_callable=AsyncMock)
+    async def test_retries_transient_errors_with_backoff(self, mock_sleep):
+        func = AsyncMock(side_effect=[HttpError(), HttpStatusError(status=502), 'done'])
+
+        self.assertEqual('done', await retry_transient_errors(func, attempts=3, backoff_seconds=1))
+        self.assertEqual(3, func.call_count)
+        self.assertEqual([((1,),), ((2,),)], mock_sleep.call_args_list)
+
+    @patch('conjur_api.utils.retry.asyncio.sleep', new_callable=AsyncMock)
+    async def test_gives_up_after_attempts_or_on_permanent_errors(self, mock_sleep):
+        func = AsyncMock(side_effect=HttpError())
+        with self.assertRaises(HttpError):
+            await retry_transient_errors(func, attempts=2)
+        self.assertEqual(2, func.call_count)
+
+        func = AsyncMock(side_effect=HttpStatusError(status=403))
+        with self.assertRaises(HttpStatusError):
+            await retry_transient_errors(func, attempts=2)
+        self.assertEqual(1, func.call_count)
+
+        func = AsyncMock(side_effect=HttpStatusError(status=502))
+        with self.assertRaises(HttpStatusError):
+            await retry_transient_errors(func, attempts=2, is_retryable=is_unprocessed_error)
+        self.assertEqual(1, func.call_count)